@@ -0,0 +1,170 @@
+from array import array
+
+# Árbol sintáctico concreto que arma parser.analizar_flujo con traza="arbol". Los nodos
+# se guardan en arreglos paralelos indexados por número de nodo, no en un objeto por nodo:
+#  - simbolos: id del símbolo en tc.simbolos (terminal o no terminal);
+#  - producciones: id de la producción aplicada al no terminal, o -1 en las hojas terminales;
+#  - inicios: índice del primer token que cubre el nodo (el de anticipación al expandirlo);
+#  - primeros_hijos: número del primer hijo, o -1. Los hijos de un nodo se crean juntos
+#    al expandirlo, así que son consecutivos y son tantos como símbolos tiene el cuerpo
+#    de su producción (sin ε).
+# Son 12 bytes por nodo. El fin de cada tramo [inicio, fin) se calcula recién cuando se
+# pide, en un arreglo más de 4 bytes por nodo. El nodo 0 es la raíz; Nodo(arbol, i) es
+# una vista que lee los arreglos al navegar. `tokens`, si se conoce, es la secuencia de
+# tokens analizada y permite obtener el Token de cada hoja.
+#
+# Las gramáticas recursivas por la derecha (lista_sentencias, p. ej.) dan árboles tan
+# profundos como largo es el programa, así que todos los recorridos son iterativos.
+
+class ArbolSintactico:
+    def __init__(self, tc, simbolos, producciones, inicios, primeros_hijos, tokens=None):
+        self.tc = tc
+        self.simbolos = simbolos
+        self.producciones = producciones
+        self.inicios = inicios
+        self.primeros_hijos = primeros_hijos
+        self.tokens = tokens
+        self._largos = [len(c) for c in tc.cuerpos_invertidos]
+        self._fines = None
+
+    def __len__(self):
+        return len(self.simbolos)
+
+    @property
+    def raiz(self):
+        return Nodo(self, 0)
+
+    def nodo(self, indice):
+        return Nodo(self, indice)
+
+    def hijos(self, indice):
+        primero = self.primeros_hijos[indice]
+        if primero < 0:
+            return range(0)
+        return range(primero, primero + self._largos[self.producciones[indice]])
+
+    @property
+    def fines(self):
+        # Los hijos siempre tienen números mayores que su padre: recorriendo de atrás para
+        # adelante, el fin del último hijo ya está calculado cuando se llega al padre.
+        if self._fines is None:
+            fines = array('I', bytes(4 * len(self)))
+            simbolos, producciones, inicios, primeros = self.simbolos, self.producciones, self.inicios, self.primeros_hijos
+            largos = self._largos
+            id_desconocido = self.tc.id_desconocido
+            for i in range(len(fines) - 1, -1, -1):
+                primero = primeros[i]
+                if primero >= 0:
+                    fines[i] = fines[primero + largos[producciones[i]] - 1]
+                elif simbolos[i] < id_desconocido:
+                    fines[i] = inicios[i] + 1
+                else:
+                    fines[i] = inicios[i]
+            self._fines = fines
+        return self._fines
+
+    def recorrer(self, desde=0):
+        # Números de nodo en preorden.
+        pila = [desde]
+        while pila:
+            i = pila.pop()
+            yield i
+            hijos = self.hijos(i)
+            if hijos:
+                pila.extend(reversed(hijos))
+
+    def recorrido(self):
+        # (símbolo, producción, inicio, fin) de cada nodo en preorden, con los ids de la
+        # tabla; mismo formato que referencias.recorrido_arbol_referencia.
+        fines = self.fines
+        for i in self.recorrer():
+            yield self.simbolos[i], self.producciones[i], self.inicios[i], fines[i]
+
+    def bytes_ocupados(self):
+        arreglos = (self.simbolos, self.producciones, self.inicios, self.primeros_hijos, self._fines)
+        return sum(a.itemsize * len(a) for a in arreglos if a is not None)
+
+class Nodo:
+    __slots__ = ("arbol", "indice")
+
+    def __init__(self, arbol, indice):
+        self.arbol = arbol
+        self.indice = indice
+
+    @property
+    def simbolo(self):
+        return self.arbol.tc.simbolos[self.arbol.simbolos[self.indice]]
+
+    @property
+    def es_terminal(self):
+        return self.arbol.simbolos[self.indice] < self.arbol.tc.id_desconocido
+
+    @property
+    def produccion(self):
+        # Tupla (A, prod) aplicada al nodo, la misma que registra la traza; None en las hojas.
+        p = self.arbol.producciones[self.indice]
+        return None if p < 0 else self.arbol.tc.producciones[p]
+
+    @property
+    def inicio(self):
+        return self.arbol.inicios[self.indice]
+
+    @property
+    def fin(self):
+        return self.arbol.fines[self.indice]
+
+    @property
+    def hijos(self):
+        return [Nodo(self.arbol, j) for j in self.arbol.hijos(self.indice)]
+
+    @property
+    def token(self):
+        # None en los no terminales, si no se conocen los tokens o si es el EOF que el
+        # parser agrega cuando la secuencia no lo trae.
+        tokens = self.arbol.tokens
+        if not self.es_terminal or tokens is None or self.inicio >= len(tokens):
+            return None
+        return tokens[self.inicio]
+
+    def recorrer(self):
+        for i in self.arbol.recorrer(self.indice):
+            yield Nodo(self.arbol, i)
+
+    def __eq__(self, otro):
+        return isinstance(otro, Nodo) and otro.arbol is self.arbol and otro.indice == self.indice
+
+    def __hash__(self):
+        return hash((id(self.arbol), self.indice))
+
+    def __repr__(self):
+        return f"Nodo({self.simbolo}, [{self.inicio}, {self.fin}))"
+
+def imprimir_arbol(arbol, max_nodos=200):
+    # Un nodo por línea, sangrado según la profundidad, con el lexema en las hojas.
+    lineas = []
+    pila = [(0, 0)]
+    while pila and len(lineas) < max_nodos:
+        i, profundidad = pila.pop()
+        nodo = Nodo(arbol, i)
+        texto = f"{'  ' * profundidad}{nodo.simbolo}"
+        if nodo.es_terminal and nodo.token is not None:
+            texto += f"  {nodo.token.lexema!r}"
+        lineas.append(texto)
+        pila.extend((j, profundidad + 1) for j in reversed(arbol.hijos(i)))
+    return "\n".join(lineas)
+
+if __name__ == "__main__":
+    import sys
+    import cache_tabla as Cmod
+    import parser as Pmod
+    from lexer import tokenizar
+
+    ruta = sys.argv[1] if len(sys.argv) > 1 else "test.py"
+    with open(ruta, "r", encoding="utf-8") as f:
+        tokens = tokenizar(f.read())
+    ok, mensaje, arbol = Pmod.analizar_compilado(tokens, Cmod.gramatica_compilada().compilada, traza="arbol")
+    if not ok:
+        print(mensaje)
+        sys.exit(1)
+    print(f"{len(arbol)} nodos, {arbol.bytes_ocupados()} bytes")
+    print(imprimir_arbol(arbol))
@@ -0,0 +1,1180 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+def _resumen(nombre, tiempos):
+    return f"{nombre:<28} media {statistics.mean(tiempos) * 1000:9.2f} ms   min {min(tiempos) * 1000:9.2f} ms   (n={len(tiempos)})"
+
+def bench_arranque(args):
+    # Mide el tiempo total de `python main.py archivo` con la cache de la tabla
+    # fría (borrada antes de cada ejecución) y caliente (ya construida).
+    import cache_tabla as Cmod
+    archivo = os.path.abspath(args.archivo)
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_cache = os.path.join(tmp, "tabla.cache")
+        entorno = dict(os.environ, ANALIZADOR_CACHE_TABLA=ruta_cache)
+        comando = [sys.executable, os.path.join(DIRECTORIO, "main.py"), archivo]
+
+        def ejecutar():
+            inicio = time.perf_counter()
+            subprocess.run(comando, cwd=tmp, env=entorno, stdout=subprocess.DEVNULL, check=True)
+            return time.perf_counter() - inicio
+
+        frios = []
+        for _ in range(args.repeticiones):
+            Cmod.invalidar_cache(ruta_cache)
+            frios.append(ejecutar())
+        calientes = [ejecutar() for _ in range(args.repeticiones)]
+
+    print(_resumen("arranque en frío", frios))
+    print(_resumen("arranque en caliente", calientes))
+    print(f"aceleración: {statistics.mean(frios) / statistics.mean(calientes):.2f}x")
+
+def _cronometrar(funcion, repeticiones):
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return resultado, tiempos
+
+def _percentiles(tiempos):
+    ordenados = sorted(tiempos)
+    p50 = ordenados[len(ordenados) // 2]
+    p99 = ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.99))]
+    return p50, p99
+
+def bench_parser(args):
+    # Throughput de analizar (dict de tuplas) frente a analizar_compilado (array de enteros)
+    # sobre un programa sintético de varios MB.
+    import cache_tabla as Cmod
+    import generador
+    import grammar as Gmod
+    import parser as Pmod
+    from lexer import tokenizar
+
+    fuente = generador.generar_programa(args.megas * 1_000_000, semilla=args.semilla)
+    tokens = tokenizar(fuente)
+    gc = Cmod.gramatica_compilada()
+    tabla, gramatica_norm, tc = gc.tabla, gc.gramatica_norm, gc.compilada
+    print(f"entrada: {len(fuente) / 1e6:.1f} MB, {len(tokens)} tokens")
+
+    res_dict, t_dict = _cronometrar(lambda: Pmod.analizar(tokens, tabla, gramatica_norm, Gmod.SIMBOLO_INICIAL), args.repeticiones)
+    res_comp, t_comp = _cronometrar(lambda: Pmod.analizar_compilado(tokens, tc), args.repeticiones)
+    if res_dict != res_comp:
+        print("ERROR: los resultados de analizar y analizar_compilado difieren", file=sys.stderr)
+        sys.exit(1)
+
+    for nombre, tiempos in (("analizar (dict)", t_dict), ("analizar_compilado", t_comp)):
+        print(f"{_resumen(nombre, tiempos)}   {len(tokens) / min(tiempos) / 1e6:.2f} Mtokens/s")
+    print(f"aceleración: {min(t_dict) / min(t_comp):.2f}x")
+
+def bench_lexer(args):
+    # Velocidad de los motores del lexer en un archivo grande y en una línea muy larga.
+    # Que den los mismos tokens lo prueba test_diferencial.py.
+    import generador
+    from lexer import tokenizar
+
+    archivo_grande = generador.generar_programa(args.megas * 1_000_000, semilla=0)
+    linea_larga = "x = f(" + ", ".join(f"a{i}" for i in range(args.ancho)) + ")\n"
+    for descripcion, fuente in ((f"archivo de {args.megas} MB", archivo_grande), (f"línea de {len(linea_larga)} caracteres", linea_larga)):
+        print(descripcion)
+        for motor in ("clasico", "regex"):
+            tokens, tiempos = _cronometrar(lambda: tokenizar(fuente, motor), args.repeticiones)
+            print(f"  {_resumen(motor, tiempos)}   {len(tokens) / min(tiempos) / 1e6:.2f} Mtokens/s")
+
+def bench_descendente(args):
+    # Throughput del analizador descendente generado (descendente.py) frente a la pila de
+    # parser.analizar_compilado.
+    import descendente as Dmod
+    import generador
+    import main as Mmod
+    import parser as Pmod
+    from lexer import tokenizar
+
+    gc = Mmod.cargar_tabla()
+    tc = gc.compilada
+    modulo = Dmod.cargar(gc)
+    fuente = generador.generar_programa(args.megas * 1_000_000, semilla=args.semilla)
+    tokens = tokenizar(fuente)
+    print(f"entrada: {len(fuente) / 1e6:.1f} MB, {len(tokens)} tokens")
+    for traza in ("completa", "ninguna"):
+        _, t_pila = _cronometrar(lambda: Pmod.analizar_compilado(tokens, tc, traza), args.repeticiones)
+        _, t_desc = _cronometrar(lambda: modulo.analizar(tokens, tc, traza), args.repeticiones)
+        for nombre, tiempos in ((f"pila, traza {traza}", t_pila), (f"descendente, traza {traza}", t_desc)):
+            print(f"{_resumen(nombre, tiempos)}   {len(tokens) / min(tiempos) / 1e6:.2f} Mtokens/s")
+        print(f"aceleración: {min(t_pila) / min(t_desc):.2f}x")
+
+def _pico_memoria(funcion):
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        inicio = time.perf_counter()
+        resultado = funcion()
+        transcurrido = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return resultado, pico, transcurrido
+
+def bench_memoria(args):
+    # Pico de memoria (tracemalloc) del análisis con la fuente completa en memoria
+    # frente al modo de flujo de main.py, con y sin traza de producciones.
+    import generador
+    import main as Mmod
+
+    tc = Mmod.cargar_tabla().compilada
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "entrada.py")
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(generador.generar_programa(args.megas * 1_000_000, semilla=args.semilla))
+        print(f"entrada: {os.path.getsize(ruta) / 1e6:.1f} MB")
+
+        def completo(traza):
+            with open(ruta, "r", encoding="utf-8") as f:
+                return Mmod.analizar_fuente(f.read(), tc, traza)
+
+        def flujo(traza):
+            with open(ruta, "r", encoding="utf-8") as f:
+                return Mmod.analizar_archivo_en_flujo(f, tc, traza)
+
+        casos = [
+            ("completo, traza completa", lambda: completo("completa")),
+            ("completo, sin traza", lambda: completo("ninguna")),
+            ("flujo, traza completa", lambda: flujo("completa")),
+            ("flujo, sin traza", lambda: flujo("ninguna")),
+        ]
+        mensajes = set()
+        for nombre, funcion in casos:
+            (ok, mensaje, _), pico, transcurrido = _pico_memoria(funcion)
+            mensajes.add(mensaje)
+            print(f"{nombre:<28} pico {pico / 1e6:9.2f} MB   {transcurrido:7.2f} s")
+        if len(mensajes) != 1:
+            print(f"ERROR: los modos dieron resultados distintos: {mensajes}", file=sys.stderr)
+            sys.exit(1)
+
+def bench_tokens(args):
+    # Memoria retenida por token y velocidad de tokenizar y analizar con la lista de
+    # Token frente a lexer.BufferTokens (arreglos por campo y lexemas como offsets).
+    import tracemalloc
+    import generador
+    import main as Mmod
+    import parser as Pmod
+    from lexer import tokenizar, tokenizar_compacto
+
+    tc = Mmod.cargar_tabla().compilada
+    fuente = generador.generar_programa(args.megas * 1_000_000, semilla=args.semilla)
+    for nombre, funcion in (("lista de Token", lambda: tokenizar(fuente)), ("BufferTokens", lambda: tokenizar_compacto(fuente))):
+        tracemalloc.start()
+        try:
+            tokens = funcion()
+            retenido, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        print(f"{nombre:<28} {retenido / len(tokens):7.1f} bytes/token   retenido {retenido / 1e6:7.2f} MB   pico {pico / 1e6:7.2f} MB")
+        del tokens
+
+    lista, t_lista = _cronometrar(lambda: tokenizar(fuente), args.repeticiones)
+    buffer, t_buffer = _cronometrar(lambda: tokenizar_compacto(fuente), args.repeticiones)
+    if list(buffer) != lista:
+        print("ERROR: tokenizar_compacto no produce los mismos tokens que tokenizar", file=sys.stderr)
+        sys.exit(1)
+    print(f"\nentrada: {len(fuente) / 1e6:.1f} MB, {len(lista)} tokens (idénticos)")
+    for nombre, tiempos in (("tokenizar", t_lista), ("tokenizar_compacto", t_buffer)):
+        print(f"{_resumen(nombre, tiempos)}   {len(lista) / min(tiempos) / 1e6:.2f} Mtokens/s")
+
+    casos = [
+        ("analizar_compilado (lista)", lambda: Pmod.analizar_compilado(lista, tc)),
+        ("analizar_compilado (vista)", lambda: Pmod.analizar_compilado(buffer, tc)),
+        ("analizar_buffer", lambda: Pmod.analizar_buffer(buffer, tc)),
+    ]
+    resultados = set()
+    for nombre, funcion in casos:
+        (ok, mensaje, _), tiempos = _cronometrar(funcion, args.repeticiones)
+        resultados.add((ok, mensaje))
+        print(f"{_resumen(nombre, tiempos)}   {len(lista) / min(tiempos) / 1e6:.2f} Mtokens/s")
+    if len(resultados) != 1:
+        print(f"ERROR: los resultados difieren: {resultados}", file=sys.stderr)
+        sys.exit(1)
+
+def bench_nombres(args):
+    # Fuentes con muchos identificadores y palabras clave: velocidad de los motores del
+    # lexer y del análisis completo con main.analizar_fuente (BufferTokens, con el terminal
+    # de cada token resuelto por el lexer) frente a la lista de Token con
+    # parser.analizar_flujo, y memoria retenida por la lista de Token.
+    import tracemalloc
+    import generador
+    import main as Mmod
+    import parser as Pmod
+    from lexer import tokenizar, tokenizar_compacto, ErrorLexer
+
+    tc = Mmod.cargar_tabla().compilada
+
+    def por_lista(fuente, traza):
+        try:
+            tokens = tokenizar(fuente)
+        except ErrorLexer as e:
+            return False, Mmod.formatear_error_lexer(e), []
+        return Mmod.normalizar_resultado(Pmod.analizar_flujo(iter(tokens), tc, traza))
+
+    fuente = generador.generar_programa_nombres(args.megas * 1_000_000, semilla=args.semilla)
+    tracemalloc.start()
+    try:
+        tokens = tokenizar(fuente)
+        retenido, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    nombres = sum(t.tipo in ("ID", "KEYWORD") for t in tokens)
+    print(f"entrada: {len(fuente) / 1e6:.1f} MB, {len(tokens)} tokens ({nombres / len(tokens):.0%} nombres)")
+    print(f"lista de Token: {retenido / len(tokens):.1f} bytes/token retenidos")
+
+    casos = [
+        ("tokenizar clasico", lambda: tokenizar(fuente, "clasico")),
+        ("tokenizar regex", lambda: tokenizar(fuente)),
+        ("tokenizar_compacto", lambda: tokenizar_compacto(fuente)),
+        ("lista + analizar_flujo", lambda: por_lista(fuente, "ninguna")),
+        ("analizar_fuente", lambda: Mmod.analizar_fuente(fuente, tc, "ninguna")),
+    ]
+    tiempos_por_caso = {}
+    for nombre, funcion in casos:
+        _, tiempos = _cronometrar(funcion, args.repeticiones)
+        tiempos_por_caso[nombre] = min(tiempos)
+        print(f"{_resumen(nombre, tiempos)}   {len(tokens) / min(tiempos) / 1e6:.2f} Mtokens/s")
+    print(f"analizar_fuente vs lista + analizar_flujo: {tiempos_por_caso['lista + analizar_flujo'] / tiempos_por_caso['analizar_fuente']:.2f}x")
+
+def _con_fines(resultado):
+    resultado[2].fines
+    return resultado
+
+def bench_arbol(args):
+    # Costo de armar el árbol sintáctico durante el análisis: arreglos paralelos
+    # (traza="arbol") frente a un objeto por nodo (referencias.analizar_arbol_referencia), con
+    # la traza plana y sin traza como referencia.
+    import tracemalloc
+    import generador
+    import main as Mmod
+    import parser as Pmod
+    import referencias as Rmod
+    from lexer import tokenizar
+
+    tc = Mmod.cargar_tabla().compilada
+    fuente = generador.generar_programa(args.megas * 1_000_000, semilla=args.semilla)
+    tokens = tokenizar(fuente)
+    nodos = len(Pmod.analizar_compilado(tokens, tc, traza="arbol")[2])
+    print(f"entrada: {len(fuente) / 1e6:.1f} MB, {len(tokens)} tokens, {nodos} nodos")
+
+    casos = [
+        ("sin traza", lambda: Pmod.analizar_compilado(tokens, tc, traza="ninguna")),
+        ("traza completa", lambda: Pmod.analizar_compilado(tokens, tc)),
+        ("árbol compacto", lambda: Pmod.analizar_compilado(tokens, tc, traza="arbol")),
+        ("árbol compacto + fines", lambda: _con_fines(Pmod.analizar_compilado(tokens, tc, traza="arbol"))),
+        ("árbol de objetos", lambda: Rmod.analizar_arbol_referencia(tokens, tc)),
+    ]
+    for nombre, funcion in casos:
+        _, tiempos = _cronometrar(funcion, args.repeticiones)
+        tracemalloc.start()
+        try:
+            resultado = funcion()
+            retenido, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del resultado
+        print(f"{_resumen(nombre, tiempos)}   {retenido / nodos:6.1f} bytes/nodo   pico {pico / 1e6:7.2f} MB")
+
+def _ejecutar_con_rss(comando, cwd):
+    # Ejecuta el comando y devuelve (segundos, pico de RSS en bytes) del proceso hijo.
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(comando, cwd=cwd, stdout=subprocess.DEVNULL)
+    _, estado, uso = os.wait4(proceso.pid, 0)
+    transcurrido = time.perf_counter() - inicio
+    proceso.returncode = os.waitstatus_to_exitcode(estado)
+    if proceso.returncode != 0:
+        print(f"ERROR: {' '.join(comando)} terminó con código {proceso.returncode}", file=sys.stderr)
+        sys.exit(1)
+    return transcurrido, uso.ru_maxrss * 1024
+
+def bench_entrada(args):
+    # Tiempo y pico de RSS de main.py sobre archivos de cientos de MB leyendo la fuente
+    # completa, en modo --flujo y con --mmap. El archivo se arma repitiendo un programa
+    # sintético; el modo completo necesita varias veces el tamaño del archivo en memoria.
+    import generador
+    bloque = generador.generar_programa(4_000_000, semilla=args.semilla).encode("utf-8")
+    opciones = {"completo": [], "flujo": ["--flujo"], "mmap": ["--mmap"]}
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "entrada.py")
+        for megas in args.megas:
+            with open(ruta, "wb") as f:
+                for _ in range(max(1, round(megas * 1_000_000 / len(bloque)))):
+                    f.write(bloque)
+            print(f"entrada: {os.path.getsize(ruta) / 1e6:.0f} MB")
+            for modo in args.modos:
+                comando = [sys.executable, os.path.join(DIRECTORIO, "main.py"), "--traza", "ninguna"] + opciones[modo] + [ruta]
+                transcurrido, rss = _ejecutar_con_rss(comando, tmp)
+                print(f"  {modo:<10} {transcurrido:8.1f} s   pico RSS {rss / 1e6:9.1f} MB")
+
+def bench_estadisticas(args):
+    # Costo de la instrumentación: el análisis sin estadísticas (estadisticas=None) debe
+    # costar lo mismo que llamar al lexer y al parser directamente. Los casos se alternan
+    # en cada repetición para que el ruido afecte a todos por igual.
+    import estadisticas as Estmod
+    import generador
+    import main as Mmod
+    import parser as Pmod
+    from lexer import tokenizar
+
+    tc = Mmod.cargar_tabla().compilada
+    fuente = generador.generar_programa(args.megas * 1_000_000, semilla=args.semilla)
+    casos = [
+        ("lexer + parser directos", lambda: Pmod.analizar_flujo(iter(tokenizar(fuente)), tc)),
+        ("estadisticas=None", lambda: Mmod.analizar_fuente(fuente, tc)),
+        ("Estadisticas()", lambda: Mmod.analizar_fuente(fuente, tc, estadisticas=Estmod.Estadisticas())),
+        ("Estadisticas(memoria=True)", lambda: Mmod.analizar_fuente(fuente, tc, estadisticas=Estmod.Estadisticas(memoria=True))),
+    ]
+    tiempos = {nombre: [] for nombre, _ in casos}
+    resultados = set()
+    for _ in range(args.repeticiones):
+        for nombre, funcion in casos:
+            (ok, mensaje, _), t = _cronometrar(funcion, 1)
+            tiempos[nombre] += t
+            resultados.add((ok, mensaje))
+    if len(resultados) != 1:
+        print(f"ERROR: los resultados difieren: {resultados}", file=sys.stderr)
+        sys.exit(1)
+    referencia = min(tiempos[casos[0][0]])
+    print(f"entrada: {len(fuente) / 1e6:.1f} MB")
+    for nombre, _ in casos:
+        print(f"{_resumen(nombre, tiempos[nombre])}   sobrecosto {(min(tiempos[nombre]) / referencia - 1) * 100:+6.1f}%")
+
+def _escribir_arbol_sintetico(raiz, num_archivos, tamano, por_directorio=100):
+    import generador
+    rutas = []
+    for i in range(num_archivos):
+        directorio = os.path.join(raiz, f"paquete_{i // por_directorio:04d}")
+        os.makedirs(directorio, exist_ok=True)
+        ruta = os.path.join(directorio, f"modulo_{i:05d}.py")
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(generador.generar_programa(tamano, semilla=i))
+        rutas.append(ruta)
+    return rutas
+
+def bench_lote(args):
+    # Archivos por segundo de lote.py en función del número de trabajadores.
+    import lote as Lmod
+    import main as Mmod
+
+    tc = Mmod.cargar_tabla().compilada
+    maximo = args.max_trabajadores or os.cpu_count() or 1
+    cantidades = sorted({1, maximo} | {2 ** k for k in range(1, maximo.bit_length()) if 2 ** k < maximo})
+    with tempfile.TemporaryDirectory() as tmp:
+        rutas = _escribir_arbol_sintetico(tmp, args.archivos, args.tamano)
+        print(f"{len(rutas)} archivos de ~{args.tamano} bytes")
+        base = None
+        for trabajadores in cantidades:
+            inicio = time.perf_counter()
+            resultados = list(Lmod.analizar_lote(rutas, tc, trabajadores, args.tamano_lote))
+            transcurrido = time.perf_counter() - inicio
+            base = base or transcurrido
+            print(f"trabajadores {trabajadores:3d}: {len(resultados) / transcurrido:9.1f} archivos/s   aceleración {base / transcurrido:5.2f}x")
+
+def bench_cache(args):
+    # Corridas repetidas del modo por lotes con la cache de resultados: en frío, sin
+    # cambios (desde disco, como una nueva corrida de CI, y desde memoria, como el
+    # servidor) y con una fracción de archivos modificados. Cada resultado se compara
+    # con el del análisis sin cache.
+    import random
+    import cache_resultados as CRmod
+    import generador
+    import lote as Lmod
+    import main as Mmod
+
+    artefacto = Mmod.cargar_tabla()
+    tc = artefacto.compilada
+    rnd = random.Random(args.semilla)
+    with tempfile.TemporaryDirectory() as tmp:
+        rutas = _escribir_arbol_sintetico(os.path.join(tmp, "arbol"), args.archivos, args.tamano)
+        # Algunos archivos con un error sintáctico, para que la cache guarde también errores.
+        for ruta in rnd.sample(rutas, len(rutas) * args.con_errores // 100):
+            with open(ruta, "a", encoding="utf-8") as f:
+                f.write("x = = 1\n")
+        directorio = os.path.join(tmp, "cache")
+
+        def corrida(cache):
+            inicio = time.perf_counter()
+            resultados = {r["archivo"]: r for r in Lmod.analizar_lote(rutas, tc, args.trabajadores, cache=cache)}
+            return resultados, time.perf_counter() - inicio
+
+        def informar(nombre, resultados, segundos, referencia, t_referencia):
+            for ruta, esperado in referencia.items():
+                obtenido = resultados[ruta]
+                if (obtenido["ok"], obtenido["mensaje"]) != (esperado["ok"], esperado["mensaje"]):
+                    print(f"ERROR: {nombre}: el resultado de {ruta} difiere del análisis sin cache", file=sys.stderr)
+                    sys.exit(1)
+            aciertos = sum(r.get("en_cache", False) for r in resultados.values())
+            print(f"{nombre:<24} {segundos:8.3f} s   aciertos {aciertos / len(resultados):6.1%}"
+                  f"   ahorro {1 - segundos / t_referencia:6.1%}")
+
+        referencia, t_referencia = corrida(None)
+        errores = sum(not r["ok"] for r in referencia.values())
+        print(f"{len(rutas)} archivos de ~{args.tamano} bytes ({errores} con error), {args.trabajadores} trabajador(es)")
+        print(f"{'sin cache':<24} {t_referencia:8.3f} s")
+        cache = CRmod.CacheResultados(artefacto.huella, directorio)
+        informar("en frío", *corrida(cache), referencia, t_referencia)
+        informar("sin cambios, disco", *corrida(CRmod.CacheResultados(artefacto.huella, directorio)), referencia, t_referencia)
+        informar("sin cambios, memoria", *corrida(cache), referencia, t_referencia)
+        entradas, total = CRmod.tamano_en_disco(directorio)
+        print(f"cache en disco: {entradas} entradas, {total / entradas if entradas else 0:.0f} bytes por entrada")
+
+        modificadas = rnd.sample(rutas, max(1, len(rutas) * args.cambios // 100))
+        for ruta in modificadas:
+            with open(ruta, "a", encoding="utf-8") as f:
+                f.write(generador.sentencia_simple_aleatoria(rnd) + "\n")
+        referencia, t_referencia = corrida(None)
+        print(f"\n{len(modificadas)} archivos modificados ({args.cambios}%)")
+        print(f"{'sin cache':<24} {t_referencia:8.3f} s")
+        informar("con cambios, disco", *corrida(CRmod.CacheResultados(artefacto.huella, directorio)), referencia, t_referencia)
+
+        borradas, liberados = CRmod.podar(directorio, total // 2)
+        print(f"\npoda a la mitad: {borradas} entradas borradas, {liberados / 2**10:.0f} KB liberados")
+
+def bench_incremental(args):
+    # Latencia por edición del análisis incremental sobre un archivo grande, frente a
+    # volver a analizarlo completo.
+    import random
+    import generador
+    import incremental as Imod
+    import main as Mmod
+
+    tc = Mmod.cargar_tabla().compilada
+    rnd = random.Random(args.semilla)
+
+    lineas = []
+    semilla = 0
+    while len(lineas) < args.lineas:
+        lineas.extend(generador.generar_programa(100_000, semilla=semilla).splitlines(True))
+        semilla += 1
+    fuente = "".join(lineas[:args.lineas])
+    inicio = time.perf_counter()
+    analizador = Imod.AnalizadorIncremental(fuente, tc)
+    print(f"archivo de {len(analizador.lineas)} líneas: carga inicial {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    _, completo = _cronometrar(lambda: Mmod.analizar_fuente(analizador.fuente, tc), 3)
+
+    latencias = []
+    for _ in range(args.ediciones):
+        inicio_edicion, fin_edicion, texto = generador.edicion_aleatoria(rnd, analizador.lineas)
+        inicio = time.perf_counter()
+        analizador.editar(inicio_edicion, fin_edicion, texto)
+        latencias.append(time.perf_counter() - inicio)
+    p50, p99 = _percentiles(latencias)
+    print(f"análisis completo: {min(completo) * 1000:9.2f} ms")
+    print(f"edición incremental: p50 {p50 * 1000:.2f} ms   p99 {p99 * 1000:.2f} ms   ({args.ediciones} ediciones)")
+
+def bench_errores(args):
+    # Una pasada con recuperación frente al ciclo "corregir el primer error y volver a
+    # correr" sobre un programa con errores inyectados en líneas conocidas.
+    import generador
+    import main as Mmod
+    import parser as Pmod
+    from lexer import tokenizar
+
+    tc = Mmod.cargar_tabla().compilada
+
+    fuente, inyectados = generador.generar_programa_con_errores(args.kilobytes * 1000, semilla=args.semilla, num_errores=args.errores)
+    errores, _ = Pmod.analizar_recuperando(tokenizar(fuente), tc)
+    reportadas = {e.linea for e in errores}
+    perdidos = [num for num, _ in inyectados if num not in reportadas]
+    extra = len(errores) - (len(inyectados) - len(perdidos))
+    print(f"{len(inyectados)} errores inyectados: {len(inyectados) - len(perdidos)} reportados en su línea, "
+          f"{len(perdidos)} sin reportar, {extra} reportes adicionales")
+
+    _, t_una = _cronometrar(lambda: Mmod.analizar_fuente_todos_los_errores(fuente, tc, "ninguna"), args.repeticiones)
+
+    def corregir_y_repetir():
+        lineas = fuente.split("\n")
+        corridas = 0
+        while True:
+            ok, mensaje, _ = Mmod.analizar_fuente("\n".join(lineas), tc, "ninguna")
+            corridas += 1
+            if ok:
+                return corridas
+            # Se corrige la primera línea inyectada que aún esté rota.
+            for num, original in inyectados:
+                if lineas[num - 1] != original:
+                    lineas[num - 1] = original
+                    break
+            else:
+                return corridas
+    corridas, t_ciclo = _cronometrar(corregir_y_repetir, 1)
+    print(_resumen("una pasada con recuperación", t_una))
+    print(_resumen(f"{corridas} corridas corrigiendo de a uno", t_ciclo))
+    print(f"aceleración: {min(t_ciclo) / min(t_una):.1f}x")
+
+def bench_esperados(args):
+    # Costo de armar la lista de esperados en cada error: índice precalculado de
+    # table.TablaPredictiva, un dict simple (el índice se arma en la primera consulta) y
+    # recorrer la tabla en cada consulta, como antes.
+    import cache_tabla as Cmod
+    import generador
+    import errors as Emod
+    import grammar as Gmod
+    import parser as Pmod
+    from lexer import tokenizar
+
+    gc = Cmod.gramatica_compilada()
+    tabla, gramatica_norm = gc.tabla, gc.gramatica_norm
+    tabla_simple = dict(tabla)
+    no_terminales = list(gramatica_norm)
+
+    def recorriendo(A, t):
+        return Emod.construir_indice_esperados(t).get(A)
+
+    def consultas(esperados, t):
+        for _ in range(args.repeticiones_consulta):
+            for A in no_terminales:
+                esperados(A, t)
+    num_consultas = args.repeticiones_consulta * len(no_terminales)
+    casos = [
+        ("recorriendo la tabla", recorriendo, tabla_simple),
+        ("dict simple", Emod.esperados_para_no_terminal, tabla_simple),
+        ("índice precalculado", Emod.esperados_para_no_terminal, tabla),
+    ]
+    print(f"{num_consultas} consultas de esperados:")
+    for nombre, esperados, t in casos:
+        _, tiempos = _cronometrar(lambda: consultas(esperados, t), 3)
+        print(f"{_resumen(nombre, tiempos)}   {min(tiempos) / num_consultas * 1e6:.2f} us/consulta")
+
+    # Entradas con muchos errores: cada línea rota es un archivo corto que falla enseguida.
+    fuente, inyectados = generador.generar_programa_con_errores(args.kilobytes * 1000, semilla=0, num_errores=10**6, separacion=1)
+    lineas = fuente.split("\n")
+    entradas = [tokenizar(lineas[num - 1].strip() + "\n") for num, _ in inyectados]
+    def analizar_todas(t):
+        return [Pmod.analizar(tokens, t, gramatica_norm, Gmod.SIMBOLO_INICIAL)[1] for tokens in entradas]
+    res_simple, t_simple = _cronometrar(lambda: analizar_todas(tabla_simple), 3)
+    res_indice, t_indice = _cronometrar(lambda: analizar_todas(tabla), 3)
+    if res_simple != res_indice:
+        print("ERROR: los mensajes con y sin índice difieren", file=sys.stderr)
+        sys.exit(1)
+    print(f"{len(entradas)} entradas con error (analizar):")
+    print(_resumen("dict simple", t_simple))
+    print(_resumen("índice precalculado", t_indice))
+
+def bench_conjuntos(args):
+    # PRIMEROS/SIGUIENTES/SELECCION por propagación en el grafo de dependencias frente a
+    # los barridos completos (con la corrección del punto fijo), sobre gramáticas
+    # sintéticas de varios tamaños.
+    import cache_tabla as Cmod
+    import generador
+    import grammar as Gmod
+    import referencias as Rmod
+    import sets as Smod
+
+    def con_referencia(gramatica, inicial):
+        FIRST = Rmod.calcular_first_referencia(gramatica)
+        FOLLOW = Rmod.calcular_follow_referencia(gramatica, FIRST, inicial)
+        return FIRST, FOLLOW, Smod.calcular_select(gramatica, FIRST, FOLLOW)
+
+    def con_propagacion(gramatica, inicial):
+        FIRST = Smod.calcular_first(gramatica)
+        FOLLOW = Smod.calcular_follow(gramatica, FIRST, inicial)
+        return FIRST, FOLLOW, Smod.calcular_select(gramatica, FIRST, FOLLOW)
+
+    casos = [("grammar.py", Cmod.gramatica_compilada().gramatica_norm, Gmod.SIMBOLO_INICIAL)]
+    for n in args.tamanos:
+        casos.append((f"{n} no terminales", generador.generar_gramatica(n, semilla=args.semilla), "N0"))
+
+    for nombre, gramatica, inicial in casos:
+        res_prop, t_prop = _cronometrar(lambda: con_propagacion(gramatica, inicial), args.repeticiones)
+        linea = f"{nombre:22} propagación {min(t_prop) * 1000:10.2f} ms"
+        if len(gramatica) <= args.max_referencia:
+            res_ref, t_ref = _cronometrar(lambda: con_referencia(gramatica, inicial), 1)
+            if res_ref != res_prop:
+                print(f"ERROR: los conjuntos difieren de la referencia en {nombre}", file=sys.stderr)
+                sys.exit(1)
+            linea += f"   barridos {min(t_ref) * 1000:10.2f} ms   aceleración {min(t_ref) / min(t_prop):6.1f}x   (idénticos)"
+        print(linea)
+
+def bench_gramatica(args):
+    # Costo de cada etapa de la preparación de la gramática y del acceso compartido a
+    # la GramaticaCompilada, más un perfil de la construcción completa sin cache.
+    import cProfile
+    import pstats
+    import cache_tabla as Cmod
+    import grammar as Gmod
+    import table as Tmod
+    import tabla_compilada as TCmod
+
+    g, inicial = Gmod.gramatica, Gmod.SIMBOLO_INICIAL
+    norm = Gmod.normalizar_gramatica_para_ll1(g)
+    tabla, FIRST, FOLLOW, SELECT = Tmod.construir_tabla_desde_normalizada(norm, inicial)
+    n = args.repeticiones
+    etapas = [
+        ("normalizar", lambda: Gmod.normalizar_gramatica_para_ll1(g)),
+        ("conjuntos y tabla", lambda: Tmod.construir_tabla_desde_normalizada(norm, inicial)),
+        ("compilar tabla", lambda: TCmod.compilar_tabla(tabla, norm, inicial, FOLLOW)),
+        ("construcción completa", lambda: Cmod.construir_artefacto(g, inicial)),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "tabla.cache")
+        Cmod.escribir_cache(Cmod.construir_artefacto(g, inicial), ruta)
+        etapas.append(("lectura de la cache", lambda: Cmod.cargar_o_construir(g, inicial, ruta)))
+        Cmod.gramatica_compilada(g, inicial, ruta)
+        etapas.append(("gramatica_compilada()", lambda: Cmod.gramatica_compilada(g, inicial, ruta)))
+        for nombre, funcion in etapas:
+            print(_resumen(nombre, _cronometrar(funcion, n)[1]))
+
+    print("\nperfil de la construcción completa:")
+    perfil = cProfile.Profile()
+    perfil.enable()
+    for _ in range(n):
+        Cmod.construir_artefacto(g, inicial)
+    perfil.disable()
+    pstats.Stats(perfil).sort_stats("cumulative").print_stats(args.funciones)
+
+def bench_servidor(args):
+    # Latencia de analizar un archivo con el servidor levantado (por el cliente de línea
+    # de comandos y por una conexión directa) frente a ejecutar `python main.py` en frío.
+    import cliente as Clmod
+    archivo = os.path.abspath(args.archivo)
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "analizador.sock")
+        proceso = subprocess.Popen(
+            [sys.executable, os.path.join(DIRECTORIO, "servidor.py"), "--socket", ruta, "-j", str(args.trabajadores)],
+            cwd=tmp, stdout=subprocess.DEVNULL
+        )
+        try:
+            limite = time.perf_counter() + 30
+            while not Clmod.disponible(ruta):
+                if proceso.poll() is not None or time.perf_counter() > limite:
+                    print("ERROR: el servidor no arrancó", file=sys.stderr)
+                    sys.exit(1)
+                time.sleep(0.05)
+
+            def ejecutar(comando):
+                inicio = time.perf_counter()
+                subprocess.run(comando, cwd=tmp, stdout=subprocess.DEVNULL)
+                return time.perf_counter() - inicio
+
+            cli = [ejecutar([sys.executable, os.path.join(DIRECTORIO, "main.py"), archivo]) for _ in range(args.repeticiones)]
+            comando_cliente = [sys.executable, os.path.join(DIRECTORIO, "cliente.py"), "--socket", ruta, "--sin-respaldo", archivo]
+            cliente = [ejecutar(comando_cliente) for _ in range(args.repeticiones)]
+            respuesta, directo = _cronometrar(lambda: Clmod.enviar([{"archivo": archivo}], ruta), args.peticiones)
+        finally:
+            Clmod.enviar([{"comando": "detener"}], ruta)
+            proceso.wait(timeout=10)
+
+    print(f"respuesta del servidor: {respuesta[0]['mensaje']}")
+    for nombre, tiempos in (("main.py en frío", cli), ("cliente.py + servidor", cliente), ("petición por socket", directo)):
+        p50, p99 = _percentiles(tiempos)
+        print(f"{nombre:<24} p50 {p50 * 1000:9.2f} ms   p99 {p99 * 1000:9.2f} ms   (n={len(tiempos)})")
+    print(f"aceleración (p50) del cliente frente a main.py: {_percentiles(cli)[0] / _percentiles(cliente)[0]:.1f}x")
+
+# Suite con línea base: tokenizar, construir_tabla_predictiva y analizar sobre programas
+# generados de cada forma de generador.FORMAS. Los tiempos se toman como el mínimo de
+# varias repeticiones, con una de calentamiento y el recolector de basura apagado. Con
+# --calibrar se dividen además por el tiempo de un bucle fijo de Python, para comparar
+# contra una línea base tomada en otra máquina; en la misma máquina conviene no hacerlo,
+# porque el bucle agrega su propio ruido.
+ARCHIVO_LINEA_BASE = os.path.join(DIRECTORIO, ".linea_base_rendimiento.json")
+
+def _fuente_de_lineas(num_lineas, semilla=0):
+    import generador
+    bloques = []
+    total = 0
+    i = 0
+    while total < num_lineas:
+        bloque = generador.generar_programa(1_000_000, semilla=semilla + i)
+        bloques.append(bloque if bloque.endswith("\n") else bloque + "\n")
+        total += bloques[-1].count("\n")
+        i += 1
+    return "".join(bloques)
+
+def bench_paralelo(args):
+    # Análisis de un archivo grande repartido en partes (paralelo.py): aceleración según
+    # el número de procesos sobre un archivo de --lineas líneas.
+    import main as Mmod
+    import paralelo as Parmod
+
+    tc = Mmod.cargar_tabla().compilada
+    fuente = _fuente_de_lineas(args.lineas, args.semilla)
+    print(f"entrada: {fuente.count(chr(10))} líneas, {len(fuente) / 1e6:.1f} MB")
+    esperado, tiempos = _cronometrar(lambda: Mmod.analizar_fuente(fuente, tc, "ninguna"), args.repeticiones)
+    base = min(tiempos)
+    print(_resumen("serie", tiempos))
+    maximo = args.max_trabajadores or os.cpu_count() or 1
+    cantidades = sorted({1, maximo} | {2 ** k for k in range(1, maximo.bit_length()) if 2 ** k < maximo})
+    for trabajadores in cantidades:
+        resultado, tiempos = _cronometrar(lambda: Parmod.analizar_paralelo(fuente, tc, "ninguna", trabajadores), args.repeticiones)
+        if resultado != esperado:
+            print(f"ERROR: analizar_paralelo con {trabajadores} trabajadores difiere del análisis en serie", file=sys.stderr)
+            sys.exit(1)
+        print(f"{_resumen(f'trabajadores {trabajadores}', tiempos)}   aceleración {base / min(tiempos):5.2f}x")
+    print(f"(CPU disponibles: {os.cpu_count()})")
+
+def bench_prevalidacion(args):
+    # Prevalidación con NumPy (prevalidacion.py): tiempo hasta el rechazo de archivos
+    # grandes con un error de sangría o un paréntesis sin cerrar al 1%, 50% y 99% del
+    # archivo, y el sobrecosto en un archivo válido.
+    import generador
+    import main as Mmod
+    import prevalidacion as Prevmod
+
+    if not Prevmod.disponible():
+        print("ERROR: la prevalidación necesita NumPy", file=sys.stderr)
+        sys.exit(1)
+    tc = Mmod.cargar_tabla().compilada
+    valido = generador.generar_programa(args.megas * 1_000_000, semilla=args.semilla)
+    print(f"entrada: {len(valido) / 1e6:.1f} MB, {valido.count(chr(10))} líneas")
+    casos = [("válido", valido)]
+    for tipo in ("sangria", "parentesis"):
+        casos += [(f"{tipo} al {fraccion:.0%}", generador.con_error_en(valido, fraccion, tipo)) for fraccion in (0.01, 0.5, 0.99)]
+    print(f"{'caso':<18}{'analizar_fuente':>18}{'prevalidando':>16}{'prevalidar':>14}")
+    for nombre, fuente in casos:
+        esperado, t_normal = _cronometrar(lambda: Mmod.analizar_fuente(fuente, tc, "ninguna"), args.repeticiones)
+        resultado, t_previo = _cronometrar(lambda: Prevmod.analizar_prevalidando(fuente, tc, "ninguna"), args.repeticiones)
+        if resultado != esperado:
+            print(f"ERROR: analizar_prevalidando difiere en el caso {nombre}", file=sys.stderr)
+            sys.exit(1)
+        _, t_pasada = _cronometrar(lambda: Prevmod.prevalidar(fuente), args.repeticiones)
+        print(f"{nombre:<18}{min(t_normal) * 1000:15.1f} ms{min(t_previo) * 1000:13.1f} ms{min(t_pasada) * 1000:11.1f} ms"
+              f"   {min(t_normal) / min(t_previo):6.1f}x")
+
+def bench_tokens_binarios(args):
+    # Formato binario de tokens (tokens_binarios.py), por tamaño de programa: bytes del
+    # .tok contra la fuente, tiempo de volcar y de cargar, y cargar + analizar contra
+    # lexear + analizar.
+    import generador
+    import main as Mmod
+    import parser as Pmod
+    import tokens_binarios as TBmod
+    from lexer import tokenizar_compacto
+
+    tc = Mmod.cargar_tabla().compilada
+    print(f"{'tamaño':>10}{'tokens':>10}{'.tok/fuente':>13}{'bytes/token':>13}{'volcar':>11}{'cargar':>11}"
+          f"{'lexear+analizar':>17}{'cargar+analizar':>17}")
+    for tamano in args.tamanos:
+        fuente = generador.generar_programa(tamano, semilla=args.semilla)
+        buffer = tokenizar_compacto(fuente)
+        datos, t_volcar = _cronometrar(lambda: TBmod.volcar_bytes(buffer), args.repeticiones)
+        _, t_cargar = _cronometrar(lambda: TBmod.cargar_bytes(datos), args.repeticiones)
+        _, t_lexear = _cronometrar(lambda: Pmod.analizar_buffer(tokenizar_compacto(fuente), tc, "ninguna"), args.repeticiones)
+        _, t_binario = _cronometrar(lambda: Pmod.analizar_buffer(TBmod.cargar_bytes(datos), tc, "ninguna"), args.repeticiones)
+        bytes_fuente = len(fuente.encode("utf-8"))
+        print(f"{bytes_fuente / 1e6:8.1f}MB{len(buffer):>10}{len(datos) / bytes_fuente:12.1%}{len(datos) / len(buffer):13.2f}"
+              f"{min(t_volcar) * 1000:8.0f} ms{min(t_cargar) * 1000:8.0f} ms{min(t_lexear) * 1000:14.0f} ms{min(t_binario) * 1000:14.0f} ms"
+              f"   {min(t_lexear) / min(t_binario):5.2f}x")
+
+def bench_tabla_comprimida(args):
+    # Tabla predictiva comprimida (tabla_comprimida.py) frente al dict de table.py, en la
+    # gramática actual y en copias de ella (generador.replicar_gramatica) `--copias`
+    # veces más grandes, compartiendo los terminales o con terminales propios: memoria y
+    # búsquedas por segundo, y parser.analizar con una y otra tabla.
+    import random
+    import cache_tabla as Cmod
+    import generador
+    import grammar as Gmod
+    import parser as Pmod
+    import table as Tmod
+    import tabla_compilada as TCmod
+    import tabla_comprimida as TZmod
+    from lexer import tokenizar
+
+    gc = Cmod.gramatica_compilada()
+    casos = [("grammar.py", gc.gramatica_norm, Gmod.SIMBOLO_INICIAL)]
+    for propios in (False, True):
+        gramatica, inicial = generador.replicar_gramatica(gc.gramatica_norm, Gmod.SIMBOLO_INICIAL, args.copias, propios)
+        casos.append((f"x{args.copias} {'terminales propios' if propios else 'terminales comunes'}", gramatica, inicial))
+
+    rnd = random.Random(args.semilla)
+    print(f"{'gramática':<26}{'entradas':>9}{'filas':>12}{'dict':>11}{'comprimida':>12}{'matriz':>11}"
+          f"{'dict':>14}{'comprimida':>14}")
+    for nombre, gramatica, inicial in casos:
+        tabla, _, FOLLOW, _ = Tmod.construir_tabla_desde_normalizada(gramatica, inicial)
+        comprimida = TZmod.comprimir_tabla(tabla)
+        no_terminales = list(gramatica) + ["no_existe"]
+        terminales = sorted({t for (_, t) in tabla}) + ["NO_EXISTE"]
+        claves = [(A, t) for A in no_terminales for t in terminales]
+        matriz = TCmod.compilar_tabla(tabla, gramatica, inicial, FOLLOW).matriz
+
+        # La mitad de las búsquedas son entradas de la tabla y la otra mitad celdas al azar
+        # (casi todas vacías, es decir, errores).
+        entradas = list(tabla)
+        muestra = [rnd.choice(entradas) for _ in range(args.busquedas // 2)]
+        muestra += [rnd.choice(claves) for _ in range(args.busquedas - len(muestra))]
+        rnd.shuffle(muestra)
+        def buscar(t):
+            get = t.get
+            for clave in muestra:
+                get(clave)
+        _, t_dict = _cronometrar(lambda: buscar(tabla), args.repeticiones)
+        _, t_comp = _cronometrar(lambda: buscar(comprimida), args.repeticiones)
+        filas = f"{comprimida.filas_distintas()}/{len(gramatica)}"
+        print(f"{nombre:<26}{len(tabla):>9}{filas:>12}{TZmod.bytes_de_dict(tabla) / 1024:8.1f} KB"
+              f"{comprimida.bytes_usados() / 1024:9.1f} KB{matriz.itemsize * len(matriz) / 1024:8.1f} KB"
+              f"{len(muestra) / min(t_dict) / 1e6:10.2f} M/s{len(muestra) / min(t_comp) / 1e6:10.2f} M/s")
+
+    comprimida = TZmod.comprimir_tabla(gc.tabla)
+    tokens = tokenizar(generador.generar_programa(args.tamano, semilla=args.semilla))
+    _, t_dict = _cronometrar(lambda: Pmod.analizar(tokens, gc.tabla, gc.gramatica_norm, Gmod.SIMBOLO_INICIAL, traza="ninguna"), args.repeticiones)
+    _, t_comp = _cronometrar(lambda: Pmod.analizar(tokens, comprimida, gc.gramatica_norm, Gmod.SIMBOLO_INICIAL, traza="ninguna"), args.repeticiones)
+    print(f"\nparser.analizar, {len(tokens)} tokens: dict {min(t_dict) * 1000:.0f} ms, "
+          f"comprimida {min(t_comp) * 1000:.0f} ms ({min(t_comp) / min(t_dict):.2f}x)")
+
+def bench_indice(args):
+    # Índice de símbolos (indice_simbolos.py): sobrecosto del observador en el parser;
+    # construcción del índice sobre un árbol de archivos sintéticos; actualización
+    # incremental tras modificar y borrar algunos; y latencia de búsqueda.
+    import random
+    import generador
+    import indice_simbolos as ISmod
+    import main as Mmod
+    import parser as Pmod
+    from lexer import tokenizar_compacto
+
+    artefacto = Mmod.cargar_tabla()
+    tc = artefacto.compilada
+    buffer = tokenizar_compacto(generador.generar_programa(1_000_000, semilla=args.semilla))
+    _, t_normal = _cronometrar(lambda: Pmod.analizar_buffer(buffer, tc, "ninguna"), args.repeticiones)
+    _, t_observado = _cronometrar(lambda: Pmod.analizar_buffer(buffer, tc, "ninguna", ISmod.observador_simbolos(tc)[0]), args.repeticiones)
+    print(f"parser con observador: {min(t_observado) * 1000:.0f} ms vs {min(t_normal) * 1000:.0f} ms sin él "
+          f"({min(t_observado) / min(t_normal):.2f}x) en {len(buffer)} tokens")
+
+    rnd = random.Random(args.semilla)
+    with tempfile.TemporaryDirectory() as tmp:
+        rutas = _escribir_arbol_sintetico(tmp, args.archivos, args.tamano)
+        ruta_indice = os.path.join(tmp, ISmod.NOMBRE_INDICE)
+        print(f"\n{len(rutas)} archivos de ~{args.tamano} bytes")
+        for trabajadores in sorted({1, args.trabajadores}):
+            indice = ISmod.IndiceSimbolos(artefacto.huella)
+            inicio = time.perf_counter()
+            indice.actualizar(rutas, tc, trabajadores)
+            transcurrido = time.perf_counter() - inicio
+            print(f"construcción con {trabajadores} proceso{'s' if trabajadores > 1 else ''}: {transcurrido:.2f} s "
+                  f"({len(rutas) / transcurrido:.0f} archivos/s), {len(indice)} entradas, {len(indice.nombres)} nombres")
+        _, t_guardar = _cronometrar(lambda: indice.guardar(ruta_indice), 1)
+        indice, t_cargar = _cronometrar(lambda: ISmod.cargar(ruta_indice), 3)
+        print(f"en disco: {os.path.getsize(ruta_indice) / 1e6:.1f} MB ({os.path.getsize(ruta_indice) / len(indice):.1f} bytes/entrada), "
+              f"guardar {t_guardar[0] * 1000:.0f} ms, cargar {min(t_cargar) * 1000:.0f} ms")
+
+        # Modificaciones: archivos con una función nueva, uno reescrito sin cambios (misma
+        # huella, otra fecha) y archivos borrados.
+        modificados = rnd.sample(rutas, args.modificados)
+        for k, ruta in enumerate(modificados):
+            with open(ruta, "a", encoding="utf-8") as f:
+                f.write(f"\ndef agregada_{k}(p, q):\n    r = p\n    return agregada_{k}(q, r)\n")
+        intacto = rnd.choice([r for r in rutas if r not in modificados])
+        with open(intacto, "rb") as f:
+            datos = f.read()
+        with open(intacto, "wb") as f:
+            f.write(datos)
+        borrados = rnd.sample([r for r in rutas if r not in modificados and r != intacto], args.modificados // 2)
+        for ruta in borrados:
+            os.remove(ruta)
+        vigentes = [r for r in rutas if r not in borrados]
+        inicio = time.perf_counter()
+        indice.quitar(borrados)
+        analizados = indice.actualizar(vigentes, tc)
+        t_incremental = time.perf_counter() - inicio
+        print(f"actualización: {len(modificados)} modificados, {len(borrados)} borrados, 1 reescrito igual: "
+              f"{analizados} analizados en {t_incremental * 1000:.0f} ms")
+
+        nombres = indice.nombres + [f"no_existe_{i}" for i in range(100)]
+        consultas = [rnd.choice(nombres) for _ in range(args.consultas)]
+        for nombre, funcion in (("buscar", lambda n: indice.buscar(n)), ("definiciones", lambda n: indice.definiciones(n))):
+            tiempos = []
+            for n in consultas:
+                inicio = time.perf_counter()
+                funcion(n)
+                tiempos.append(time.perf_counter() - inicio)
+            p50, p99 = _percentiles(tiempos)
+            print(f"{nombre:>12}: p50 {p50 * 1e6:7.1f} µs   p99 {p99 * 1e6:8.1f} µs   ({len(consultas)} consultas)")
+
+def _medir(funcion):
+    # Una ejecución con el recolector de basura apagado, después de una recolección completa.
+    import gc
+    gc.collect()
+    gc.disable()
+    try:
+        inicio = time.perf_counter()
+        funcion()
+        return time.perf_counter() - inicio
+    finally:
+        gc.enable()
+
+def _calibracion():
+    # Bucle fijo de Python puro que sirve de unidad de medida de la máquina.
+    total = 0
+    for i in range(1_000_000):
+        total += i * i % 7
+    return total
+
+def _casos_suite(formas, tamano, semilla):
+    # [(nombre, función)] en un orden fijo; los programas se generan una sola vez.
+    import cache_tabla as Cmod
+    import generador
+    import grammar as Gmod
+    import parser as Pmod
+    import table as Tmod
+    from lexer import tokenizar
+
+    gc = Cmod.gramatica_compilada()
+    casos = [("construir_tabla_predictiva", lambda: Tmod.construir_tabla_predictiva(Gmod.gramatica, Gmod.SIMBOLO_INICIAL))]
+    for forma in formas:
+        fuente = generador.generar_programa_forma(forma, tamano, semilla)
+        tokens = tokenizar(fuente)
+        ok, mensaje = Pmod.analizar_compilado(tokens, gc.compilada)[:2]
+        if not ok:
+            raise ValueError(f"el programa de forma {forma!r} no es válido: {mensaje}")
+        casos.append((f"tokenizar/{forma}", lambda fuente=fuente: tokenizar(fuente)))
+        casos.append((f"analizar/{forma}",
+                      lambda tokens=tokens: Pmod.analizar(tokens, gc.tabla, gc.gramatica_norm, Gmod.SIMBOLO_INICIAL)))
+        casos.append((f"analizar_compilado/{forma}", lambda tokens=tokens: Pmod.analizar_compilado(tokens, gc.compilada)))
+    return casos
+
+def _leer_linea_base(ruta):
+    import json
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _guardar_linea_base(ruta, datos):
+    import json
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+    os.replace(temporal, ruta)
+
+def bench_suite(args):
+    import generador
+    formas = args.formas or list(generador.FORMAS)
+    parametros = {"tamano": args.tamano, "semilla": args.semilla, "calibrado": args.calibrar}
+    base = None if args.guardar_base else _leer_linea_base(args.base)
+    if base is not None and base.get("parametros") != parametros:
+        print(f"ERROR: la línea base de {args.base} se tomó con {base.get('parametros')}, no con {parametros}; "
+              "use los mismos parámetros o vuelva a guardarla con --guardar-base", file=sys.stderr)
+        sys.exit(2)
+
+    casos = _casos_suite(formas, args.tamano, args.semilla)
+    if args.calibrar:
+        casos.insert(0, ("calibracion", _calibracion))
+    # Las repeticiones se hacen por rondas sobre todos los casos (calibración incluida),
+    # así una perturbación pasajera de la máquina se reparte entre casos en lugar de caer
+    # entera sobre uno.
+    for _, funcion in casos:
+        funcion()
+    tiempos = {nombre: [] for nombre, _ in casos}
+    for _ in range(args.repeticiones):
+        for nombre, funcion in casos:
+            tiempos[nombre].append(_medir(funcion))
+    calibracion = 1.0
+    if args.calibrar:
+        calibracion = min(tiempos.pop("calibracion"))
+        casos = casos[1:]
+        print(f"calibración: {calibracion * 1000:.2f} ms")
+    print(f"tamaño: {args.tamano} bytes   semilla: {args.semilla}   repeticiones: {args.repeticiones}")
+    resultados = {}
+    regresiones = []
+    for nombre, _ in casos:
+        segundos = min(tiempos[nombre])
+        relativo = segundos / calibracion
+        resultados[nombre] = {"segundos": segundos, "relativo": relativo}
+        linea = f"{nombre:<36} {segundos * 1000:10.2f} ms"
+        anterior = (base or {}).get("casos", {}).get(nombre)
+        if anterior is not None:
+            cambio = relativo / anterior["relativo"] - 1
+            estado = "ok"
+            if cambio > args.umbral:
+                estado = "REGRESIÓN"
+                regresiones.append(nombre)
+            elif cambio < -args.umbral:
+                estado = "mejora"
+            linea += f"   base {anterior['segundos'] * 1000:10.2f} ms   {cambio * 100:+7.1f}%   {estado}"
+        print(linea)
+
+    if args.guardar_base:
+        _guardar_linea_base(args.base, {"parametros": parametros, "calibracion": calibracion if args.calibrar else None,
+                                        "python": sys.version.split()[0], "casos": resultados})
+        print(f"línea base guardada en {args.base}")
+    elif base is None:
+        print(f"no hay línea base en {args.base}; guárdela con --guardar-base")
+    if regresiones:
+        print(f"{len(regresiones)} caso(s) más de {args.umbral * 100:.0f}% más lentos que la línea base: "
+              f"{', '.join(regresiones)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    analizador = argparse.ArgumentParser(description="Mediciones de rendimiento del analizador sintáctico.")
+    sub = analizador.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("arranque", help="tiempo de arranque con la cache de la tabla fría vs caliente")
+    p.add_argument("archivo", nargs="?", default=os.path.join(DIRECTORIO, "test.py"))
+    p.add_argument("-n", "--repeticiones", type=int, default=10)
+    p.set_defaults(funcion=bench_arranque)
+
+    p = sub.add_parser("parser", help="tokens/segundo del parser con tabla dict vs tabla compilada")
+    p.add_argument("--megas", type=int, default=4, help="tamaño de la entrada sintética en MB")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("-n", "--repeticiones", type=int, default=3)
+    p.set_defaults(funcion=bench_parser)
+
+    p = sub.add_parser("lexer", help="velocidad de los motores del lexer")
+    p.add_argument("--megas", type=int, default=2, help="tamaño del archivo sintético en MB")
+    p.add_argument("--ancho", type=int, default=20000, help="argumentos en la línea larga")
+    p.add_argument("-n", "--repeticiones", type=int, default=3)
+    p.set_defaults(funcion=bench_lexer)
+
+    p = sub.add_parser("descendente", help="tokens/s del analizador descendente generado vs la pila")
+    p.add_argument("--megas", type=int, default=2, help="tamaño de la entrada sintética en MB")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("-n", "--repeticiones", type=int, default=3)
+    p.set_defaults(funcion=bench_descendente)
+
+    p = sub.add_parser("memoria", help="pico de memoria del modo completo vs el modo de flujo")
+    p.add_argument("--megas", type=int, default=2, help="tamaño del archivo sintético en MB")
+    p.add_argument("--semilla", type=int, default=0)
+    p.set_defaults(funcion=bench_memoria)
+
+    p = sub.add_parser("tokens", help="bytes por token y velocidad del parser: lista de Token vs BufferTokens")
+    p.add_argument("--megas", type=int, default=4, help="tamaño de la entrada sintética en MB")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("-n", "--repeticiones", type=int, default=3)
+    p.set_defaults(funcion=bench_tokens)
+
+    p = sub.add_parser("nombres", help="velocidad del lexer y del análisis sobre fuentes con muchos identificadores")
+    p.add_argument("--megas", type=int, default=2, help="tamaño de la entrada sintética en MB")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("-n", "--repeticiones", type=int, default=3)
+    p.set_defaults(funcion=bench_nombres)
+
+    p = sub.add_parser("arbol", help="tiempo y bytes por nodo del árbol sintáctico compacto vs un objeto por nodo")
+    p.add_argument("--megas", type=int, default=2, help="tamaño de la entrada sintética en MB")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("-n", "--repeticiones", type=int, default=3)
+    p.set_defaults(funcion=bench_arbol)
+
+    p = sub.add_parser("entrada", help="tiempo y pico de RSS con la fuente completa, --flujo y --mmap en archivos grandes")
+    p.add_argument("--megas", type=int, nargs="+", default=[100], help="tamaños de entrada en MB (p. ej. 100 1000)")
+    p.add_argument("--modos", nargs="+", choices=["completo", "flujo", "mmap"], default=["completo", "flujo", "mmap"])
+    p.add_argument("--semilla", type=int, default=0)
+    p.set_defaults(funcion=bench_entrada)
+
+    p = sub.add_parser("estadisticas", help="sobrecosto de --stats y del análisis sin estadísticas")
+    p.add_argument("--megas", type=int, default=2, help="tamaño de la entrada sintética en MB")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("-n", "--repeticiones", type=int, default=5)
+    p.set_defaults(funcion=bench_estadisticas)
+
+    p = sub.add_parser("lote", help="archivos/segundo del modo por lotes según el número de trabajadores")
+    p.add_argument("--archivos", type=int, default=10000)
+    p.add_argument("--tamano", type=int, default=2000, help="bytes aproximados por archivo")
+    p.add_argument("--tamano-lote", type=int, default=16)
+    p.add_argument("--max-trabajadores", type=int, default=None)
+    p.set_defaults(funcion=bench_lote)
+
+    p = sub.add_parser("cache", help="aciertos y tiempo ahorrado por la cache de resultados en corridas repetidas del lote")
+    p.add_argument("--archivos", type=int, default=2000)
+    p.add_argument("--tamano", type=int, default=4000, help="bytes aproximados por archivo")
+    p.add_argument("--con-errores", type=int, default=5, help="porcentaje de archivos con un error sintáctico")
+    p.add_argument("--cambios", type=int, default=10, help="porcentaje de archivos modificados antes de la última corrida")
+    p.add_argument("-j", "--trabajadores", type=int, default=1)
+    p.add_argument("--semilla", type=int, default=0)
+    p.set_defaults(funcion=bench_cache)
+
+    p = sub.add_parser("incremental", help="latencia por edición del análisis incremental")
+    p.add_argument("--lineas", type=int, default=50000, help="líneas del archivo para medir la latencia")
+    p.add_argument("--ediciones", type=int, default=300)
+    p.add_argument("--semilla", type=int, default=0)
+    p.set_defaults(funcion=bench_incremental)
+
+    p = sub.add_parser("errores", help="una pasada con recuperación de errores vs corregir y volver a correr")
+    p.add_argument("--kilobytes", type=int, default=200, help="tamaño del programa con errores")
+    p.add_argument("--errores", type=int, default=40, help="errores inyectados")
+    p.add_argument("--repeticiones", type=int, default=3)
+    p.add_argument("--semilla", type=int, default=0)
+    p.set_defaults(funcion=bench_errores)
+
+    p = sub.add_parser("esperados", help="armado de la lista de esperados: índice precalculado, dict simple y recorrer la tabla")
+    p.add_argument("--repeticiones-consulta", type=int, default=500)
+    p.add_argument("--kilobytes", type=int, default=100, help="tamaño del programa del que salen las líneas con error")
+    p.set_defaults(funcion=bench_esperados)
+
+    p = sub.add_parser("conjuntos", help="PRIMEROS/SIGUIENTES por propagación vs barridos sobre gramáticas sintéticas")
+    p.add_argument("--tamanos", type=int, nargs="+", default=[100, 500, 1000, 2000, 5000], help="no terminales de cada gramática")
+    p.add_argument("--max-referencia", type=int, default=5000, help="no medir la versión por barridos en gramáticas más grandes")
+    p.add_argument("-n", "--repeticiones", type=int, default=3)
+    p.add_argument("--semilla", type=int, default=0)
+    p.set_defaults(funcion=bench_conjuntos)
+
+    p = sub.add_parser("gramatica", help="costo por etapa de la preparación de la gramática y perfil de la construcción")
+    p.add_argument("-n", "--repeticiones", type=int, default=50)
+    p.add_argument("--funciones", type=int, default=15, help="funciones a mostrar en el perfil")
+    p.set_defaults(funcion=bench_gramatica)
+
+    p = sub.add_parser("servidor", help="latencia p50/p99 con el servidor de análisis vs main.py en frío")
+    p.add_argument("archivo", nargs="?", default=os.path.join(DIRECTORIO, "test.py"))
+    p.add_argument("-n", "--repeticiones", type=int, default=30, help="ejecuciones de main.py y de cliente.py")
+    p.add_argument("--peticiones", type=int, default=1000, help="peticiones por la conexión directa")
+    p.add_argument("-j", "--trabajadores", type=int, default=1)
+    p.set_defaults(funcion=bench_servidor)
+
+    p = sub.add_parser("paralelo", help="aceleración según los procesos del análisis de un archivo repartido en partes")
+    p.add_argument("--lineas", type=int, default=1_000_000, help="líneas del archivo grande")
+    p.add_argument("--max-trabajadores", type=int, default=None, help="máximo de procesos (por defecto uno por CPU)")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("-n", "--repeticiones", type=int, default=1)
+    p.set_defaults(funcion=bench_paralelo)
+
+    p = sub.add_parser("prevalidacion", help="tiempo hasta el rechazo con la prevalidación de NumPy")
+    p.add_argument("--megas", type=int, default=20, help="tamaño de la entrada sintética en MB")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("-n", "--repeticiones", type=int, default=3)
+    p.set_defaults(funcion=bench_prevalidacion)
+
+    p = sub.add_parser("tokens_binarios", help="tamaño y tiempo de carga del formato binario de tokens (.tok)")
+    p.add_argument("--tamanos", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000], help="bytes aproximados de cada programa")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("-n", "--repeticiones", type=int, default=3)
+    p.set_defaults(funcion=bench_tokens_binarios)
+
+    p = sub.add_parser("tabla_comprimida", help="memoria y búsquedas/s de la tabla predictiva comprimida vs el dict")
+    p.add_argument("--copias", type=int, default=50, help="veces que se replica la gramática para la gramática grande")
+    p.add_argument("--busquedas", type=int, default=500_000, help="búsquedas por medición")
+    p.add_argument("--tamano", type=int, default=200_000, help="bytes aproximados del programa para parser.analizar")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("-n", "--repeticiones", type=int, default=3)
+    p.set_defaults(funcion=bench_tabla_comprimida)
+
+    p = sub.add_parser("indice", help="construcción, actualización incremental y latencia de búsqueda del índice de símbolos")
+    p.add_argument("--archivos", type=int, default=10000)
+    p.add_argument("--tamano", type=int, default=2000, help="bytes aproximados por archivo")
+    p.add_argument("-j", "--trabajadores", type=int, default=os.cpu_count() or 1, help="procesos para la segunda construcción")
+    p.add_argument("--modificados", type=int, default=20, help="archivos modificados antes de actualizar (se borra la mitad de otros)")
+    p.add_argument("--consultas", type=int, default=20000)
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("-n", "--repeticiones", type=int, default=3)
+    p.set_defaults(funcion=bench_indice)
+
+    p = sub.add_parser("suite", help="tokenizar, construir la tabla y analizar por forma de programa, contra una línea base")
+    p.add_argument("--formas", nargs="+", choices=["mixto", "anidado", "argumentos", "ancho", "lineas_largas", "comentarios"],
+                   default=None, help="formas de programa a medir (por defecto todas)")
+    p.add_argument("--tamano", type=int, default=200_000, help="bytes aproximados de cada programa")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("-n", "--repeticiones", type=int, default=7, help="repeticiones por caso; se toma el mínimo")
+    p.add_argument("--base", default=ARCHIVO_LINEA_BASE, metavar="RUTA", help="archivo JSON de la línea base")
+    p.add_argument("--guardar-base", action="store_true", help="guardar los tiempos de esta corrida como línea base")
+    p.add_argument("--umbral", type=float, default=0.10,
+                   help="fracción de aumento sobre la línea base que cuenta como regresión (por defecto 0.10)")
+    p.add_argument("--calibrar", action="store_true",
+                   help="normalizar los tiempos por un bucle de calibración, para líneas base de otra máquina")
+    p.set_defaults(funcion=bench_suite)
+
+    args = analizador.parse_args()
+    args.funcion(args)
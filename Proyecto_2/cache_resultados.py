@@ -0,0 +1,257 @@
+import argparse
+import hashlib
+import os
+import pickle
+import sys
+from array import array
+from collections import OrderedDict, namedtuple
+import cache_tabla as Cmod
+import errors as Emod
+import main as Mmod
+import parser as Pmod
+from lexer import tokenizar, ErrorLexer
+
+# Cache de resultados por contenido, para no volver a analizar los archivos que no
+# cambiaron entre corridas (lote.py en CI) ni entre peticiones (servidor.py). La clave
+# es el SHA-256 de la versión del formato, la huella del código que decide el resultado
+# (MODULOS_RESULTADO y los que arman la tabla), la huella de la gramática y los bytes
+# del archivo, así que un cambio en la gramática, en el lexer o en el parser invalida
+# todo sin borrar nada: las entradas viejas simplemente dejan de pedirse y se van con
+# la poda.
+#
+# Cada entrada guarda el veredicto, el mensaje del modo normal, todos los errores
+# sintácticos (errors.InformacionErrorSintactico, como los da parser.analizar_recuperando)
+# y, si se pidió, la traza como ids de producción.
+#
+# Dos niveles:
+#  - memoria: un LRU de `max_memoria` entradas, para el servidor y para cada
+#    trabajador de un lote;
+#  - disco: un archivo por clave en <directorio>/<2 primeros hex>/<clave>, escrito con
+#    os.replace para que dos procesos puedan compartir el directorio. Un acierto
+#    actualiza la fecha de modificación y podar() borra las más viejas hasta quedar
+#    bajo `max_bytes` (LRU aproximado). Una entrada ilegible cuenta como fallo.
+VERSION_CACHE_RESULTADOS = 1
+MAGIA_RESULTADO = b"LL1RES"
+MODULOS_RESULTADO = ("cache_resultados", "lexer", "parser", "main", "errors")
+
+DIRECTORIO_POR_DEFECTO = os.environ.get(
+    "ANALIZADOR_CACHE_RESULTADOS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".resultados_ll1")
+)
+MAX_BYTES_POR_DEFECTO = 256 * 1024 * 1024
+MAX_MEMORIA_POR_DEFECTO = 4096
+
+# traza: array de ids de producción, o None si no se guardó (o el análisis falló).
+Resultado = namedtuple("Resultado", ["ok", "mensaje", "errores", "traza"])
+
+def huella_codigo_resultados():
+    return Cmod.huella_codigo(MODULOS_RESULTADO + Cmod.MODULOS_ARTEFACTO)
+
+def clave_contenido(datos, huella):
+    h = hashlib.sha256()
+    h.update(MAGIA_RESULTADO + VERSION_CACHE_RESULTADOS.to_bytes(2, "little"))
+    h.update(huella_codigo_resultados())
+    h.update(huella)
+    h.update(datos)
+    return h.hexdigest()
+
+def analizar_para_cache(fuente, tc, traza=False):
+    try:
+        tokens = tokenizar(fuente)
+    except ErrorLexer as e:
+        return Resultado(False, Mmod.formatear_error_lexer(e), (), None)
+    try:
+        ok, mensaje, aplicadas = Mmod.normalizar_resultado(
+            Pmod.analizar_flujo(iter(tokens), tc, "ids" if traza else "ninguna"))
+        if ok:
+            return Resultado(True, mensaje, (), aplicadas if traza else None)
+        errores, _ = Pmod.analizar_recuperando(tokens, tc, "ninguna")
+    except Exception as e:
+        return Resultado(False, f"ANALIZADOR LANZÓ EXCEPCIÓN: {e}", (), None)
+    return Resultado(False, mensaje, tuple(errores), None)
+
+def serializar_resultado(resultado):
+    traza = resultado.traza
+    campos = {
+        "ok": resultado.ok,
+        "mensaje": resultado.mensaje,
+        "errores": [tuple(err) for err in resultado.errores],
+        "traza": None if traza is None else (traza.typecode, traza.tobytes()),
+    }
+    return MAGIA_RESULTADO + VERSION_CACHE_RESULTADOS.to_bytes(2, "little") + pickle.dumps(campos, protocol=pickle.HIGHEST_PROTOCOL)
+
+def deserializar_resultado(datos):
+    cabecera = len(MAGIA_RESULTADO) + 2
+    if not datos.startswith(MAGIA_RESULTADO) or len(datos) < cabecera:
+        return None
+    if int.from_bytes(datos[len(MAGIA_RESULTADO):cabecera], "little") != VERSION_CACHE_RESULTADOS:
+        return None
+    try:
+        campos = pickle.loads(datos[cabecera:])
+        traza = campos["traza"]
+        if traza is not None:
+            typecode, crudos = traza
+            traza = array(typecode)
+            traza.frombytes(crudos)
+        errores = tuple(Emod.InformacionErrorSintactico(*err) for err in campos["errores"])
+        return Resultado(campos["ok"], campos["mensaje"], errores, traza)
+    except Exception:
+        return None
+
+class CacheResultados:
+    # directorio=None deja solo el nivel en memoria; max_memoria=0, solo el de disco.
+    def __init__(self, huella, directorio=None, max_bytes=MAX_BYTES_POR_DEFECTO, max_memoria=MAX_MEMORIA_POR_DEFECTO):
+        self.huella = huella
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.max_memoria = max_memoria
+        self._memoria = OrderedDict()
+        self.aciertos_memoria = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave[:2], clave)
+
+    def _recordar(self, clave, resultado):
+        if self.max_memoria <= 0:
+            return
+        self._memoria[clave] = resultado
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+
+    def obtener(self, clave, traza=False):
+        # Un resultado exitoso sin traza no sirve si se pide la traza.
+        resultado = self._memoria.get(clave)
+        if resultado is not None and (not traza or not resultado.ok or resultado.traza is not None):
+            self._memoria.move_to_end(clave)
+            self.aciertos_memoria += 1
+            return resultado
+        if self.directorio is not None:
+            ruta = self._ruta(clave)
+            try:
+                with open(ruta, "rb") as f:
+                    resultado = deserializar_resultado(f.read())
+            except OSError:
+                resultado = None
+            if resultado is not None and (not traza or not resultado.ok or resultado.traza is not None):
+                try:
+                    os.utime(ruta)
+                except OSError:
+                    pass
+                self._recordar(clave, resultado)
+                self.aciertos_disco += 1
+                return resultado
+        self.fallos += 1
+        return None
+
+    def guardar(self, clave, resultado):
+        self._recordar(clave, resultado)
+        if self.directorio is None:
+            return False
+        ruta = self._ruta(clave)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            with open(temporal, "wb") as f:
+                f.write(serializar_resultado(resultado))
+            os.replace(temporal, ruta)
+            return True
+        except OSError:
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+            return False
+
+    def analizar(self, datos, tc, traza=False):
+        # Devuelve (resultado, en_cache). `datos` son los bytes del archivo; se decodifican
+        # como al abrirlo en modo texto (UTF-8 y saltos de línea universales), así que si
+        # no son UTF-8 válido se lanza UnicodeDecodeError.
+        clave = clave_contenido(datos, self.huella)
+        resultado = self.obtener(clave, traza)
+        if resultado is not None:
+            return resultado, True
+        fuente = datos.decode("utf-8")
+        if "\r" in fuente:
+            fuente = fuente.replace("\r\n", "\n").replace("\r", "\n")
+        resultado = analizar_para_cache(fuente, tc, traza)
+        self.guardar(clave, resultado)
+        return resultado, False
+
+    @property
+    def consultas(self):
+        return self.aciertos_memoria + self.aciertos_disco + self.fallos
+
+    def tasa_aciertos(self):
+        consultas = self.consultas
+        return (self.aciertos_memoria + self.aciertos_disco) / consultas if consultas else 0.0
+
+    def podar(self, max_bytes=None):
+        return podar(self.directorio, self.max_bytes if max_bytes is None else max_bytes)
+
+def _entradas(directorio):
+    # (fecha de modificación, tamaño, ruta) de cada entrada del directorio.
+    entradas = []
+    try:
+        subdirectorios = list(os.scandir(directorio))
+    except OSError:
+        return entradas
+    for sub in subdirectorios:
+        if not sub.is_dir():
+            continue
+        try:
+            for entrada in os.scandir(sub.path):
+                if entrada.is_file() and not entrada.name.endswith(".tmp"):
+                    info = entrada.stat()
+                    entradas.append((info.st_mtime, info.st_size, entrada.path))
+        except OSError:
+            continue
+    return entradas
+
+def tamano_en_disco(directorio):
+    entradas = _entradas(directorio)
+    return len(entradas), sum(tam for _, tam, _ in entradas)
+
+def podar(directorio, max_bytes=MAX_BYTES_POR_DEFECTO):
+    # Borra las entradas usadas hace más tiempo hasta que el total quede bajo max_bytes.
+    # Devuelve (entradas borradas, bytes liberados).
+    if directorio is None:
+        return 0, 0
+    entradas = _entradas(directorio)
+    total = sum(tam for _, tam, _ in entradas)
+    borradas = liberados = 0
+    if total <= max_bytes:
+        return borradas, liberados
+    entradas.sort()
+    for _, tam, ruta in entradas:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(ruta)
+        except OSError:
+            continue
+        total -= tam
+        borradas += 1
+        liberados += tam
+    return borradas, liberados
+
+def principal(argv=None):
+    analizador = argparse.ArgumentParser(description="Inspecciona o poda la cache de resultados de análisis.")
+    analizador.add_argument("comando", choices=("inspeccionar", "podar", "vaciar"))
+    analizador.add_argument("--directorio", default=DIRECTORIO_POR_DEFECTO, help="directorio de la cache (por defecto: %(default)s)")
+    analizador.add_argument("--max-megas", type=float, default=MAX_BYTES_POR_DEFECTO / 2**20, help="tamaño máximo para podar (por defecto: %(default)s)")
+    args = analizador.parse_args(argv)
+
+    if args.comando == "inspeccionar":
+        entradas, total = tamano_en_disco(args.directorio)
+        print(f"{args.directorio}: {entradas} entradas, {total / 2**20:.2f} MB")
+    else:
+        max_bytes = 0 if args.comando == "vaciar" else int(args.max_megas * 2**20)
+        borradas, liberados = podar(args.directorio, max_bytes)
+        print(f"{borradas} entradas borradas, {liberados / 2**20:.2f} MB liberados")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(principal())
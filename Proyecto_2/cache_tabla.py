@@ -0,0 +1,203 @@
+import argparse
+import functools
+import hashlib
+import json
+import os
+import pickle
+import sys
+from collections import namedtuple
+import grammar as Gmod
+import sets as Smod
+import estadisticas as Estmod
+import table as Tmod
+import tabla_compilada as TCmod
+
+# El archivo es MAGIA_CACHE, VERSION_CACHE (2 bytes), la huella del código (32 bytes),
+# la huella de la gramática (32 bytes) y un pickle del artefacto. VERSION_CACHE es la del
+# formato del archivo; un cambio en el código que arma el artefacto (los módulos de
+# MODULOS_ARTEFACTO) cambia la huella del código y también invalida la cache.
+VERSION_CACHE = 6
+MAGIA_CACHE = b"LL1TABLA"
+MODULOS_ARTEFACTO = ("cache_tabla", "grammar", "sets", "table", "tabla_compilada", "errors", "lexer")
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+RUTA_CACHE_POR_DEFECTO = os.environ.get(
+    "ANALIZADOR_CACHE_TABLA",
+    os.path.join(DIRECTORIO, ".tabla_ll1.cache")
+)
+
+# Todo lo que se deriva de la gramática: producciones normalizadas, conjuntos de
+# símbolos, PRIMEROS/SIGUIENTES/SELECCION (como frozenset), la tabla predictiva y la
+# tabla compilada. Es el artefacto que se guarda en la cache y el objeto que comparten
+# los módulos a través de gramatica_compilada(); se trata como de solo lectura.
+GramaticaCompilada = namedtuple("GramaticaCompilada", [
+    "huella", "gramatica_norm", "no_terminales", "terminales",
+    "tabla", "FIRST", "FOLLOW", "SELECT", "compilada"
+])
+
+_gramaticas_compiladas = {}
+
+def huella_gramatica(gramatica, simbolo_inicial):
+    # La huella depende solo del contenido de la gramática y del símbolo inicial,
+    # no del orden de inserción de las claves del diccionario.
+    texto = json.dumps([gramatica, simbolo_inicial], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).digest()
+
+@functools.lru_cache(maxsize=None)
+def huella_codigo(modulos):
+    # SHA-256 del nombre y del fuente de cada módulo de `modulos` (todos junto a este
+    # archivo). Un módulo que no se puede leer cuenta solo por su nombre.
+    h = hashlib.sha256()
+    for nombre in modulos:
+        h.update(nombre.encode("utf-8") + b"\0")
+        try:
+            with open(os.path.join(DIRECTORIO, f"{nombre}.py"), "rb") as f:
+                h.update(f.read())
+        except OSError:
+            pass
+        h.update(b"\0")
+    return h.digest()
+
+def huella_codigo_artefacto():
+    return huella_codigo(MODULOS_ARTEFACTO)
+
+def construir_artefacto(gramatica, simbolo_inicial, estadisticas=None):
+    # La gramática se normaliza una sola vez y todo lo demás se calcula a partir de ella.
+    with Estmod.fase(estadisticas, "normalizar"):
+        gramatica_norm = Gmod.normalizar_gramatica_para_ll1(gramatica)
+    no_terminales, terminales = Smod.simbolos_de_gramatica(gramatica_norm)
+    tabla, FIRST, FOLLOW, SELECT = Tmod.construir_tabla_desde_normalizada(gramatica_norm, simbolo_inicial, estadisticas)
+    with Estmod.fase(estadisticas, "compilar_tabla"):
+        compilada = TCmod.compilar_tabla(tabla, gramatica_norm, simbolo_inicial, FOLLOW)
+    return GramaticaCompilada(
+        huella_gramatica(gramatica, simbolo_inicial), gramatica_norm,
+        frozenset(no_terminales), frozenset(terminales), tabla,
+        { X: frozenset(c) for X, c in FIRST.items() },
+        { A: frozenset(c) for A, c in FOLLOW.items() },
+        { clave: frozenset(c) for clave, c in SELECT.items() },
+        compilada
+    )
+
+def serializar_artefacto(artefacto):
+    # Se serializa un diccionario simple para que el archivo no dependa de la
+    # ruta de importación de GramaticaCompilada (p. ej. cuando este módulo corre como __main__).
+    carga = pickle.dumps(artefacto._asdict(), protocol=pickle.HIGHEST_PROTOCOL)
+    return MAGIA_CACHE + VERSION_CACHE.to_bytes(2, "little") + huella_codigo_artefacto() + artefacto.huella + carga
+
+def deserializar_artefacto(datos):
+    # None si el archivo es de otro formato o de otro código, o si está dañado.
+    cabecera = len(MAGIA_CACHE) + 2
+    if not datos.startswith(MAGIA_CACHE) or len(datos) < cabecera + 64:
+        return None
+    if int.from_bytes(datos[len(MAGIA_CACHE):cabecera], "little") != VERSION_CACHE:
+        return None
+    if datos[cabecera:cabecera + 32] != huella_codigo_artefacto():
+        return None
+    try:
+        campos = pickle.loads(datos[cabecera + 64:])
+        artefacto = GramaticaCompilada(**campos)
+    except Exception:
+        return None
+    if artefacto.huella != datos[cabecera + 32:cabecera + 64]:
+        return None
+    return artefacto
+
+def leer_cache(ruta=None):
+    ruta = ruta or RUTA_CACHE_POR_DEFECTO
+    try:
+        with open(ruta, "rb") as f:
+            datos = f.read()
+    except OSError:
+        return None
+    return deserializar_artefacto(datos)
+
+def escribir_cache(artefacto, ruta=None):
+    ruta = ruta or RUTA_CACHE_POR_DEFECTO
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        with open(temporal, "wb") as f:
+            f.write(serializar_artefacto(artefacto))
+        os.replace(temporal, ruta)
+        return True
+    except OSError:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        return False
+
+def invalidar_cache(ruta=None):
+    ruta = ruta or RUTA_CACHE_POR_DEFECTO
+    try:
+        os.remove(ruta)
+        return True
+    except FileNotFoundError:
+        return False
+
+def cargar_o_construir(gramatica, simbolo_inicial, ruta=None, estadisticas=None):
+    # Si el archivo no existe, es de otra versión o de otro código, está dañado o
+    # corresponde a otra gramática, se reconstruye la tabla y se intenta guardar; un fallo al escribir no es fatal.
+    huella = huella_gramatica(gramatica, simbolo_inicial)
+    with Estmod.fase(estadisticas, "leer_cache"):
+        artefacto = leer_cache(ruta)
+    if artefacto is not None and artefacto.huella == huella:
+        return artefacto
+    artefacto = construir_artefacto(gramatica, simbolo_inicial, estadisticas)
+    with Estmod.fase(estadisticas, "escribir_cache"):
+        escribir_cache(artefacto, ruta)
+    return artefacto
+
+def gramatica_compilada(gramatica=None, simbolo_inicial=None, ruta=None, estadisticas=None):
+    # Una sola GramaticaCompilada por proceso y por gramática (por defecto la de
+    # grammar.py): la primera llamada la lee de la cache o la construye y las siguientes
+    # devuelven el mismo objeto.
+    if gramatica is None:
+        gramatica = Gmod.gramatica
+    if simbolo_inicial is None:
+        simbolo_inicial = Gmod.SIMBOLO_INICIAL
+    huella = huella_gramatica(gramatica, simbolo_inicial)
+    compilada = _gramaticas_compiladas.get(huella)
+    if compilada is None:
+        compilada = _gramaticas_compiladas[huella] = cargar_o_construir(gramatica, simbolo_inicial, ruta, estadisticas)
+    return compilada
+
+def _comando_construir(args):
+    artefacto = construir_artefacto(Gmod.gramatica, Gmod.SIMBOLO_INICIAL)
+    if not escribir_cache(artefacto, args.ruta):
+        print(f"No se pudo escribir la cache en {args.ruta or RUTA_CACHE_POR_DEFECTO}", file=sys.stderr)
+        return 1
+    print(f"Cache construida en {args.ruta or RUTA_CACHE_POR_DEFECTO} ({len(artefacto.tabla)} entradas)")
+    return 0
+
+def _comando_inspeccionar(args):
+    ruta = args.ruta or RUTA_CACHE_POR_DEFECTO
+    artefacto = leer_cache(ruta)
+    if artefacto is None:
+        print(f"{ruta}: sin cache válida")
+        return 1
+    vigente = artefacto.huella == huella_gramatica(Gmod.gramatica, Gmod.SIMBOLO_INICIAL)
+    print(f"Archivo: {ruta} ({os.path.getsize(ruta)} bytes)")
+    print(f"Version: {VERSION_CACHE}")
+    print(f"Código: {huella_codigo_artefacto().hex()}")
+    print(f"Huella: {artefacto.huella.hex()} ({'vigente' if vigente else 'obsoleta'})")
+    print(f"No terminales: {len(artefacto.gramatica_norm)}")
+    print(f"Entradas de la tabla: {len(artefacto.tabla)}")
+    return 0 if vigente else 1
+
+def _comando_invalidar(args):
+    ruta = args.ruta or RUTA_CACHE_POR_DEFECTO
+    if invalidar_cache(ruta):
+        print(f"Cache eliminada: {ruta}")
+    else:
+        print(f"No había cache en {ruta}")
+    return 0
+
+if __name__ == "__main__":
+    analizador = argparse.ArgumentParser(description="Cache en disco de la tabla predictiva LL(1).")
+    analizador.add_argument("--ruta", default=None, help="archivo de cache (por defecto junto a este módulo o $ANALIZADOR_CACHE_TABLA)")
+    sub = analizador.add_subparsers(dest="comando", required=True)
+    sub.add_parser("construir", help="construye la tabla y la guarda en disco").set_defaults(funcion=_comando_construir)
+    sub.add_parser("inspeccionar", help="muestra la versión y las huellas de la cache").set_defaults(funcion=_comando_inspeccionar)
+    sub.add_parser("invalidar", help="elimina el archivo de cache").set_defaults(funcion=_comando_invalidar)
+    args = analizador.parse_args()
+    sys.exit(args.funcion(args))
@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import socket
+import sys
+
+# Cliente del servidor de análisis (servidor.py). Solo importa la biblioteca estándar
+# para que arrancar sea barato; si no hay servidor escuchando, analiza en este mismo
+# proceso con servidor.procesar_peticion, que da la misma respuesta.
+#
+# Protocolo: una petición JSON por línea y una respuesta JSON por línea, en orden.
+#   {"archivo": ruta} o {"fuente": texto}, con opcionales "id", "traza"
+#   (uno de servidor.TRAZAS_PROTOCOLO), "todos_errores" (bool) y "estadisticas" (bool).
+#   {"comando": "ping"} y {"comando": "detener"} para controlar el servidor.
+# Respuesta: {"id", "archivo", "ok", "mensaje", "segundos"}; si el análisis fue
+# exitoso, "aplicadas", "ids" o "conteos" según la traza pedida, y "estadisticas"
+# si se pidieron. Si el servidor usa la cache de resultados, "en_cache" indica si la
+# respuesta salió de ella.
+
+RUTA_SOCKET_POR_DEFECTO = os.environ.get(
+    "ANALIZADOR_SOCKET",
+    os.path.join(os.environ.get("TMPDIR", "/tmp"), f"analizador-ll1-{getattr(os, 'getuid', lambda: 0)()}.sock")
+)
+
+class ServidorNoDisponible(Exception):
+    pass
+
+def enviar(peticiones, ruta=None, tiempo_espera=None):
+    # Envía las peticiones por una sola conexión y devuelve las respuestas en orden.
+    ruta = ruta or RUTA_SOCKET_POR_DEFECTO
+    if not hasattr(socket, "AF_UNIX"):
+        raise ServidorNoDisponible("esta plataforma no tiene sockets Unix")
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conexion:
+            conexion.settimeout(tiempo_espera)
+            conexion.connect(ruta)
+            lector = conexion.makefile("rb")
+            respuestas = []
+            for peticion in peticiones:
+                conexion.sendall(json.dumps(peticion, ensure_ascii=False).encode("utf-8") + b"\n")
+                linea = lector.readline()
+                if not linea:
+                    raise ServidorNoDisponible("el servidor cerró la conexión")
+                respuestas.append(json.loads(linea))
+            return respuestas
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        raise ServidorNoDisponible(str(e))
+
+def disponible(ruta=None):
+    try:
+        return enviar([{"comando": "ping"}], ruta, tiempo_espera=1.0)[0].get("ok", False)
+    except (ServidorNoDisponible, OSError, ValueError):
+        return False
+
+def analizar(peticiones, ruta=None, respaldo=True):
+    try:
+        return enviar(peticiones, ruta)
+    except ServidorNoDisponible:
+        if not respaldo:
+            raise
+    import servidor as Smod
+    tc = Smod.Mmod.cargar_tabla().compilada
+    return [Smod.procesar_peticion(peticion, tc) for peticion in peticiones]
+
+def principal(argv=None):
+    analizador = argparse.ArgumentParser(description="Cliente del servidor de análisis; sin servidor analiza en el proceso.")
+    analizador.add_argument("archivos", nargs="*", help="archivos a analizar (por defecto se lee la entrada estándar)")
+    analizador.add_argument("--socket", default=None, help="socket del servidor (por defecto: $ANALIZADOR_SOCKET o uno en el directorio temporal)")
+    analizador.add_argument("--todos-errores", action="store_true", help="reportar todos los errores sintácticos")
+    analizador.add_argument("--sin-respaldo", action="store_true", help="fallar si no hay servidor en lugar de analizar en el proceso")
+    analizador.add_argument("--detener", action="store_true", help="detener el servidor")
+    args = analizador.parse_args(argv)
+
+    if args.detener:
+        try:
+            enviar([{"comando": "detener"}], args.socket)
+        except ServidorNoDisponible as e:
+            print(f"No hay servidor: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    if args.archivos:
+        peticiones = [{"archivo": os.path.abspath(ruta)} for ruta in args.archivos]
+    else:
+        peticiones = [{"fuente": sys.stdin.read()}]
+    for peticion in peticiones:
+        peticion["todos_errores"] = args.todos_errores
+
+    try:
+        respuestas = analizar(peticiones, args.socket, respaldo=not args.sin_respaldo)
+    except ServidorNoDisponible as e:
+        print(f"No hay servidor: {e}", file=sys.stderr)
+        return 2
+    for respuesta in respuestas:
+        if len(respuestas) > 1:
+            print(f"{respuesta['archivo']}:")
+        print(respuesta["mensaje"])
+    return 0 if all(r["ok"] for r in respuestas) else 1
+
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -0,0 +1,227 @@
+import argparse
+import importlib.util
+import os
+import sys
+import types
+import cache_tabla as Cmod
+import parser as Pmod
+
+# Generador de un analizador descendente recursivo especializado para la gramática.
+# A partir de la gramática normalizada y la tabla predictiva escribe un módulo con una
+# función por no terminal que elige la producción comparando el id del terminal de
+# anticipación con constantes, en lugar de consultar la tabla en cada paso como la
+# máquina de pila de parser.py. Las reglas recursivas por la derecha en sí mismas
+# (lista_sentencias, cola_expr, cola_lista_args, ...) se generan como un ciclo.
+#
+# El módulo generado da los mismos resultados que parser.analizar_flujo: la misma
+# derivación, la misma traza (con los mismos niveles, salvo "arbol") y los mismos
+# mensajes de error. Depende de los ids de la tabla compilada, así que guarda la huella
+# de la gramática; cargar() lo regenera si no coincide con la actual.
+#
+# La profundidad de la recursión crece con el anidamiento del programa. Si se pasa del
+# límite de Python, analizar_descendente repite el análisis con parser.analizar_flujo.
+
+RUTA_MODULO_POR_DEFECTO = os.environ.get(
+    "ANALIZADOR_PARSER_DESCENDENTE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "parser_descendente.py")
+)
+NOMBRE_MODULO = "parser_descendente"
+
+_modulos = {}
+
+def _alternativas(gc):
+    # {A: [(id de producción, cuerpo sin ε, ids de terminales que la eligen)]} a partir
+    # de la gramática normalizada y la tabla predictiva.
+    tc = gc.compilada
+    ids = { simb: i for i, simb in enumerate(tc.simbolos) if simb is not None }
+    alternativas = {}
+    p = 0
+    for A, producciones in gc.gramatica_norm.items():
+        lista = []
+        for prod in producciones:
+            assert tc.producciones[p] == (A, prod)
+            seleccion = sorted(ids[t] for (B, t), elegida in gc.tabla.items() if B == A and elegida == prod)
+            lista.append((p, [s for s in prod if s != Pmod.EPS], seleccion))
+            p += 1
+        alternativas[A] = lista
+    return alternativas
+
+def _condicion(seleccion):
+    if len(seleccion) == 1:
+        return f"t == {seleccion[0]}"
+    return f"t in {{{', '.join(map(str, seleccion))}}}"
+
+def generar_codigo(gc=None):
+    gc = gc or Cmod.gramatica_compilada()
+    tc = gc.compilada
+    ids = { simb: i for i, simb in enumerate(tc.simbolos) if simb is not None }
+    alternativas = _alternativas(gc)
+    inicial = tc.simbolos[tc.id_inicial]
+
+    lineas = [
+        "# Generado por descendente.py a partir de la gramática; no editar.",
+        "# Analizador descendente recursivo con una función por no terminal.",
+        "from lexer import Token",
+        "from parser import formatear_error_token, _preparar_traza",
+        "",
+        f"HUELLA = bytes.fromhex({gc.huella.hex()!r})",
+        f"IDS_POR_TIPO = {tc.ids_por_tipo!r}",
+        f"IDS_PALABRAS_CLAVE = {tc.ids_palabras_clave!r}",
+        "",
+        "class _Fin(Exception):",
+        "    pass",
+        "",
+        "class _Error(Exception):",
+        "    pass",
+        "",
+        "def analizar(tokens, tc, traza=\"completa\"):",
+        "    registrar, contar, aplicadas, valores = _preparar_traza(traza, tc)",
+        "    esperados = tc.esperados",
+        "    ids_por_tipo = IDS_POR_TIPO",
+        "    ids_palabras = IDS_PALABRAS_CLAVE",
+        "    siguiente = iter(tokens).__next__",
+        "    try:",
+        "        actual = siguiente()",
+        "    except StopIteration:",
+        "        return False, '<0, 0> Error sintactico: se encontro: \"\"; se esperaba: \"EOF\".'",
+        "    if actual.tipo == 'KEYWORD':",
+        f"        t = ids_palabras.get(actual.lexema, {tc.id_desconocido})",
+        "    else:",
+        f"        t = ids_por_tipo.get(actual.tipo, {tc.id_desconocido})",
+        "",
+        "    def error(simbolo):",
+        "        raise _Error(formatear_error_token(actual, esperados[simbolo]))",
+    ]
+
+    def coincidir(terminal, sangria, verificar):
+        s = " " * sangria
+        codigo = []
+        if verificar:
+            codigo += [f"{s}if t != {ids[terminal]}:", f"{s}    error({ids[terminal]})"]
+        if ids[terminal] == tc.id_eof:
+            return codigo + [f"{s}raise _Fin"]
+        return codigo + [
+            f"{s}try:",
+            f"{s}    actual = siguiente()",
+            f"{s}except StopIteration:",
+            f"{s}    actual = Token('EOF', '<EOF>', actual.linea, actual.col + 1)",
+            f"{s}if actual.tipo == 'KEYWORD':",
+            f"{s}    t = ids_palabras.get(actual.lexema, {tc.id_desconocido})",
+            f"{s}else:",
+            f"{s}    t = ids_por_tipo.get(actual.tipo, {tc.id_desconocido})",
+        ]
+
+    for A, lista in alternativas.items():
+        recursiva = any(cuerpo and cuerpo[-1] == A for _, cuerpo, _ in lista)
+        lineas += ["", f"    def nt_{A}():", "        nonlocal actual, t"]
+        sangria = 12 if recursiva else 8
+        if recursiva:
+            lineas.append("        while True:")
+        s = " " * sangria
+        primera = True
+        for p, cuerpo, seleccion in lista:
+            if not seleccion:
+                continue
+            lineas.append(f"{s}{'if' if primera else 'elif'} {_condicion(seleccion)}:  # {A} → {' '.join(cuerpo) or Pmod.EPS}")
+            primera = False
+            c = " " * (sangria + 4)
+            lineas += [f"{c}if registrar:", f"{c}    aplicadas.append(valores[{p}])",
+                       f"{c}elif contar:", f"{c}    aplicadas[{p}] += 1"]
+            for i, simbolo in enumerate(cuerpo):
+                if simbolo in gc.gramatica_norm:
+                    if i == len(cuerpo) - 1 and simbolo == A:
+                        lineas.append(f"{c}continue")
+                        break
+                    lineas.append(f"{c}nt_{simbolo}()")
+                else:
+                    # El primer terminal del cuerpo ya se comprobó al elegir la producción
+                    # si es lo único que la elige.
+                    verificar = not (i == 0 and seleccion == [ids[simbolo]])
+                    lineas += coincidir(simbolo, sangria + 4, verificar)
+            else:
+                if not (cuerpo and ids.get(cuerpo[-1]) == tc.id_eof):
+                    lineas.append(f"{c}return")
+        lineas.append(f"{s}error({ids[A]})")
+
+    lineas += [
+        "",
+        "    try:",
+        f"        nt_{inicial}()",
+        f"        if t != {tc.id_eof}:",
+        f"            error({tc.id_eof})",
+        "    except _Fin:",
+        "        pass",
+        "    except _Error as e:",
+        "        return False, e.args[0], []",
+        "    return True, \"El analisis sintactico ha finalizado exitosamente.\", aplicadas",
+        "",
+    ]
+    return "\n".join(lineas)
+
+def escribir_modulo(codigo, ruta=None):
+    ruta = ruta or RUTA_MODULO_POR_DEFECTO
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write(codigo)
+        os.replace(temporal, ruta)
+        return True
+    except OSError:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        return False
+
+def _importar(ruta):
+    try:
+        spec = importlib.util.spec_from_file_location(NOMBRE_MODULO, ruta)
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+        return modulo
+    except (OSError, SyntaxError, ImportError):
+        return None
+
+def _desde_codigo(codigo, ruta):
+    modulo = types.ModuleType(NOMBRE_MODULO)
+    modulo.__file__ = ruta
+    exec(compile(codigo, ruta, "exec"), modulo.__dict__)
+    return modulo
+
+def cargar(gc=None, ruta=None):
+    # Módulo generado para la gramática de `gc` (por defecto la de grammar.py). Se importa
+    # del archivo si su huella coincide; si no, se genera, se intenta guardar (un fallo al
+    # escribir no es fatal) y se usa el código recién generado.
+    gc = gc or Cmod.gramatica_compilada()
+    modulo = _modulos.get(gc.huella)
+    if modulo is not None:
+        return modulo
+    ruta = ruta or RUTA_MODULO_POR_DEFECTO
+    modulo = _importar(ruta) if os.path.exists(ruta) else None
+    if modulo is None or getattr(modulo, "HUELLA", None) != gc.huella:
+        codigo = generar_codigo(gc)
+        escribir_modulo(codigo, ruta)
+        modulo = _desde_codigo(codigo, ruta)
+    _modulos[gc.huella] = modulo
+    return modulo
+
+def analizar_descendente(tokens, tc=None, traza="completa", gc=None):
+    # Analiza una secuencia de tokens (no un iterador: si la recursión se pasa del límite
+    # se vuelve a recorrer con parser.analizar_flujo).
+    gc = gc or Cmod.gramatica_compilada()
+    tc = tc or gc.compilada
+    try:
+        return cargar(gc).analizar(tokens, tc, traza)
+    except RecursionError:
+        return Pmod.analizar_flujo(iter(tokens), tc, traza)
+
+if __name__ == "__main__":
+    analizador = argparse.ArgumentParser(description="Genera el analizador descendente recursivo especializado para la gramática.")
+    analizador.add_argument("-o", "--salida", default=None,
+                            help="archivo del módulo (por defecto junto a este módulo o $ANALIZADOR_PARSER_DESCENDENTE)")
+    args = analizador.parse_args()
+    ruta = args.salida or RUTA_MODULO_POR_DEFECTO
+    if not escribir_modulo(generar_codigo(), ruta):
+        print(f"No se pudo escribir {ruta}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Analizador generado en {ruta}")
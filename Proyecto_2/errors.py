@@ -1,61 +1,81 @@
-from typing import List
-from collections import namedtuple
-from lexer import Token
-
-InformacionErrorSintactico = namedtuple("InformacionErrorSintactico", ["linea", "col", "lexema_encontrado", "lista_esperados", "mensaje"])
-
-LEGIBLE = {
-    'COLON': ':',
-    'COMMA': ',',
-    'DOT': '.',
-    'LPAR': '(',
-    'RPAR': ')',
-    'LBRACK': '[',
-    'RBRACK': ']',
-    'LBRACE': '{',
-    'RBRACE': '}',
-    'ASSIGN': '=',
-    'NEWLINE': 'NUEVALINEA',
-    'INDENT': 'INDENTACION',
-    'DEDENT': 'DEDENTACION',
-    'EOF': 'EOF',
-    'ID': 'identificador',
-    'INT': 'entero',
-    'FLOAT': 'flotante',
-    'STRING': 'cadena',
-    'BINOP': 'operador',
-}
-
-def legible_de_terminal(terminal: str) -> str:
-    if terminal in LEGIBLE:
-        return LEGIBLE[terminal]
-    if terminal.startswith('KEYWORD_'):
-        return terminal.split('KEYWORD_', 1)[1]
-    return terminal
-
-def lista_esperados_a_cadenas(terminales_esperados: List[str]) -> List[str]:
-    return [legible_de_terminal(t) for t in terminales_esperados]
-
-def formatear_error_token(token: Token, terminales_esperados: List[str]) -> str:
-    # El token proviene del lexer y tiene campos en español: `lexema`, `linea`, `col`.
-    lex = token.lexema.replace('"', '\\"')
-    esperados_legibles = lista_esperados_a_cadenas(terminales_esperados)
-    esperados_fmt = ', '.join(f'"{e}"' for e in esperados_legibles)
-    return f'<{token.linea}, {token.col}> Error sintactico: se encontro: "{lex}"; se esperaba: {esperados_fmt}.'
-
-def formatear_error_indentacion(token: Token) -> str:
-    return f'<{token.linea}, {token.col}> Error sintactico: falla de indentacion'
-
-def construir_esperados_desde_tabla(no_terminal: str, tabla: dict) -> List[str]:
-    esperados = sorted({ terminal for (A, terminal) in tabla.keys() if A == no_terminal })
-    if not esperados:
-        esperados = ['EOF']
-    return esperados
-
-def a_informacion_error_sintactico(token: Token, terminales_esperados: List[str], error_indentacion: bool = False) -> InformacionErrorSintactico:
-    if error_indentacion:
-        mensaje = formatear_error_indentacion(token)
-    else:
-        mensaje = formatear_error_token(token, terminales_esperados)
-    esperados_legibles = lista_esperados_a_cadenas(terminales_esperados)
+from typing import Dict, List
+from collections import namedtuple
+from lexer import Token
+
+InformacionErrorSintactico = namedtuple("InformacionErrorSintactico", ["linea", "col", "lexema_encontrado", "lista_esperados", "mensaje"])
+
+LEGIBLE = {
+    'COLON': ':',
+    'COMMA': ',',
+    'DOT': '.',
+    'LPAR': '(',
+    'RPAR': ')',
+    'LBRACK': '[',
+    'RBRACK': ']',
+    'LBRACE': '{',
+    'RBRACE': '}',
+    'ASSIGN': '=',
+    'NEWLINE': 'NUEVALINEA',
+    'INDENT': 'INDENTACION',
+    'DEDENT': 'DEDENTACION',
+    'EOF': 'EOF',
+    'ID': 'identificador',
+    'INT': 'entero',
+    'FLOAT': 'flotante',
+    'STRING': 'cadena',
+    'BINOP': 'operador',
+}
+
+def legible_de_terminal(terminal: str) -> str:
+    if terminal in LEGIBLE:
+        return LEGIBLE[terminal]
+    if terminal.startswith('KEYWORD_'):
+        return terminal.split('KEYWORD_', 1)[1]
+    return terminal
+
+def lista_esperados_a_cadenas(terminales_esperados: List[str]) -> List[str]:
+    return [legible_de_terminal(t) for t in terminales_esperados]
+
+def formatear_error_token(token: Token, terminales_esperados: List[str]) -> str:
+    # El token proviene del lexer y tiene campos en español: `lexema`, `linea`, `col`.
+    lex = token.lexema.replace('"', '\\"')
+    esperados_legibles = lista_esperados_a_cadenas(terminales_esperados)
+    esperados_fmt = ', '.join(f'"{e}"' for e in esperados_legibles)
+    return f'<{token.linea}, {token.col}> Error sintactico: se encontro: "{lex}"; se esperaba: {esperados_fmt}.'
+
+def formatear_error_indentacion(token: Token) -> str:
+    return f'<{token.linea}, {token.col}> Error sintactico: falla de indentacion'
+
+def construir_indice_esperados(tabla: dict) -> Dict[str, List[str]]:
+    # Un solo recorrido de la tabla: para cada no terminal, sus terminales esperados ya
+    # ordenados y legibles. Los no terminales sin entradas no aparecen en el índice.
+    por_no_terminal = {}
+    for (A, terminal) in tabla.keys():
+        por_no_terminal.setdefault(A, set()).add(terminal)
+    return { A: lista_esperados_a_cadenas(sorted(terminales)) for A, terminales in por_no_terminal.items() }
+
+# Índice del último dict simple consultado, junto con el dict (que así no se libera
+# mientras se lo compara por identidad). Como con TablaPredictiva, se supone que la
+# tabla no cambia después de armada.
+_indice_dict_simple = (None, None)
+
+def esperados_para_no_terminal(no_terminal: str, tabla: dict) -> List[str]:
+    # Lista legible para los mensajes de error. Con una table.TablaPredictiva (o una
+    # TablaComprimida) es una búsqueda en su índice; un dict simple no lo trae, así que
+    # se arma en la primera consulta y se reutiliza en las siguientes con el mismo dict.
+    global _indice_dict_simple
+    indice = getattr(tabla, 'esperados', None)
+    if indice is None:
+        tabla_indexada, indice = _indice_dict_simple
+        if tabla_indexada is not tabla:
+            indice = construir_indice_esperados(tabla)
+            _indice_dict_simple = (tabla, indice)
+    return indice.get(no_terminal) or [legible_de_terminal('EOF')]
+
+def a_informacion_error_sintactico(token: Token, terminales_esperados: List[str], error_indentacion: bool = False) -> InformacionErrorSintactico:
+    if error_indentacion:
+        mensaje = formatear_error_indentacion(token)
+    else:
+        mensaje = formatear_error_token(token, terminales_esperados)
+    esperados_legibles = lista_esperados_a_cadenas(terminales_esperados)
     return InformacionErrorSintactico(token.linea, token.col, token.lexema, esperados_legibles, mensaje)
\ No newline at end of file
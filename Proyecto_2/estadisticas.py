@@ -0,0 +1,87 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Mediciones por fase para `main.py --stats` y para quien llame a las funciones de
+# análisis con estadisticas=Estadisticas(). Cada fase acumula su tiempo de pared y, con
+# memoria=True, el pico de memoria asignada durante la fase (tracemalloc, relativo a lo
+# que había al entrar). Las fases pueden anidarse. Los contadores son libres: tokens,
+# pasos del parser, producciones aplicadas, etc.
+#
+# Las funciones instrumentadas reciben estadisticas=None por defecto y en ese caso
+# siguen su camino normal; el único costo es abrir un nullcontext por fase.
+
+class Estadisticas:
+    def __init__(self, memoria=False):
+        self.memoria = memoria
+        self.fases = {}
+        self.contadores = {}
+        # Funciones f(nombre_fase, datos_fase) que se llaman al cerrar cada fase.
+        self.observadores = []
+        self._niveles = []   # [memoria al entrar, pico visto] por cada fase abierta
+        self._detener_tracemalloc = False
+
+    @contextmanager
+    def fase(self, nombre):
+        if self.memoria:
+            self._entrar_memoria()
+        inicio = time.perf_counter()
+        try:
+            yield self
+        finally:
+            datos = self.fases.setdefault(nombre, {"segundos": 0.0})
+            datos["segundos"] += time.perf_counter() - inicio
+            if self.memoria:
+                datos["pico_memoria"] = max(datos.get("pico_memoria", 0), self._salir_memoria())
+            for observador in self.observadores:
+                observador(nombre, datos)
+
+    def _entrar_memoria(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._detener_tracemalloc = True
+        actual, pico = tracemalloc.get_traced_memory()
+        if self._niveles:
+            self._niveles[-1][1] = max(self._niveles[-1][1], pico)
+        tracemalloc.reset_peak()
+        self._niveles.append([actual, actual])
+
+    def _salir_memoria(self):
+        _, pico = tracemalloc.get_traced_memory()
+        base, pico_visto = self._niveles.pop()
+        pico = max(pico, pico_visto)
+        if self._niveles:
+            self._niveles[-1][1] = max(self._niveles[-1][1], pico)
+        elif self._detener_tracemalloc:
+            tracemalloc.stop()
+            self._detener_tracemalloc = False
+        return pico - base
+
+    def contar(self, nombre, cantidad=1):
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+
+    def maximo(self, nombre, valor):
+        if valor > self.contadores.get(nombre, valor - 1):
+            self.contadores[nombre] = valor
+
+    def a_dict(self):
+        datos = {"fases": self.fases, "contadores": self.contadores}
+        if resource is not None:
+            # ru_maxrss está en KB en Linux.
+            datos["pico_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return datos
+
+    def a_json(self):
+        return json.dumps(self.a_dict(), ensure_ascii=False)
+
+def fase(estadisticas, nombre):
+    # Contexto de la fase, o uno vacío si no se están tomando estadísticas.
+    if estadisticas is None:
+        return nullcontext()
+    return estadisticas.fase(nombre)
@@ -0,0 +1,407 @@
+import random
+
+# Generador de programas sintéticos que cumplen la gramática de grammar.py.
+# Se usa para las mediciones de benchmarks.py y las pruebas de test_diferencial.py; la
+# semilla hace que la salida sea reproducible.
+
+NOMBRES = ["x", "y", "total", "cuenta", "valor", "lista", "indice", "resultado", "dato", "suma"]
+FUNCIONES = ["procesar", "calcular", "imprimir", "len", "range", "max", "min", "filtrar"]
+OPERADORES = ["+", "-", "*", "/", "%", "**", "==", "!=", "<", ">", "<=", ">="]
+
+def _literal(rnd):
+    eleccion = rnd.randrange(6)
+    if eleccion == 0:
+        return str(rnd.randrange(1000))
+    if eleccion == 1:
+        return f"{rnd.randrange(100)}.{rnd.randrange(100)}"
+    if eleccion == 2:
+        return f'"texto {rnd.randrange(100)}"'
+    return rnd.choice(["True", "False", "None"])
+
+def _termino(rnd, profundidad):
+    eleccion = rnd.randrange(5) if profundidad > 0 else rnd.randrange(2)
+    if eleccion == 0:
+        return _literal(rnd)
+    if eleccion == 1:
+        return rnd.choice(NOMBRES)
+    if eleccion == 2:
+        return _llamada(rnd, profundidad - 1)
+    if eleccion == 3:
+        elementos = ", ".join(_expr(rnd, profundidad - 1) for _ in range(rnd.randrange(4)))
+        return f"[{elementos}]"
+    return f"({_expr(rnd, profundidad - 1)})"
+
+def _expr(rnd, profundidad=2):
+    partes = [_termino(rnd, profundidad)]
+    for _ in range(rnd.randrange(3)):
+        partes.append(rnd.choice(OPERADORES))
+        partes.append(_termino(rnd, profundidad))
+    return " ".join(partes)
+
+def _llamada(rnd, profundidad, num_args=None):
+    if num_args is None:
+        num_args = rnd.randrange(4)
+    argumentos = ", ".join(_expr(rnd, profundidad) for _ in range(num_args))
+    return f"{rnd.choice(FUNCIONES)}({argumentos})"
+
+def _sentencia_simple(rnd, en_bucle):
+    eleccion = rnd.randrange(7)
+    if eleccion <= 2:
+        return f"{rnd.choice(NOMBRES)} = {_expr(rnd)}"
+    if eleccion <= 4:
+        return _llamada(rnd, 1)
+    if eleccion == 5:
+        return f"return {_expr(rnd)}"
+    if en_bucle:
+        return rnd.choice(["pass", "break", "continue"])
+    return "pass"
+
+def sentencia_simple_aleatoria(rnd):
+    return _sentencia_simple(rnd, False)
+
+def _bloque(rnd, lineas, sangria, profundidad, en_bucle):
+    for _ in range(rnd.randint(1, 4)):
+        _sentencia(rnd, lineas, sangria, profundidad, en_bucle)
+
+def _sentencia(rnd, lineas, sangria, profundidad, en_bucle):
+    prefijo = "    " * sangria
+    eleccion = rnd.randrange(8) if profundidad > 0 else 0
+    if eleccion <= 3:
+        lineas.append(prefijo + _sentencia_simple(rnd, en_bucle))
+    elif eleccion == 4:
+        lineas.append(f"{prefijo}if {_expr(rnd)}:")
+        _bloque(rnd, lineas, sangria + 1, profundidad - 1, en_bucle)
+        for _ in range(rnd.randrange(2)):
+            lineas.append(f"{prefijo}elif {_expr(rnd)}:")
+            _bloque(rnd, lineas, sangria + 1, profundidad - 1, en_bucle)
+        if rnd.randrange(2):
+            lineas.append(f"{prefijo}else:")
+            _bloque(rnd, lineas, sangria + 1, profundidad - 1, en_bucle)
+    elif eleccion == 5:
+        lineas.append(f"{prefijo}while {_expr(rnd)}:")
+        _bloque(rnd, lineas, sangria + 1, profundidad - 1, True)
+    elif eleccion == 6:
+        lineas.append(f"{prefijo}for {rnd.choice(NOMBRES)} in {_llamada(rnd, 0)}:")
+        _bloque(rnd, lineas, sangria + 1, profundidad - 1, True)
+    else:
+        lineas.append(f"{prefijo}# comentario {rnd.randrange(1000)}")
+        lineas.append(prefijo + _sentencia_simple(rnd, en_bucle))
+
+def _funcion(rnd, lineas, profundidad):
+    params = ", ".join(rnd.sample(NOMBRES, rnd.randrange(4)))
+    lineas.append(f"def {rnd.choice(FUNCIONES)}_{rnd.randrange(10000)}({params}):")
+    _bloque(rnd, lineas, 1, profundidad, False)
+    lineas.append("")
+
+def generar_programa(tamano_bytes=100_000, semilla=0, profundidad=3):
+    rnd = random.Random(semilla)
+    lineas = []
+    total = 0
+    while total < tamano_bytes:
+        inicio = len(lineas)
+        if rnd.randrange(4):
+            _funcion(rnd, lineas, profundidad)
+        else:
+            _sentencia(rnd, lineas, 0, profundidad, False)
+        total += sum(len(l) + 1 for l in lineas[inicio:])
+    return "\n".join(lineas) + "\n"
+
+# Formas de programa para la suite de benchmarks.py: cada una agrega una unidad (varias
+# líneas) que ejercita un caso particular del lexer o del parser.
+
+def _unidad_anidada(rnd, lineas, profundidad=40):
+    # if/while anidados `profundidad` niveles, con una sentencia simple en cada nivel.
+    for nivel in range(profundidad):
+        prefijo = "    " * nivel
+        if rnd.randrange(2):
+            lineas.append(f"{prefijo}if {_expr(rnd, 1)}:")
+        else:
+            lineas.append(f"{prefijo}while {_expr(rnd, 1)}:")
+        lineas.append(prefijo + "    " + _sentencia_simple(rnd, False))
+
+def _unidad_argumentos(rnd, lineas, num_args=300):
+    # Una llamada con una lista_args larga.
+    lineas.append(f"{rnd.choice(NOMBRES)} = {_llamada(rnd, 0, num_args)}")
+
+def _unidad_ancha(rnd, lineas):
+    # Muchas definiciones cortas al nivel superior, sin sentencias compuestas.
+    if rnd.randrange(2):
+        _funcion(rnd, lineas, 0)
+    else:
+        lineas.append(_sentencia_simple(rnd, False))
+
+def _unidad_linea_larga(rnd, lineas, operandos=2000):
+    # Una asignación con una expresión de `operandos` términos en una sola línea.
+    partes = [_termino(rnd, 0)]
+    for _ in range(operandos - 1):
+        partes.append(rnd.choice(OPERADORES))
+        partes.append(_termino(rnd, 0))
+    lineas.append(f"{rnd.choice(NOMBRES)} = {' '.join(partes)}")
+
+def _unidad_comentada(rnd, lineas, comentarios=3):
+    # Varias líneas de comentario antes de cada sentencia y comentarios al final de línea.
+    inicio = len(lineas)
+    _sentencia(rnd, lineas, 0, 2, False)
+    nuevas = []
+    for linea in lineas[inicio:]:
+        prefijo = linea[:len(linea) - len(linea.lstrip())]
+        nuevas.extend(f"{prefijo}# comentario {rnd.randrange(1000)} sobre la sentencia" for _ in range(comentarios))
+        if linea.strip() and not linea.lstrip().startswith("#"):
+            linea += f"  # nota {rnd.randrange(100)}"
+        nuevas.append(linea)
+    lineas[inicio:] = nuevas
+
+def _unidad_mixta(rnd, lineas, profundidad=3):
+    if rnd.randrange(4):
+        _funcion(rnd, lineas, profundidad)
+    else:
+        _sentencia(rnd, lineas, 0, profundidad, False)
+
+FORMAS = {
+    "mixto": _unidad_mixta,
+    "anidado": _unidad_anidada,
+    "argumentos": _unidad_argumentos,
+    "ancho": _unidad_ancha,
+    "lineas_largas": _unidad_linea_larga,
+    "comentarios": _unidad_comentada,
+}
+
+def generar_programa_forma(forma, tamano_bytes=100_000, semilla=0, **opciones):
+    # Programa de la forma indicada (ver FORMAS); `opciones` ajusta la unidad, p. ej.
+    # profundidad=80 para "anidado" o num_args=1000 para "argumentos".
+    try:
+        unidad = FORMAS[forma]
+    except KeyError:
+        raise ValueError(f"Forma desconocida: {forma!r} (opciones: {', '.join(FORMAS)})")
+    rnd = random.Random(semilla)
+    lineas = []
+    total = 0
+    while total < tamano_bytes:
+        inicio = len(lineas)
+        unidad(rnd, lineas, **opciones)
+        total += sum(len(l) + 1 for l in lineas[inicio:])
+    return "\n".join(lineas) + "\n"
+
+def _romper_linea(linea):
+    # Error sintáctico (no léxico) en una línea: falta ':' en una cabecera, '=' repetido
+    # o falta el último ')'. Devuelve None si la línea no admite ninguno.
+    if linea.endswith(":"):
+        return linea[:-1]
+    if " = " in linea:
+        return linea.replace(" = ", " = = ", 1)
+    cierre = linea.rfind(")")
+    if cierre >= 0 and not linea.lstrip().startswith("#"):
+        return linea[:cierre] + linea[cierre + 1:]
+    return None
+
+def generar_programa_con_errores(tamano_bytes=100_000, semilla=0, num_errores=40, separacion=3):
+    # Programa de generar_programa con `num_errores` líneas rotas, separadas por al menos
+    # `separacion` líneas. Devuelve (fuente, errores) con errores como lista ordenada de
+    # (número de línea, línea original) para poder corregirlos uno por uno.
+    rnd = random.Random(semilla)
+    lineas = generar_programa(tamano_bytes, semilla).split("\n")
+    candidatas = [i for i, linea in enumerate(lineas) if _romper_linea(linea) is not None]
+    errores = []
+    ultima = -separacion
+    for i in sorted(rnd.sample(candidatas, min(len(candidatas), num_errores * 2))):
+        if len(errores) == num_errores:
+            break
+        if i - ultima >= separacion:
+            errores.append((i + 1, lineas[i]))
+            lineas[i] = _romper_linea(lineas[i])
+            ultima = i
+    return "\n".join(lineas), errores
+
+def generar_programas_mutados(cantidad, semilla=0):
+    # Programas cortos con un token reemplazado, para ejercitar los caminos de error.
+    rnd = random.Random(semilla)
+    fuentes = []
+    for i in range(cantidad):
+        partes = generar_programa(800, semilla=i).split(" ")
+        partes[rnd.randrange(len(partes))] = rnd.choice(["(", ")", ":", "if", "", ",", "[", "=", "\n", "else"])
+        fuentes.append(" ".join(partes))
+    return fuentes
+
+def generar_programas_partidos(cantidad, semilla=0):
+    # Programas de varias partes para paralelo.py: comentarios y líneas en blanco antes
+    # de sentencias de nivel superior, if/elif/else y bloques que cierran justo antes de
+    # un corte, y errores léxicos o sintácticos en cualquier parte.
+    rnd = random.Random(semilla)
+    fuentes = []
+    for i in range(cantidad):
+        lineas = generar_programa(6000, semilla=semilla + i).split("\n")
+        # Los comentarios cuentan para la sangría: se insertan antes de líneas sin sangría.
+        sin_sangria = [k for k, linea in enumerate(lineas) if linea[:1] not in ("", " ", "\t")]
+        for k in sorted(rnd.sample(sin_sangria, min(len(sin_sangria), rnd.randrange(6))), reverse=True):
+            lineas.insert(k, rnd.choice(["# comentario", "", "   ", "#", "# otro comentario"]))
+        mutacion = rnd.randrange(8)
+        if mutacion <= 4:
+            k = rnd.randrange(len(lineas))
+            if mutacion == 1:
+                lineas[k] = lineas[k] + " $"
+            elif mutacion == 2:
+                lineas[k] = " " + lineas[k]
+            elif mutacion == 3:
+                lineas[k] = rnd.choice(["else:", "elif x:"])
+            else:
+                partes = lineas[k].split(" ")
+                partes[rnd.randrange(len(partes))] = rnd.choice(["(", ")", ":", "if", "", ",", "=", "else"])
+                lineas[k] = " ".join(partes)
+        fuentes.append("\n".join(lineas))
+    return fuentes
+
+def con_error_en(fuente, fraccion, tipo):
+    # La fuente con un error de sangría ("sangria": una línea sangrada con un espacio
+    # menos que la anterior) o un paréntesis sin cerrar ("parentesis") en la primera
+    # línea que sirva a partir de `fraccion` del archivo.
+    lineas = fuente.split("\n")
+    sangria = lambda linea: len(linea) - len(linea.lstrip(" "))
+    for k in range(max(int(len(lineas) * fraccion), 1), len(lineas)):
+        linea = lineas[k]
+        if tipo == "sangria" and sangria(linea) >= 4 and sangria(lineas[k - 1]) == sangria(linea):
+            lineas[k] = linea[1:]
+            break
+        if tipo == "parentesis" and linea and not linea.lstrip().startswith("#"):
+            lineas[k] = linea + " + (1"
+            break
+    return "\n".join(lineas)
+
+def generar_programa_nombres(tamano_bytes=100_000, semilla=0):
+    # Programa válido hecho casi solo de nombres largos y palabras clave: asignaciones,
+    # llamadas anidadas, condiciones y ciclos sobre un vocabulario de 500 nombres.
+    rnd = random.Random(semilla)
+    raices = ("valor", "cuenta", "indice", "registro", "elemento", "nodo", "resultado_parcial")
+    nombres = [f"{rnd.choice(raices)}_{i}" for i in range(500)]
+    lineas = []
+    total = 0
+    while total < tamano_bytes:
+        a, b, c, d = rnd.sample(nombres, 4)
+        forma = rnd.randrange(5)
+        if forma == 0:
+            nuevas = [f"{a} = {b} + {c} * {d}"]
+        elif forma == 1:
+            nuevas = [f"{a} = {b}({c}, {d}({a}), {c})"]
+        elif forma == 2:
+            nuevas = [f"if {a} < {b}:", f"    {c} = {d}", f"elif {a} == {c}:", "    pass", "else:", f"    return {d}"]
+        elif forma == 3:
+            nuevas = [f"while {a} != {b}:", f"    {c}({d})", "    continue"]
+        else:
+            nuevas = [f"for {a} in {b}({c}):", f"    {d} = True", "    break"]
+        lineas.extend(nuevas)
+        total += sum(len(l) + 1 for l in nuevas)
+    return "\n".join(lineas) + "\n"
+
+def edicion_aleatoria(rnd, lineas):
+    # Edición de "editor" sobre las líneas de un programa que lo mantiene válido: cambia,
+    # inserta o borra una sentencia simple con la misma sangría que la línea elegida.
+    # Devuelve (inicio, fin, texto) como incremental.AnalizadorIncremental.editar.
+    i = rnd.randrange(len(lineas))
+    linea = lineas[i]
+    sangria = linea[:len(linea) - len(linea.lstrip(" \t"))]
+    es_cabecera = linea.rstrip().endswith(":")
+    nueva = sangria + sentencia_simple_aleatoria(rnd) + "\n"
+    eleccion = rnd.randrange(3)
+    if eleccion == 0 and not es_cabecera and linea.strip():
+        return i, i + 1, nueva
+    if eleccion == 1 and not linea.lstrip().startswith(("elif", "else")):
+        return i, i, nueva
+    if eleccion == 2 and not es_cabecera and i > 0 and not lineas[i - 1].rstrip().endswith(":"):
+        return i, i + 1, ""
+    return i, i, ""
+
+def edicion_que_rompe(rnd, lineas):
+    # Como edicion_aleatoria, pero reemplaza una línea por otra con un error.
+    i = rnd.randrange(len(lineas))
+    linea = lineas[i]
+    sangria = linea[:len(linea) - len(linea.lstrip(" \t"))]
+    return i, i + 1, rnd.choice([sangria + "  x = 1\n", linea.replace("(", "", 1), "if x\n", sangria + "y = $\n"])
+
+def generar_gramatica(num_no_terminales, semilla=0, num_terminales=None, prob_eps=0.15):
+    # Gramática sintética para medir el cálculo de PRIMEROS/SIGUIENTES; no tiene por qué
+    # ser LL(1). Las referencias van sobre todo hacia no terminales posteriores, lo que
+    # forma cadenas largas de dependencias, y a veces hacia atrás, lo que forma ciclos.
+    rnd = random.Random(semilla)
+    num_terminales = num_terminales or max(10, num_no_terminales // 10)
+    no_terminales = [f"N{i}" for i in range(num_no_terminales)]
+    terminales = [f"t{i}" for i in range(num_terminales)]
+    gramatica = {}
+    for i, A in enumerate(no_terminales):
+        prods = []
+        for _ in range(rnd.randint(1, 3)):
+            if rnd.random() < prob_eps:
+                if ['ε'] not in prods:
+                    prods.append(['ε'])
+                continue
+            prod = []
+            for _ in range(rnd.randint(1, 4)):
+                if rnd.random() < 0.5:
+                    if i + 1 < num_no_terminales and rnd.random() < 0.9:
+                        prod.append(no_terminales[rnd.randrange(i + 1, num_no_terminales)])
+                    else:
+                        prod.append(no_terminales[rnd.randrange(num_no_terminales)])
+                else:
+                    prod.append(rnd.choice(terminales))
+            prods.append(prod)
+        gramatica[A] = prods
+    return gramatica
+
+def replicar_gramatica(gramatica, simbolo_inicial, copias, terminales_propios=False):
+    # Gramática LL(1) `copias` veces más grande a partir de una LL(1) normalizada: copias
+    # con los no terminales renombrados (A → A_k) y, con terminales_propios, también los
+    # terminales (salvo EOF), más un símbolo inicial que elige la copia por un terminal
+    # MARCA_k. Devuelve (gramática, símbolo inicial).
+    no_terminales = set(gramatica)
+    def renombrar(s, k):
+        if s in no_terminales or (terminales_propios and s not in ('ε', 'EOF')):
+            return f"{s}_{k}"
+        return s
+    inicial = "inicio_copias"
+    resultado = {inicial: [[f"MARCA_{k}", f"{simbolo_inicial}_{k}"] for k in range(copias)]}
+    for k in range(copias):
+        for A, prods in gramatica.items():
+            resultado[f"{A}_{k}"] = [[renombrar(s, k) for s in prod] for prod in prods]
+    return resultado, inicial
+
+# Fragmentos para entradas "difíciles" del lexer: prefijos de cadena, escapes, cadenas
+# sin cerrar, números con varios puntos y separadores de línea poco comunes. Los
+# fragmentos ilegales se usan con baja probabilidad para que la mayoría de las
+# entradas se tokenicen completas.
+FRAGMENTOS_LEXER = [
+    "x", "_y1", "def", "elif", "and", "True", "rb", "frb", "fr", "f", "Rb",
+    "0", "12", "3.14", "1.", "1.2.3", "007x",
+    "'a'", '"b"', "'esc\\'q'", '"\\\\"', "rb'c'", 'f"d"', "frb'e'", "'ñ é'",
+    "**", "==", "!=", "<=", ">=", "<", ">", "=", "+", "-", "*", "/", "%",
+    ":", ",", ".", "(", ")", "[", "]", "{", "}",
+    "# comentario", "#", " ", "  ", "\t",
+]
+FRAGMENTOS_ILEGALES = [
+    "!", "$", "?", "@", "`", "\\", "ñ", "\u00a0", "'sin cerrar", '"\\',
+    "\x0c", "\x0b", "\x85", "\u2028",
+]
+
+def generar_texto_lexer(num_lineas=20, semilla=0, prob_ilegal=0.002):
+    rnd = random.Random(semilla)
+    lineas = []
+    niveles = [0]
+    for _ in range(num_lineas):
+        eleccion = rnd.randrange(10)
+        if eleccion < 2:
+            niveles.append(niveles[-1] + rnd.choice([1, 2, 4]))
+        elif eleccion < 4 and len(niveles) > 1:
+            del niveles[rnd.randrange(1, len(niveles)):]
+        sangria = " " * niveles[-1]
+        if rnd.random() < prob_ilegal:
+            sangria += " "
+        if sangria.startswith("    ") and rnd.randrange(3) == 0:
+            sangria = "\t" + sangria[4:]
+        fragmentos = []
+        for _ in range(rnd.randrange(10)):
+            lista = FRAGMENTOS_ILEGALES if rnd.random() < prob_ilegal else FRAGMENTOS_LEXER
+            fragmentos.append(rnd.choice(lista) + rnd.choice(["", " ", " ", "  "]))
+        lineas.append(sangria + "".join(fragmentos) + rnd.choice(["\n", "\n", "\n", "\r\n", "\r", " \n", "\n\n", "\n \n"]))
+    return "".join(lineas)
+
+if __name__ == "__main__":
+    import sys
+    tamano = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    sys.stdout.write(generar_programa(tamano))
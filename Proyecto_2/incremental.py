@@ -0,0 +1,191 @@
+from lexer import ErrorLexer, tokenizar_linea, tokens_de_cierre
+import parser as Pmod
+from tabla_compilada import id_de_token
+import main as Mmod
+
+# Análisis incremental para editores: después de editar un rango de líneas solo se
+# vuelven a tokenizar las líneas afectadas y el análisis se reanuda desde la primera
+# línea editada, en lugar de repetir todo el archivo.
+#
+# Todo el estado se guarda por línea, con una entrada extra al final para los tokens
+# de cierre (DEDENT pendientes y EOF), que se tratan como una línea más. Al editar,
+# las listas se desplazan con una asignación de slice y las líneas que no cambian
+# conservan sus datos; los tokens guardados pueden tener un número de línea viejo, que
+# se corrige solo al armar un mensaje de error.
+#
+# Lexer: se retokeniza desde la primera línea editada hasta que, pasada la edición,
+# la pila de indentación coincide con la que tenía la misma línea antes de editar.
+#
+# Parser: se guarda la pila del parser al llegar a cada línea y las producciones
+# aplicadas mientras el token de anticipación está en ella. Pasada la zona
+# retokenizada, en cuanto la pila coincide con la guardada para la misma línea el
+# resto del análisis es idéntico al anterior y no se repite.
+
+SEPARADORES_LINEA = '\n\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029'
+
+def _tiene_separador(linea):
+    return bool(linea) and linea[-1] in SEPARADORES_LINEA
+
+class AnalizadorIncremental:
+    def __init__(self, fuente, tc):
+        self.tc = tc
+        fuente = fuente.replace('\r\n', '\n').replace('\r', '\n')
+        self.lineas = fuente.splitlines(True)
+        n = len(self.lineas)
+
+        self.pilas = [None] * (n + 1)       # pila de indentación antes de la línea
+        self.tokens = [None] * (n + 1)      # tokens de la línea
+        self.ids = [None] * (n + 1)         # ids de terminal de esos tokens
+        self.estados = [None] * (n + 1)     # pila del parser al llegar a la línea
+        self.segmentos = [None] * (n + 1)   # producciones aplicadas con la anticipación en la línea
+
+        self.lexado = 0             # líneas tokenizadas; con error_lexer, la línea del error
+        self.error_lexer = None
+        self.analizado = 0          # última línea con estado del parser válido
+        self.resultado_interno = None   # (True,), (False, linea, posicion, tope) o None si faltan tokens
+
+        convergencia = self._retokenizar(0, 0, -1, (0,))
+        self._reanalizar(0, (tc.id_eof, tc.id_inicial), convergencia, -1, None, 0)
+
+    @property
+    def fuente(self):
+        return "".join(self.lineas)
+
+    def editar(self, inicio, fin, texto):
+        # Reemplaza las líneas [inicio, fin) (base 0, como en un slice) por `texto`.
+        texto = texto.replace('\r\n', '\n').replace('\r', '\n')
+        # Solo la última línea puede quedar sin separador; si la edición la deja en medio,
+        # se une con la línea vecina para que self.lineas siga siendo fuente.splitlines(True).
+        if inicio > 0 and not _tiene_separador(self.lineas[inicio - 1]):
+            inicio -= 1
+            texto = self.lineas[inicio] + texto
+        if texto and not _tiene_separador(texto) and fin < len(self.lineas):
+            texto += self.lineas[fin]
+            fin += 1
+        nuevas = texto.splitlines(True)
+        delta = len(nuevas) - (fin - inicio)
+
+        if inicio > self.lexado:
+            # El error del lexer está antes de la edición y nada de lo analizado cambia.
+            self._reemplazar(inicio, fin, nuevas)
+            return
+
+        # Lo que vale del estado anterior, con los índices que tendrá después de editar.
+        pila = self.pilas[inicio]
+        limite_lexer = self.lexado + delta if self.lexado >= fin else -1
+        reanudar = min(inicio, self.analizado)
+        estado = self.estados[reanudar]
+        limite_parser = self.analizado + delta if self.analizado >= fin else -1
+        resultado_viejo = self.resultado_interno
+        if resultado_viejo is not None and not resultado_viejo[0] and resultado_viejo[1] < inicio:
+            # El error sintáctico está antes de la edición: no cambia.
+            reanudar = None
+
+        self._reemplazar(inicio, fin, nuevas)
+        convergencia = self._retokenizar(inicio, inicio + len(nuevas), limite_lexer, pila)
+        if reanudar is not None:
+            desde = max(inicio + len(nuevas), convergencia)
+            self._reanalizar(reanudar, estado, desde, limite_parser, resultado_viejo, delta)
+
+    def _reemplazar(self, inicio, fin, nuevas):
+        vacias = [None] * len(nuevas)
+        self.lineas[inicio:fin] = nuevas
+        for lista in (self.pilas, self.tokens, self.ids, self.estados, self.segmentos):
+            lista[inicio:fin] = vacias
+
+    def _retokenizar(self, inicio, fin_nuevas, limite, pila):
+        # Devuelve la primera línea desde la que se conservan los tokens anteriores,
+        # o len(self.lineas) + 1 si no hubo convergencia.
+        tc = self.tc
+        n = len(self.lineas)
+        pila = list(pila)
+        error_viejo = self.error_lexer
+        self.error_lexer = None
+        convergencia = n + 1
+
+        i = inicio
+        while i < n:
+            if fin_nuevas <= i <= limite and tuple(pila) == self.pilas[i]:
+                convergencia = i
+                if error_viejo is None:
+                    pila = list(self.pilas[n])
+                    i = n
+                    break
+                # Solo falta repetir el error, que ahora puede estar en otra línea.
+                i, limite = limite, -1
+                pila = list(self.pilas[i])
+            self.pilas[i] = tuple(pila)
+            linea = self.lineas[i]
+            try:
+                tokens = tokenizar_linea(linea, 0, len(linea), i + 1, pila)
+            except ErrorLexer as e:
+                self.error_lexer = e
+                break
+            self.tokens[i] = tokens
+            self.ids[i] = [id_de_token(t, tc) for t in tokens]
+            i += 1
+
+        self.lexado = i
+        if self.error_lexer is None:
+            self.pilas[n] = tuple(pila)
+            self.tokens[n] = tokens_de_cierre(pila, n)
+            self.ids[n] = [id_de_token(t, tc) for t in self.tokens[n]]
+        return convergencia
+
+    def _reanalizar(self, inicio, estado, desde, limite, resultado_viejo, delta):
+        tc = self.tc
+        n = len(self.lineas)
+        base = tc.num_terminales + 1
+        filas = tc.filas
+        matriz = tc.matriz
+        cuerpos = tc.cuerpos_invertidos
+
+        pila = list(estado)
+        i = inicio
+        while True:
+            instantanea = tuple(pila)
+            if desde <= i <= limite and instantanea == self.estados[i]:
+                # Misma pila y mismos tokens que antes desde esta línea: el resto es idéntico.
+                if resultado_viejo is not None and not resultado_viejo[0]:
+                    _, linea, posicion, tope = resultado_viejo
+                    resultado_viejo = (False, linea + delta, posicion, tope)
+                self.analizado, self.resultado_interno = limite, resultado_viejo
+                return
+            self.estados[i] = instantanea
+            if i == self.lexado and self.error_lexer is not None:
+                self.analizado, self.resultado_interno = i, None
+                return
+
+            segmento = self.segmentos[i] = []
+            for posicion, terminal in enumerate(self.ids[i]):
+                while True:
+                    tope = pila.pop()
+                    if tope < base:
+                        if tope != terminal:
+                            self.analizado, self.resultado_interno = i, (False, i, posicion, tope)
+                            return
+                        break
+                    p = matriz[filas[tope] + terminal]
+                    if p < 0:
+                        self.analizado, self.resultado_interno = i, (False, i, posicion, tope)
+                        return
+                    segmento.append(p)
+                    pila.extend(cuerpos[p])
+            if i == n:
+                self.analizado, self.resultado_interno = n, (True,)
+                return
+            i += 1
+
+    def resultado(self):
+        # Misma tupla (ok, mensaje, aplicadas) que main.analizar_fuente sobre self.fuente.
+        if self.error_lexer is not None:
+            return False, Mmod.formatear_error_lexer(self.error_lexer), []
+        if self.resultado_interno[0]:
+            producciones = self.tc.producciones
+            aplicadas = [producciones[p] for segmento in self.segmentos for p in segmento]
+            return True, Pmod.MENSAJE_EXITO, aplicadas
+        _, linea, posicion, tope = self.resultado_interno
+        token = self.tokens[linea][posicion]
+        if linea < len(self.lineas):
+            token = token._replace(linea=linea + 1)
+        return False, Pmod.formatear_error_token(token, self.tc.esperados[tope]), []
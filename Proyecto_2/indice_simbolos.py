@@ -0,0 +1,370 @@
+import argparse
+import hashlib
+import multiprocessing
+import os
+import pickle
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from itertools import compress
+from operator import itemgetter, not_
+import main as Mmod
+import parser as Pmod
+from lexer import tokenizar_compacto, ErrorLexer
+
+# Índice de símbolos de un conjunto de archivos, armado durante el análisis: el parser
+# (analizar_buffer con un observador) avisa cada vez que aplica una de las producciones
+# de _REGLAS y el índice guarda el nombre y la posición del token correspondiente:
+#  - definición: def_funcion → KEYWORD_def ID ...
+#  - parámetro: param → ID ...
+#  - llamada: cola_termino → LPAR ... (el nombre es el ID anterior)
+#  - asignación: cola_sentencia_pequena → ASSIGN expr (el ID anterior) y la variable
+#    de sentencia_for.
+# Los archivos con errores léxicos o sintácticos quedan registrados sin símbolos.
+#
+# En memoria y en disco el índice son arreglos paralelos ordenados por (nombre,
+# archivo, línea, columna, tipo), con los nombres y los archivos como ids en dos
+# tablas. Buscar un nombre es un dict a su id y dos bisect. Los ids de nombre y de
+# archivo nunca cambian mientras el índice está cargado (un archivo quitado deja un
+# hueco) y guardar() compacta las tablas con una renumeración creciente, que no
+# altera el orden de las entradas.
+#
+# actualizar() vuelve a analizar solo los archivos nuevos o cuyo contenido cambió
+# (primero compara tamaño y fecha de modificación, después el SHA-256). Las entradas de
+# esos archivos se quitan y las nuevas, ya ordenadas, se mezclan con las que quedan.
+#
+# Archivo: MAGIA_INDICE, versión (2 bytes), huella de la gramática (32 bytes,
+# cache_tabla.huella_gramatica) y un pickle con las tablas y los arreglos. Se escribe
+# en un temporal y se reemplaza con os.replace.
+MAGIA_INDICE = b"LL1S"
+VERSION_INDICE = 1
+NOMBRE_INDICE = "indice_simbolos.idx"
+
+DEFINICION, PARAMETRO, LLAMADA, ASIGNACION = range(4)
+NOMBRES_TIPO = ["definicion", "parametro", "llamada", "asignacion"]
+
+# (no terminal, comienzo del cuerpo, tipo, posición del nombre respecto del token de
+# anticipación al aplicar la producción).
+_REGLAS = [
+    ("def_funcion", ("KEYWORD_def", "ID"), DEFINICION, 1),
+    ("param", ("ID",), PARAMETRO, 0),
+    ("cola_termino", ("LPAR",), LLAMADA, -1),
+    ("cola_sentencia_pequena", ("ASSIGN",), ASIGNACION, -1),
+    ("sentencia_for", ("KEYWORD_for", "ID"), ASIGNACION, 1),
+]
+
+Simbolo = namedtuple("Simbolo", ["nombre", "tipo", "linea", "col"])
+Ubicacion = namedtuple("Ubicacion", ["archivo", "tipo", "linea", "col"])
+ArchivoIndexado = namedtuple("ArchivoIndexado", ["ruta", "tamano", "mtime_ns", "huella", "ok", "mensaje"])
+# Símbolos de un archivo en columnas, como los devuelve simbolos_de_archivo.
+ResultadoArchivo = namedtuple("ResultadoArchivo", ["archivo", "nombres", "tipos", "lineas", "cols"])
+
+class ErrorIndice(Exception):
+    pass
+
+_tabla_trabajador = None
+
+def observador_simbolos(tc):
+    # (observador para parser.analizar_buffer, tipos, posiciones): cada producción de
+    # _REGLAS que se aplica agrega su tipo y el índice en el buffer del token del nombre.
+    tipos = bytearray()
+    posiciones = array('I')
+    def aviso_para(tipo, desplazamiento):
+        def aviso(cursor):
+            tipos.append(tipo)
+            posiciones.append(cursor + desplazamiento)
+        return aviso
+    observador = {}
+    for p, (A, prod) in enumerate(tc.producciones):
+        for no_terminal, comienzo, tipo, desplazamiento in _REGLAS:
+            if A == no_terminal and tuple(prod[:len(comienzo)]) == comienzo:
+                observador[p] = aviso_para(tipo, desplazamiento)
+    return observador, tipos, posiciones
+
+def simbolos_de_fuente(fuente, tc):
+    # (ok, mensaje, [Simbolo]) en el orden del programa; sin símbolos si hay errores.
+    try:
+        buffer = tokenizar_compacto(fuente)
+    except ErrorLexer as e:
+        return False, Mmod.formatear_error_lexer(e), []
+    observador, tipos, posiciones = observador_simbolos(tc)
+    ok, mensaje, _ = Mmod.normalizar_resultado(Pmod.analizar_buffer(buffer, tc, "ninguna", observador))
+    if not ok:
+        return False, mensaje, []
+    texto, inicios, fines, lineas, cols = buffer.fuente, buffer.inicios, buffer.fines, buffer.lineas, buffer.cols
+    return True, mensaje, [Simbolo(texto[inicios[i]:fines[i]], tipo, lineas[i], cols[i]) for tipo, i in zip(tipos, posiciones)]
+
+def simbolos_de_archivo(ruta, tc):
+    try:
+        estado = os.stat(ruta)
+        with open(ruta, "rb") as f:
+            datos = f.read()
+        fuente = datos.decode("utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        archivo = ArchivoIndexado(ruta, -1, -1, b"", False, f"Error leyendo archivo {ruta}: {e}")
+        return ResultadoArchivo(archivo, [], b"", array('I'), array('I'))
+    ok, mensaje, simbolos = simbolos_de_fuente(fuente, tc)
+    archivo = ArchivoIndexado(ruta, estado.st_size, estado.st_mtime_ns, hashlib.sha256(datos).digest(), ok, mensaje)
+    return ResultadoArchivo(archivo, [s.nombre for s in simbolos], bytes(s.tipo for s in simbolos),
+                            array('I', [s.linea for s in simbolos]), array('I', [s.col for s in simbolos]))
+
+def _inicializar_trabajador(tabla_serializada):
+    global _tabla_trabajador
+    _tabla_trabajador = pickle.loads(tabla_serializada)
+
+def _simbolos_en_trabajador(ruta):
+    return simbolos_de_archivo(ruta, _tabla_trabajador)
+
+class IndiceSimbolos:
+    def __init__(self, huella):
+        self.huella = huella
+        self.archivos = []
+        self.id_archivo = {}
+        self.nombres = []
+        self.id_nombre = {}
+        self.e_nombres = array('I')
+        self.e_archivos = array('I')
+        self.e_lineas = array('I')
+        self.e_cols = array('I')
+        self.e_tipos = bytearray()
+
+    def __len__(self):
+        return len(self.e_nombres)
+
+    def rutas(self):
+        return list(self.id_archivo)
+
+    def archivo(self, ruta):
+        i = self.id_archivo.get(ruta)
+        return None if i is None else self.archivos[i]
+
+    def buscar(self, nombre, tipo=None):
+        # [Ubicacion] de `nombre` (de un tipo o de todos), por archivo, línea y columna.
+        i = self.id_nombre.get(nombre)
+        if i is None:
+            return []
+        desde = bisect_left(self.e_nombres, i)
+        hasta = bisect_right(self.e_nombres, i, desde)
+        archivos, lineas, cols, tipos = self.archivos, self.e_lineas, self.e_cols, self.e_tipos
+        return [Ubicacion(archivos[self.e_archivos[k]].ruta, tipos[k], lineas[k], cols[k])
+                for k in range(desde, hasta) if tipo is None or tipos[k] == tipo]
+
+    def definiciones(self, nombre):
+        return self.buscar(nombre, DEFINICION)
+
+    def actualizar(self, rutas, tc, trabajadores=1):
+        # Analiza los archivos de `rutas` que no están en el índice o que cambiaron.
+        # Devuelve la cantidad de archivos analizados.
+        pendientes = []
+        for ruta in rutas:
+            previo = self.archivo(ruta)
+            if previo is not None:
+                try:
+                    estado = os.stat(ruta)
+                except OSError:
+                    estado = None
+                if estado is not None and (estado.st_size, estado.st_mtime_ns) == (previo.tamano, previo.mtime_ns):
+                    continue
+                if estado is not None and previo.huella and estado.st_size == previo.tamano:
+                    try:
+                        with open(ruta, "rb") as f:
+                            igual = hashlib.sha256(f.read()).digest() == previo.huella
+                    except OSError:
+                        igual = False
+                    if igual:
+                        self.archivos[self.id_archivo[ruta]] = previo._replace(mtime_ns=estado.st_mtime_ns)
+                        continue
+            pendientes.append(ruta)
+        if not pendientes:
+            return 0
+        if trabajadores > 1 and len(pendientes) > 1:
+            tabla_serializada = pickle.dumps(tc, protocol=pickle.HIGHEST_PROTOCOL)
+            with multiprocessing.Pool(trabajadores, initializer=_inicializar_trabajador, initargs=(tabla_serializada,)) as pool:
+                resultados = pool.map(_simbolos_en_trabajador, pendientes, chunksize=max(1, len(pendientes) // (trabajadores * 8)))
+        else:
+            resultados = [simbolos_de_archivo(ruta, tc) for ruta in pendientes]
+        self.reemplazar(resultados)
+        return len(pendientes)
+
+    def reemplazar(self, resultados):
+        # Reemplaza (o agrega) los símbolos de los archivos de `resultados` (ResultadoArchivo).
+        cambiados = set()
+        nuevas = []
+        for resultado in resultados:
+            ruta = resultado.archivo.ruta
+            a = self.id_archivo.get(ruta)
+            if a is None:
+                a = self.id_archivo[ruta] = len(self.archivos)
+                self.archivos.append(resultado.archivo)
+            else:
+                cambiados.add(a)
+                self.archivos[a] = resultado.archivo
+            id_nombre = self.id_nombre
+            ids = []
+            for nombre in resultado.nombres:
+                n = id_nombre.get(nombre)
+                if n is None:
+                    n = id_nombre[nombre] = len(self.nombres)
+                    self.nombres.append(nombre)
+                ids.append(n)
+            nuevas.extend(zip(ids, [a] * len(ids), resultado.lineas, resultado.cols, resultado.tipos))
+        self._quitar_entradas(cambiados)
+        if nuevas:
+            nuevas.sort()
+            # Dos tramos ya ordenados: sorted los mezcla en tiempo lineal.
+            filas = sorted([*zip(self.e_nombres, self.e_archivos, self.e_lineas, self.e_cols, self.e_tipos), *nuevas])
+            self._poner_filas(filas)
+
+    def quitar(self, rutas):
+        quitados = set()
+        for ruta in rutas:
+            a = self.id_archivo.pop(ruta, None)
+            if a is not None:
+                self.archivos[a] = None
+                quitados.add(a)
+        self._quitar_entradas(quitados)
+        return len(quitados)
+
+    def _quitar_entradas(self, ids_archivo):
+        if not ids_archivo or not len(self.e_archivos):
+            return
+        conservar = list(map(not_, map(ids_archivo.__contains__, self.e_archivos)))
+        self.e_nombres = array('I', compress(self.e_nombres, conservar))
+        self.e_archivos = array('I', compress(self.e_archivos, conservar))
+        self.e_lineas = array('I', compress(self.e_lineas, conservar))
+        self.e_cols = array('I', compress(self.e_cols, conservar))
+        self.e_tipos = bytearray(compress(self.e_tipos, conservar))
+
+    def _poner_filas(self, filas):
+        self.e_nombres = array('I', map(itemgetter(0), filas))
+        self.e_archivos = array('I', map(itemgetter(1), filas))
+        self.e_lineas = array('I', map(itemgetter(2), filas))
+        self.e_cols = array('I', map(itemgetter(3), filas))
+        self.e_tipos = bytearray(map(itemgetter(4), filas))
+
+    def compactar(self):
+        # Quita los archivos quitados y los nombres sin entradas, renumerando en orden
+        # creciente para que las entradas sigan ordenadas.
+        nuevos_archivos = array('I', bytes(4 * len(self.archivos)))
+        archivos = []
+        for a, archivo in enumerate(self.archivos):
+            if archivo is not None:
+                nuevos_archivos[a] = len(archivos)
+                archivos.append(archivo)
+        usados = set(self.e_nombres)
+        nuevos_nombres = array('I', bytes(4 * len(self.nombres)))
+        nombres = []
+        for n, nombre in enumerate(self.nombres):
+            if n in usados:
+                nuevos_nombres[n] = len(nombres)
+                nombres.append(nombre)
+        self.e_archivos = array('I', map(nuevos_archivos.__getitem__, self.e_archivos))
+        self.e_nombres = array('I', map(nuevos_nombres.__getitem__, self.e_nombres))
+        self.archivos, self.nombres = archivos, nombres
+        self.id_archivo = {archivo.ruta: a for a, archivo in enumerate(archivos)}
+        self.id_nombre = {nombre: n for n, nombre in enumerate(nombres)}
+
+    def serializar(self):
+        self.compactar()
+        campos = {
+            "archivos": [tuple(a) for a in self.archivos], "nombres": self.nombres,
+            "e_nombres": self.e_nombres, "e_archivos": self.e_archivos, "e_lineas": self.e_lineas,
+            "e_cols": self.e_cols, "e_tipos": bytes(self.e_tipos),
+        }
+        return MAGIA_INDICE + VERSION_INDICE.to_bytes(2, "little") + self.huella + pickle.dumps(campos, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def guardar(self, ruta):
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        try:
+            with open(temporal, "wb") as f:
+                f.write(self.serializar())
+            os.replace(temporal, ruta)
+        except OSError:
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+            raise
+
+def deserializar(datos):
+    cabecera = len(MAGIA_INDICE) + 2
+    if not datos.startswith(MAGIA_INDICE) or len(datos) < cabecera + 32:
+        raise ErrorIndice("no es un índice de símbolos")
+    version = int.from_bytes(datos[len(MAGIA_INDICE):cabecera], "little")
+    if version != VERSION_INDICE:
+        raise ErrorIndice(f"versión de índice {version} no soportada")
+    try:
+        campos = pickle.loads(datos[cabecera + 32:])
+    except Exception as e:
+        raise ErrorIndice(f"el índice está dañado: {e}")
+    indice = IndiceSimbolos(datos[cabecera:cabecera + 32])
+    indice.archivos = [ArchivoIndexado(*a) for a in campos["archivos"]]
+    indice.nombres = campos["nombres"]
+    indice.id_archivo = {archivo.ruta: a for a, archivo in enumerate(indice.archivos)}
+    indice.id_nombre = {nombre: n for n, nombre in enumerate(indice.nombres)}
+    indice.e_nombres = campos["e_nombres"]
+    indice.e_archivos = campos["e_archivos"]
+    indice.e_lineas = campos["e_lineas"]
+    indice.e_cols = campos["e_cols"]
+    indice.e_tipos = bytearray(campos["e_tipos"])
+    return indice
+
+def cargar(ruta):
+    with open(ruta, "rb") as f:
+        return deserializar(f.read())
+
+def cargar_o_crear(ruta, huella):
+    # El índice de `ruta`, o uno vacío si no existe o se armó con otra gramática.
+    try:
+        indice = cargar(ruta)
+    except (OSError, ErrorIndice):
+        return IndiceSimbolos(huella)
+    return indice if indice.huella == huella else IndiceSimbolos(huella)
+
+def principal(argv=None):
+    import lote as Lmod
+    analizador = argparse.ArgumentParser(description="Índice de definiciones, parámetros, llamadas y asignaciones de un conjunto de archivos.")
+    analizador.add_argument("--indice", default=NOMBRE_INDICE, help="archivo del índice (por defecto: %(default)s)")
+    sub = analizador.add_subparsers(dest="comando", required=True)
+    p = sub.add_parser("actualizar", help="agrega o vuelve a analizar los archivos nuevos o modificados")
+    p.add_argument("entradas", nargs="+", help="archivos, directorios o patrones glob")
+    p.add_argument("--patron", default="*.py", help="patrón de nombre para los archivos dentro de directorios (por defecto: %(default)s)")
+    p.add_argument("-j", "--trabajadores", type=int, default=1, help="procesos para analizar (por defecto: %(default)s)")
+    p = sub.add_parser("buscar", help="ubicaciones de un nombre")
+    p.add_argument("nombre")
+    p.add_argument("--tipo", choices=NOMBRES_TIPO, default=None)
+    sub.add_parser("inspeccionar", help="cantidad de archivos, nombres y entradas")
+    args = analizador.parse_args(argv)
+
+    if args.comando == "actualizar":
+        artefacto = Mmod.cargar_tabla()
+        indice = cargar_o_crear(args.indice, artefacto.huella)
+        rutas = Lmod.expandir_entradas(args.entradas, args.patron)
+        # Los archivos del índice que ya no existen se quitan.
+        quitados = indice.quitar([r for r in indice.rutas() if not os.path.exists(r)])
+        analizados = indice.actualizar(rutas, artefacto.compilada, args.trabajadores)
+        indice.guardar(args.indice)
+        con_error = sum(1 for a in indice.archivos if not a.ok)
+        print(f"{args.indice}: {analizados} analizados, {quitados} quitados, {len(indice.archivos)} archivos "
+              f"({con_error} con errores), {len(indice)} entradas")
+        return 0
+    try:
+        indice = cargar(args.indice)
+    except (OSError, ErrorIndice) as e:
+        print(f"Error leyendo el índice: {e}", file=sys.stderr)
+        return 1
+    if args.comando == "buscar":
+        tipo = None if args.tipo is None else NOMBRES_TIPO.index(args.tipo)
+        ubicaciones = indice.buscar(args.nombre, tipo)
+        for u in ubicaciones:
+            print(f"{u.archivo}:{u.linea}:{u.col}: {NOMBRES_TIPO[u.tipo]}")
+        return 0 if ubicaciones else 1
+    print(f"Archivos: {len(indice.archivos)} ({sum(1 for a in indice.archivos if not a.ok)} con errores)")
+    print(f"Nombres: {len(indice.nombres)}  Entradas: {len(indice)}")
+    for tipo, nombre in enumerate(NOMBRES_TIPO):
+        print(f"  {nombre}: {indice.e_tipos.count(tipo)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -1,234 +1,696 @@
-from collections import namedtuple
-import string
-
-Token = namedtuple("Token", ["tipo", "lexema", "linea", "col"])
-
-class ErrorLexer(Exception):
-    pass
-
-PALABRAS_CLAVE = {
-    "def", "if", "else", "elif", "while", "for",
-    "return", "pass", "break", "continue", "in",
-    "and", "or", "not", "True", "False", "None"
-}
-
-TOKENS_MULTICARACTER = {
-    "OP": ["**", "+", "-", "*", "/", "%"],
-    "CMP": ["==", "!=", "<=", ">="],
-    "ASSIGN": ["="],
-    "SINGLE": [
-        "!", "<", ">", ":", ",", ".", "(", ")", "[", "]", "{", "}"
-    ]
-}
-
-MAPEO_CARACTER_UNICO = {
-    ":": "COLON", ",": "COMMA", ".": "DOT", "(": "LPAR", ")": "RPAR",
-    "[": "LBRACK", "]": "RBRACK", "{": "LBRACE", "}": "RBRACE",
-    "<": "CMP", ">": "CMP", "!": "CMP",
-    "+": "OP", "-": "OP", "*": "OP", "/": "OP", "%": "OP",
-    "=": "ASSIGN"
-}
-
-CARACTERES_INICIO_ID = string.ascii_letters + "_"
-CARACTERES_CONTINUACION_ID = string.ascii_letters + string.digits + "_"
-
-def _coincidir_identificador_o_palabra_clave(texto):
-    if not texto or texto[0] not in CARACTERES_INICIO_ID:
-        return None, 0
-
-    longitud = 1
-    while longitud < len(texto) and texto[longitud] in CARACTERES_CONTINUACION_ID:
-        longitud += 1
-
-    lexema = texto[:longitud]
-    tipo = "KEYWORD" if lexema in PALABRAS_CLAVE else "ID"
-    return tipo, lexema
-
-def _coincidir_numero(texto):
-    if not texto or texto[0] not in string.digits:
-        return None, 0
-
-    tiene_punto = False
-    longitud = 0
-    while longitud < len(texto) and texto[longitud] in string.digits:
-        longitud += 1
-
-    if longitud < len(texto) and texto[longitud] == '.':
-        if longitud + 1 < len(texto) and texto[longitud + 1] in string.digits:
-            tiene_punto = True
-            longitud += 1
-            while longitud < len(texto) and texto[longitud] in string.digits:
-                longitud += 1
-        elif longitud + 1 == len(texto) or texto[longitud+1] not in CARACTERES_CONTINUACION_ID:
-             pass
-        else:
-             pass
-
-    if tiene_punto:
-        return "FLOAT", texto[:longitud]
-    else:
-        return "INT", texto[:longitud]
-
-def _coincidir_cadena(texto):
-    if not texto:
-        return None, 0
-
-    # Soportar prefijos comunes de cadenas como f"...", r'...', b"...", fr"..." etc.
-    prefijo_len = 0
-    # limitar prefijo a máximo 2 caracteres para evitar reconocer identificadores largos
-    while prefijo_len < 2 and prefijo_len < len(texto) and texto[prefijo_len] in 'frbFRB':
-        prefijo_len += 1
-
-    if prefijo_len > 0 and prefijo_len < len(texto) and texto[prefijo_len] in ('\'', '"'):
-        inicio_comilla = prefijo_len
-    elif texto[0] in ('\'', '"'):
-        inicio_comilla = 0
-    else:
-        return None, 0
-
-    caracter_comilla = texto[inicio_comilla]
-    longitud = inicio_comilla + 1
-    escapado = False
-
-    while longitud < len(texto):
-        caracter = texto[longitud]
-        if escapado:
-            escapado = False
-        elif caracter == '\\':
-            escapado = True
-        elif caracter == caracter_comilla:
-            # devolver el lexema incluyendo el posible prefijo
-            return "STRING", texto[:longitud + 1]
-        longitud += 1
-
-    return None, 0
-
-def _coincidir_simbolo(texto):
-    if not texto:
-        return None, 0
-
-    todos_tokens_multicaracter = sorted([
-        ('**', 'OP'), ('==', 'CMP'), ('!=', 'CMP'), ('<=', 'CMP'), ('>=', 'CMP'), 
-        ('+', 'OP'), ('-', 'OP'), ('*', 'OP'), ('/', 'OP'), ('%', 'OP'),
-        ('=', 'ASSIGN'), ('<', 'CMP'), ('>', 'CMP'),
-        (':', 'COLON'), (',', 'COMMA'), ('.', 'DOT'),
-        ('(', 'LPAR'), (')', 'RPAR'), ('[', 'LBRACK'), (']', 'RBRACK'),
-        ('{', 'LBRACE'), ('}', 'RBRACE')
-    ], key=lambda x: len(x[0]), reverse=True)
-
-    for lexema_prueba, tipo_prueba in todos_tokens_multicaracter:
-        if texto.startswith(lexema_prueba):
-            return tipo_prueba, lexema_prueba
-
-    return None, 0
-
-
-def _obtener_siguiente_token(linea_texto, pos):
-    inicio_pos = pos
-    while inicio_pos < len(linea_texto) and linea_texto[inicio_pos] in ' \t':
-        inicio_pos += 1
-
-    if inicio_pos == len(linea_texto):
-        return None, None, inicio_pos
-
-    texto_actual = linea_texto[inicio_pos:]
-
-    tipo, lexema = _coincidir_cadena(texto_actual)
-    if tipo:
-        return tipo, lexema, inicio_pos + len(lexema)
-
-    if texto_actual.startswith('#'):
-        return "COMMENT", texto_actual, len(linea_texto)
-
-    tipo, lexema = _coincidir_identificador_o_palabra_clave(texto_actual)
-    if tipo:
-        return tipo, lexema, inicio_pos + len(lexema)
-
-    tipo, lexema = _coincidir_numero(texto_actual)
-    if tipo:
-        return tipo, lexema, inicio_pos + len(lexema)
-
-    tipo, lexema = _coincidir_simbolo(texto_actual)
-    if tipo:
-        return tipo, lexema, inicio_pos + len(lexema)
-
-    return "MISMATCH", texto_actual[0], inicio_pos + 1
-
-
-def tokenizar(fuente):
-    fuente = fuente.replace('\r\n', '\n').replace('\r', '\n')
-    tokens = []
-    pila_indentacion = [0]
-    lineas = fuente.splitlines(True)
-    num_linea = 0
-
-    for linea_cruda in lineas:
-        num_linea += 1
-        # Ignorar líneas en blanco (no producen tokens). Esto evita NEWLINE extras
-        # que rompan el análisis sintáctico en lugares vacíos.
-        if linea_cruda.strip() == "":
-            continue
-
-        espacios_inicio = 0
-        col = 1
-        for ch in linea_cruda:
-            if ch == " ":
-                espacios_inicio += 1
-                col += 1
-            elif ch == "\t":
-                espacios_inicio += 4
-                col += 1
-            else:
-                break
-        
-        texto_linea_tras_indentacion = linea_cruda[col - 1:]
-        
-        if espacios_inicio > pila_indentacion[-1]:
-            pila_indentacion.append(espacios_inicio)
-            tokens.append(Token("INDENT", "<INDENT>", num_linea, 1))
-        else:
-            while espacios_inicio < pila_indentacion[-1]:
-                pila_indentacion.pop()
-                tokens.append(Token("DEDENT", "<DEDENT>", num_linea, col))
-            if espacios_inicio != pila_indentacion[-1]:
-                raise ErrorLexer(f"Error de sangría en línea {num_linea}. Nivel actual: {espacios_inicio}, Esperado: {pila_indentacion[-1]}")
-        # Si después del indent/dedent la línea comienza con comentario, no debemos generar
-        # un token NEWLINE adicional: las líneas de comentario se ignoran (pero conservamos
-        # los tokens INDENT/DEDENT que se hayan emitido anteriormente).
-        if texto_linea_tras_indentacion.lstrip().startswith("#"):
-            # simplemente omitir la línea de comentario
-            continue
-        
-        pos = col - 1
-        texto_linea = linea_cruda.rstrip("\n")
-
-        while pos < len(texto_linea):
-            tipo, lexema, siguiente_pos = _obtener_siguiente_token(texto_linea, pos)
-            
-            if pos < siguiente_pos and all(c in ' \t' for c in texto_linea[pos:siguiente_pos]):
-                pos = siguiente_pos
-                continue
-
-            if tipo is None:
-                break
-            
-            col_token = pos + 1
-
-            if tipo == "COMMENT":
-                pos = len(texto_linea)
-                continue
-            elif tipo == "MISMATCH":
-                 raise ErrorLexer(f"Carácter ilegal {lexema!r} en línea {num_linea} col {col_token}")
-            else:
-                tokens.append(Token(tipo, lexema, num_linea, col_token))
-            
-            pos = siguiente_pos
-
-        tokens.append(Token("NEWLINE", "\\n", num_linea, len(texto_linea) + 1))
-
-    while len(pila_indentacion) > 1:
-        pila_indentacion.pop()
-        tokens.append(Token("DEDENT", "<DEDENT>", num_linea + 1, 1))
-
-    tokens.append(Token("EOF", "<EOF>", num_linea + 1, 1))
-    return tokens
\ No newline at end of file
+from collections import namedtuple
+from array import array
+import mmap
+import re
+import string
+import sys
+
+Token = namedtuple("Token", ["tipo", "lexema", "linea", "col"])
+
+class ErrorLexer(Exception):
+    pass
+
+PALABRAS_CLAVE = {
+    "def", "if", "else", "elif", "while", "for",
+    "return", "pass", "break", "continue", "in",
+    "and", "or", "not", "True", "False", "None"
+}
+
+TOKENS_MULTICARACTER = {
+    "OP": ["**", "+", "-", "*", "/", "%"],
+    "CMP": ["==", "!=", "<=", ">="],
+    "ASSIGN": ["="],
+    "SINGLE": [
+        "!", "<", ">", ":", ",", ".", "(", ")", "[", "]", "{", "}"
+    ]
+}
+
+MAPEO_CARACTER_UNICO = {
+    ":": "COLON", ",": "COMMA", ".": "DOT", "(": "LPAR", ")": "RPAR",
+    "[": "LBRACK", "]": "RBRACK", "{": "LBRACE", "}": "RBRACE",
+    "<": "CMP", ">": "CMP", "!": "CMP",
+    "+": "OP", "-": "OP", "*": "OP", "/": "OP", "%": "OP",
+    "=": "ASSIGN"
+}
+
+CARACTERES_INICIO_ID = string.ascii_letters + "_"
+CARACTERES_CONTINUACION_ID = string.ascii_letters + string.digits + "_"
+
+# Clases de carácter del motor clásico: tabla de 256 entradas indexada por el código
+# del carácter; los caracteres fuera de Latin-1 no tienen clase. La clase del primer
+# carácter decide qué _coincidir_* probar. Los ciclos que consumen el resto de un
+# identificador o número usan conjuntos derivados de la misma tabla: en CPython un
+# `in` sobre un frozenset es más barato que ord() e indexar la tabla por carácter.
+CLASE_INICIO_ID = 1
+CLASE_CONTINUACION_ID = 2
+CLASE_DIGITO = 4
+CLASE_INICIO_CADENA = 8
+
+def _tabla_clases():
+    tabla = bytearray(256)
+    for clase, caracteres in ((CLASE_INICIO_ID, CARACTERES_INICIO_ID),
+                              (CLASE_CONTINUACION_ID, CARACTERES_CONTINUACION_ID),
+                              (CLASE_DIGITO, string.digits),
+                              (CLASE_INICIO_CADENA, "'\"frbFRB")):
+        for c in caracteres:
+            tabla[ord(c)] |= clase
+    return bytes(tabla)
+
+CLASE_CARACTER = _tabla_clases()
+_CONTINUACION_ID = frozenset(chr(i) for i in range(256) if CLASE_CARACTER[i] & CLASE_CONTINUACION_ID)
+_DIGITOS = frozenset(chr(i) for i in range(256) if CLASE_CARACTER[i] & CLASE_DIGITO)
+
+def clase_caracter(c):
+    return CLASE_CARACTER[ord(c)] if c <= '\xff' else 0
+
+# Los lexemas de identificadores y palabras clave se internan (sys.intern): los nombres
+# repetidos comparten una sola cadena en todas las listas de tokens y se comparan por
+# identidad al buscarlos en diccionarios.
+_internar = sys.intern
+
+def _coincidir_identificador_o_palabra_clave(texto):
+    if not texto or not clase_caracter(texto[0]) & CLASE_INICIO_ID:
+        return None, 0
+
+    total = len(texto)
+    longitud = 1
+    while longitud < total and texto[longitud] in _CONTINUACION_ID:
+        longitud += 1
+
+    lexema = _internar(texto[:longitud])
+    tipo = "KEYWORD" if lexema in PALABRAS_CLAVE else "ID"
+    return tipo, lexema
+
+def _coincidir_numero(texto):
+    if not texto or not clase_caracter(texto[0]) & CLASE_DIGITO:
+        return None, 0
+
+    total = len(texto)
+    longitud = 1
+    while longitud < total and texto[longitud] in _DIGITOS:
+        longitud += 1
+
+    # Un punto solo forma parte del número si lo sigue otro dígito.
+    if longitud + 1 < total and texto[longitud] == '.' and texto[longitud + 1] in _DIGITOS:
+        longitud += 2
+        while longitud < total and texto[longitud] in _DIGITOS:
+            longitud += 1
+        return "FLOAT", texto[:longitud]
+    return "INT", texto[:longitud]
+
+def _coincidir_cadena(texto):
+    if not texto:
+        return None, 0
+
+    # Soportar prefijos comunes de cadenas como f"...", r'...', b"...", fr"..." etc.
+    prefijo_len = 0
+    # limitar prefijo a máximo 2 caracteres para evitar reconocer identificadores largos
+    while prefijo_len < 2 and prefijo_len < len(texto) and texto[prefijo_len] in 'frbFRB':
+        prefijo_len += 1
+
+    if prefijo_len > 0 and prefijo_len < len(texto) and texto[prefijo_len] in ('\'', '"'):
+        inicio_comilla = prefijo_len
+    elif texto[0] in ('\'', '"'):
+        inicio_comilla = 0
+    else:
+        return None, 0
+
+    caracter_comilla = texto[inicio_comilla]
+    longitud = inicio_comilla + 1
+    escapado = False
+
+    while longitud < len(texto):
+        caracter = texto[longitud]
+        if escapado:
+            escapado = False
+        elif caracter == '\\':
+            escapado = True
+        elif caracter == caracter_comilla:
+            # devolver el lexema incluyendo el posible prefijo
+            return "STRING", texto[:longitud + 1]
+        longitud += 1
+
+    return None, 0
+
+SIMBOLOS_ORDENADOS = sorted([
+    ('**', 'OP'), ('==', 'CMP'), ('!=', 'CMP'), ('<=', 'CMP'), ('>=', 'CMP'), 
+    ('+', 'OP'), ('-', 'OP'), ('*', 'OP'), ('/', 'OP'), ('%', 'OP'),
+    ('=', 'ASSIGN'), ('<', 'CMP'), ('>', 'CMP'),
+    (':', 'COLON'), (',', 'COMMA'), ('.', 'DOT'),
+    ('(', 'LPAR'), (')', 'RPAR'), ('[', 'LBRACK'), (']', 'RBRACK'),
+    ('{', 'LBRACE'), ('}', 'RBRACE')
+], key=lambda x: len(x[0]), reverse=True)
+
+def _coincidir_simbolo(texto):
+    if not texto:
+        return None, 0
+
+    for lexema_prueba, tipo_prueba in SIMBOLOS_ORDENADOS:
+        if texto.startswith(lexema_prueba):
+            return tipo_prueba, lexema_prueba
+
+    return None, 0
+
+
+def _obtener_siguiente_token(linea_texto, pos):
+    inicio_pos = pos
+    while inicio_pos < len(linea_texto) and linea_texto[inicio_pos] in ' \t':
+        inicio_pos += 1
+
+    if inicio_pos == len(linea_texto):
+        return None, None, inicio_pos
+
+    texto_actual = linea_texto[inicio_pos:]
+    clase = clase_caracter(texto_actual[0])
+
+    if clase & CLASE_INICIO_CADENA:
+        tipo, lexema = _coincidir_cadena(texto_actual)
+        if tipo:
+            return tipo, lexema, inicio_pos + len(lexema)
+
+    if texto_actual[0] == '#':
+        return "COMMENT", texto_actual, len(linea_texto)
+
+    if clase & CLASE_INICIO_ID:
+        tipo, lexema = _coincidir_identificador_o_palabra_clave(texto_actual)
+        return tipo, lexema, inicio_pos + len(lexema)
+
+    if clase & CLASE_DIGITO:
+        tipo, lexema = _coincidir_numero(texto_actual)
+        return tipo, lexema, inicio_pos + len(lexema)
+
+    tipo, lexema = _coincidir_simbolo(texto_actual)
+    if tipo:
+        return tipo, lexema, inicio_pos + len(lexema)
+
+    return "MISMATCH", texto_actual[0], inicio_pos + 1
+
+
+def _tokenizar_clasico(fuente):
+    fuente = fuente.replace('\r\n', '\n').replace('\r', '\n')
+    tokens = []
+    pila_indentacion = [0]
+    lineas = fuente.splitlines(True)
+    num_linea = 0
+
+    for linea_cruda in lineas:
+        num_linea += 1
+        # Ignorar líneas en blanco (no producen tokens). Esto evita NEWLINE extras
+        # que rompan el análisis sintáctico en lugares vacíos.
+        if linea_cruda.strip() == "":
+            continue
+
+        espacios_inicio = 0
+        col = 1
+        for ch in linea_cruda:
+            if ch == " ":
+                espacios_inicio += 1
+                col += 1
+            elif ch == "\t":
+                espacios_inicio += 4
+                col += 1
+            else:
+                break
+        
+        texto_linea_tras_indentacion = linea_cruda[col - 1:]
+        
+        if espacios_inicio > pila_indentacion[-1]:
+            pila_indentacion.append(espacios_inicio)
+            tokens.append(Token("INDENT", "<INDENT>", num_linea, 1))
+        else:
+            while espacios_inicio < pila_indentacion[-1]:
+                pila_indentacion.pop()
+                tokens.append(Token("DEDENT", "<DEDENT>", num_linea, col))
+            if espacios_inicio != pila_indentacion[-1]:
+                raise ErrorLexer(f"Error de sangría en línea {num_linea}. Nivel actual: {espacios_inicio}, Esperado: {pila_indentacion[-1]}")
+        # Si después del indent/dedent la línea comienza con comentario, no debemos generar
+        # un token NEWLINE adicional: las líneas de comentario se ignoran (pero conservamos
+        # los tokens INDENT/DEDENT que se hayan emitido anteriormente).
+        if texto_linea_tras_indentacion.lstrip().startswith("#"):
+            # simplemente omitir la línea de comentario
+            continue
+        
+        pos = col - 1
+        texto_linea = linea_cruda.rstrip("\n")
+
+        while pos < len(texto_linea):
+            tipo, lexema, siguiente_pos = _obtener_siguiente_token(texto_linea, pos)
+            
+            if pos < siguiente_pos and all(c in ' \t' for c in texto_linea[pos:siguiente_pos]):
+                pos = siguiente_pos
+                continue
+
+            if tipo is None:
+                break
+            
+            col_token = pos + 1
+
+            if tipo == "COMMENT":
+                pos = len(texto_linea)
+                continue
+            elif tipo == "MISMATCH":
+                 raise ErrorLexer(f"Carácter ilegal {lexema!r} en línea {num_linea} col {col_token}")
+            else:
+                tokens.append(Token(tipo, lexema, num_linea, col_token))
+            
+            pos = siguiente_pos
+
+        tokens.append(Token("NEWLINE", "\\n", num_linea, len(texto_linea) + 1))
+
+    while len(pila_indentacion) > 1:
+        pila_indentacion.pop()
+        tokens.append(Token("DEDENT", "<DEDENT>", num_linea + 1, 1))
+
+    tokens.append(Token("EOF", "<EOF>", num_linea + 1, 1))
+    return tokens
+
+# Motor "regex": recorre el buffer completo con patrones precompilados usando
+# match(fuente, pos, fin), sin crear la subcadena del resto de la línea por cada token.
+# Reproduce exactamente los tokens, columnas y mensajes de error de _tokenizar_clasico.
+
+# Mismos separadores de línea que str.splitlines (el \r ya se normalizó a \n).
+_PATRON_FIN_LINEA = re.compile('[\n\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+_PATRON_BLANCO = re.compile(r'\s*')
+_PATRON_LINEA_COMENTARIO = re.compile(r'\s*#')
+_PATRON_ESPACIOS = re.compile('[ \t]*')
+# Cada coincidencia incluye los espacios previos al token: así m.start() es la
+# columna que asigna el motor clásico (la posición anterior a los espacios).
+# ILEGAL atrapa cualquier otro carácter, de modo que finditer avanza sin huecos.
+_PATRON_TOKEN = re.compile(r"""
+    [ \t]*
+    (?:
+        (?P<STRING>[frbFRB]{0,2}(?:'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"))
+      | (?P<COMMENT>\#)
+      | (?P<NOMBRE>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<FLOAT>[0-9]+\.[0-9]+)
+      | (?P<INT>[0-9]+)
+      | (?P<SIMBOLO>\*\*|==|!=|<=|>=|[-+*/%=<>:,.()\[\]{}])
+      | (?P<ILEGAL>[^ \t])
+    )
+""", re.VERBOSE | re.DOTALL)
+_TIPO_SIMBOLO = dict(SIMBOLOS_ORDENADOS)
+# Resto de una línea (desde el fin de la sangría, sin el separador) en el que
+# _PATRON_TOKEN no llega a ILEGAL: mismas alternativas, y el lookahead con \1 fija en
+# cada posición la que elige finditer, sin volver atrás a otra.
+_PATRON_SIN_ILEGALES = re.compile(r"""
+    (?:
+        (?=(
+            [ \t]*
+            (?:
+                [frbFRB]{0,2}(?:'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+              | [A-Za-z_][A-Za-z0-9_]*
+              | [0-9]+\.[0-9]+
+              | [0-9]+
+              | \*\*|==|!=|<=|>=|[-+*/%=<>:,.()\[\]{}]
+            )
+        ))\1
+    )*
+    [ \t]*
+    (?:\#.*)?
+""", re.VERBOSE | re.DOTALL)
+
+def tokenizar_linea(fuente, inicio_linea, fin_cruda, num_linea, pila_indentacion):
+    # Tokens de la línea fuente[inicio_linea:fin_cruda] (incluye su separador). Actualiza
+    # pila_indentacion en su lugar; una línea en blanco o de comentario puede no producir tokens.
+    fin = fin_cruda - 1 if fin_cruda > inicio_linea and fuente[fin_cruda - 1] == '\n' else fin_cruda
+    if _PATRON_BLANCO.fullmatch(fuente, inicio_linea, fin_cruda):
+        return []
+
+    tokens = []
+    fin_sangria = _PATRON_ESPACIOS.match(fuente, inicio_linea, fin_cruda).end()
+    col = fin_sangria - inicio_linea + 1
+    espacios_inicio = col - 1 + 3 * fuente.count('\t', inicio_linea, fin_sangria)
+
+    if espacios_inicio > pila_indentacion[-1]:
+        pila_indentacion.append(espacios_inicio)
+        tokens.append(Token("INDENT", "<INDENT>", num_linea, 1))
+    else:
+        while espacios_inicio < pila_indentacion[-1]:
+            pila_indentacion.pop()
+            tokens.append(Token("DEDENT", "<DEDENT>", num_linea, col))
+        if espacios_inicio != pila_indentacion[-1]:
+            raise ErrorLexer(f"Error de sangría en línea {num_linea}. Nivel actual: {espacios_inicio}, Esperado: {pila_indentacion[-1]}")
+    if _PATRON_LINEA_COMENTARIO.match(fuente, fin_sangria, fin_cruda):
+        return tokens
+
+    agregar = tokens.append
+    for m in _PATRON_TOKEN.finditer(fuente, fin_sangria, fin):
+        grupo = m.lastgroup
+        if grupo == "COMMENT":
+            break
+        lexema = m.group(m.lastindex)
+        col_token = m.start() - inicio_linea + 1
+        if grupo == "NOMBRE":
+            lexema = _internar(lexema)
+            tipo = "KEYWORD" if lexema in PALABRAS_CLAVE else "ID"
+        elif grupo == "SIMBOLO":
+            tipo = _TIPO_SIMBOLO[lexema]
+        elif grupo == "ILEGAL":
+            raise ErrorLexer(f"Carácter ilegal {lexema!r} en línea {num_linea} col {col_token}")
+        else:
+            tipo = grupo
+        agregar(Token(tipo, lexema, num_linea, col_token))
+
+    agregar(Token("NEWLINE", "\\n", num_linea, fin - inicio_linea + 1))
+    return tokens
+
+def tokens_de_cierre(pila_indentacion, num_linea):
+    # DEDENT pendientes y EOF al final de la entrada; num_linea es la última línea leída.
+    tokens = [Token("DEDENT", "<DEDENT>", num_linea + 1, 1) for _ in range(len(pila_indentacion) - 1)]
+    tokens.append(Token("EOF", "<EOF>", num_linea + 1, 1))
+    return tokens
+
+def _generar_tokens_regex(bloques, primera_linea=1):
+    # `bloques` es un iterable de cadenas cuyos cortes coinciden con fines de línea:
+    # la fuente completa en un solo bloque, o las líneas de un archivo una por una.
+    # `primera_linea` es el número de la primera línea (para analizar un tramo de un archivo).
+    pila_indentacion = [0]
+    num_linea = primera_linea - 1
+    buscar_fin_linea = _PATRON_FIN_LINEA.search
+
+    for fuente in bloques:
+        if '\r' in fuente:
+            fuente = fuente.replace('\r\n', '\n').replace('\r', '\n')
+        total = len(fuente)
+        ini = 0
+        while ini < total:
+            num_linea += 1
+            separador = buscar_fin_linea(fuente, ini)
+            fin_cruda = separador.end() if separador else total
+            yield from tokenizar_linea(fuente, ini, fin_cruda, num_linea, pila_indentacion)
+            ini = fin_cruda
+
+    yield from tokens_de_cierre(pila_indentacion, num_linea)
+
+def _tokenizar_regex(fuente):
+    return list(_generar_tokens_regex((fuente,)))
+
+def tokenizar_flujo(archivo, primera_linea=1):
+    # Generador de tokens para un archivo abierto en modo texto (o cualquier iterable
+    # de líneas): lee una línea a la vez, así que la memoria no depende del tamaño del archivo.
+    # Produce la misma secuencia que tokenizar(archivo.read()) y lanza ErrorLexer al llegar al error.
+    return _generar_tokens_regex(archivo, primera_linea)
+
+# Entrada en bytes (p. ej. un mmap del archivo): se lexea directamente sobre los bytes
+# sin decodificar el archivo completo. Las líneas solo ASCII usan versiones en bytes de
+# los patrones y solo se decodifican los lexemas; una línea con bytes no ASCII se
+# decodifica y pasa por tokenizar_linea, que además la corta en los separadores
+# Unicode (\x85, \u2028, \u2029). \r\n y \r se tratan como \n sin copiar la entrada.
+_B_FIN_LINEA = re.compile(rb'\r\n?|[\n\x0b\x0c\x1c\x1d\x1e]')
+_B_BLANCO = re.compile(rb'[ \t\n\r\x0b\x0c\x1c-\x1f]*')
+_B_LINEA_COMENTARIO = re.compile(rb'[ \t\n\r\x0b\x0c\x1c-\x1f]*#')
+_B_ESPACIOS = re.compile(rb'[ \t]*')
+_B_NO_ASCII = re.compile(rb'[\x80-\xff]')
+_B_TOKEN = re.compile(_PATRON_TOKEN.pattern.encode("ascii"), re.VERBOSE | re.DOTALL)
+# En un mmap, cada cuánto se devuelven al sistema las páginas ya leídas.
+_BLOQUE_LIBERAR = 8 * 1024 * 1024
+_MAX_LEXEMAS_CONOCIDOS = 1 << 16
+
+def tokenizar_bytes(datos):
+    # Generador con la misma secuencia que tokenizar(datos.decode("utf-8")).
+    pila_indentacion = [0]
+    num_linea = 0
+    total = len(datos)
+    liberar = getattr(datos, "madvise", None) if hasattr(mmap, "MADV_DONTNEED") else None
+    liberado = 0
+    buscar_fin_linea = _B_FIN_LINEA.search
+    buscar_no_ascii = _B_NO_ASCII.search
+    buscar_tokens = _B_TOKEN.finditer
+    # Lexema en bytes -> (tipo, lexema decodificado). El tipo depende solo del texto del
+    # lexema, así que los nombres y símbolos repetidos se decodifican una sola vez.
+    conocidos = {}
+
+    def revisar(desde, hasta):
+        # Próximo byte no ASCII en [desde, hasta), o `hasta` si no hay. Se revisa por
+        # ventanas para no recorrer (y cargar en memoria) todo el mapa de una vez.
+        hallado = buscar_no_ascii(datos, desde, hasta)
+        return (hallado.start() if hallado else hasta), hasta
+
+    proximo_no_ascii, revisado = revisar(0, min(total, _BLOQUE_LIBERAR))
+
+    fin_cruda = 0
+    while fin_cruda < total:
+        inicio_linea = fin_cruda
+        num_linea += 1
+        separador = buscar_fin_linea(datos, inicio_linea)
+        if separador:
+            fin_cruda = separador.end()
+            fin = separador.start() if datos[separador.start()] in b"\r\n" else fin_cruda
+        else:
+            fin = fin_cruda = total
+
+        if liberar is not None and inicio_linea - liberado >= _BLOQUE_LIBERAR:
+            corte = inicio_linea - inicio_linea % mmap.PAGESIZE
+            if corte > liberado:
+                liberar(mmap.MADV_DONTNEED, liberado, corte - liberado)
+                liberado = corte
+
+        if fin_cruda > proximo_no_ascii == revisado:
+            proximo_no_ascii, revisado = revisar(revisado, min(total, fin_cruda + _BLOQUE_LIBERAR))
+        if fin_cruda > proximo_no_ascii:
+            try:
+                texto = datos[inicio_linea:fin_cruda].decode("utf-8")
+            except UnicodeDecodeError as e:
+                # La posición del error es la del archivo, como en datos.decode("utf-8").
+                raise UnicodeDecodeError(e.encoding, datos[:fin_cruda], inicio_linea + e.start,
+                                         inicio_linea + e.end, e.reason) from None
+            if '\r' in texto:
+                texto = texto.replace('\r\n', '\n').replace('\r', '\n')
+            ini = 0
+            while ini < len(texto):
+                if ini:
+                    num_linea += 1
+                fin_sub = _PATRON_FIN_LINEA.search(texto, ini)
+                fin_sub = fin_sub.end() if fin_sub else len(texto)
+                yield from tokenizar_linea(texto, ini, fin_sub, num_linea, pila_indentacion)
+                ini = fin_sub
+            proximo_no_ascii, revisado = revisar(fin_cruda, min(total, fin_cruda + _BLOQUE_LIBERAR))
+            continue
+
+        if _B_BLANCO.fullmatch(datos, inicio_linea, fin_cruda):
+            continue
+        fin_sangria = _B_ESPACIOS.match(datos, inicio_linea, fin_cruda).end()
+        col = fin_sangria - inicio_linea + 1
+        espacios_inicio = col - 1 + 3 * datos[inicio_linea:fin_sangria].count(b'\t')
+        if espacios_inicio > pila_indentacion[-1]:
+            pila_indentacion.append(espacios_inicio)
+            yield Token("INDENT", "<INDENT>", num_linea, 1)
+        else:
+            while espacios_inicio < pila_indentacion[-1]:
+                pila_indentacion.pop()
+                yield Token("DEDENT", "<DEDENT>", num_linea, col)
+            if espacios_inicio != pila_indentacion[-1]:
+                raise ErrorLexer(f"Error de sangría en línea {num_linea}. Nivel actual: {espacios_inicio}, Esperado: {pila_indentacion[-1]}")
+        if _B_LINEA_COMENTARIO.match(datos, fin_sangria, fin_cruda):
+            continue
+
+        for m in buscar_tokens(datos, fin_sangria, fin):
+            grupo = m.lastgroup
+            if grupo == "COMMENT":
+                break
+            clave = m.group(m.lastindex)
+            par = conocidos.get(clave)
+            if par is None:
+                lexema = clave.decode("ascii")
+                if grupo == "NOMBRE":
+                    lexema = _internar(lexema)
+                    tipo = "KEYWORD" if lexema in PALABRAS_CLAVE else "ID"
+                elif grupo == "SIMBOLO":
+                    tipo = _TIPO_SIMBOLO[lexema]
+                elif grupo == "ILEGAL":
+                    raise ErrorLexer(f"Carácter ilegal {lexema!r} en línea {num_linea} col {m.start() - inicio_linea + 1}")
+                else:
+                    tipo = grupo
+                par = (tipo, lexema)
+                if len(conocidos) < _MAX_LEXEMAS_CONOCIDOS:
+                    conocidos[clave] = par
+            yield Token(par[0], par[1], num_linea, m.start() - inicio_linea + 1)
+        yield Token("NEWLINE", "\\n", num_linea, fin - inicio_linea + 1)
+
+    yield from tokens_de_cierre(pila_indentacion, num_linea)
+
+MOTORES = {
+    "clasico": _tokenizar_clasico,
+    "regex": _tokenizar_regex,
+}
+
+MOTOR_POR_DEFECTO = "regex"
+
+def tokenizar(fuente, motor=None):
+    try:
+        funcion = MOTORES[motor or MOTOR_POR_DEFECTO]
+    except KeyError:
+        raise ValueError(f"Motor de tokenización desconocido: {motor!r} (opciones: {', '.join(MOTORES)})")
+    return funcion(fuente)
+
+# Buffer compacto de tokens: en lugar de una lista de Token (una tupla y una cadena por
+# token) guarda cada campo en un arreglo: el tipo en un byte, línea y columna en
+# array('I') y el lexema como (inicio, fin) dentro de la fuente. INDENT, DEDENT,
+# NEWLINE y EOF no guardan lexema; se toma de LEXEMAS_FIJOS. Indexar o iterar el buffer
+# devuelve Token, así que sirve donde se espera una lista de tokens.
+#
+# Cada palabra clave tiene además su propio código, a continuación de los de
+# TIPOS_TOKEN: su tipo sigue siendo KEYWORD y su lexema es fijo. Así el código que deja
+# el lexer ya determina el terminal de la gramática, y ids_terminales traduce todos los
+# tokens a ids de la tabla con un solo bytes.translate.
+
+TIPOS_TOKEN = ["INDENT", "DEDENT", "NEWLINE", "EOF", "KEYWORD", "ID", "INT", "FLOAT", "STRING"] + sorted(set(_TIPO_SIMBOLO.values()))
+CODIGOS_TIPO = {tipo: codigo for codigo, tipo in enumerate(TIPOS_TOKEN)}
+LEXEMAS_FIJOS = {"INDENT": "<INDENT>", "DEDENT": "<DEDENT>", "NEWLINE": "\\n", "EOF": "<EOF>"}
+PALABRAS_CLAVE_ORDENADAS = [_internar(p) for p in sorted(PALABRAS_CLAVE)]
+CODIGOS_PALABRA_CLAVE = {p: len(TIPOS_TOKEN) + i for i, p in enumerate(PALABRAS_CLAVE_ORDENADAS)}
+
+_TIPOS_POR_CODIGO = TIPOS_TOKEN + ["KEYWORD"] * len(PALABRAS_CLAVE_ORDENADAS)
+_LEXEMAS_POR_CODIGO = [LEXEMAS_FIJOS.get(tipo) for tipo in TIPOS_TOKEN] + PALABRAS_CLAVE_ORDENADAS
+_CODIGO_SIMBOLO = {lexema: CODIGOS_TIPO[tipo] for lexema, tipo in _TIPO_SIMBOLO.items()}
+
+class BufferTokens:
+    def __init__(self, fuente):
+        self.fuente = fuente
+        self.tipos = bytearray()
+        self.lineas = array('I')
+        self.cols = array('I')
+        self.inicios = array('I')
+        self.fines = array('I')
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self.tipos)))]
+        if i < 0:
+            i += len(self.tipos)
+        codigo = self.tipos[i]
+        lexema = _LEXEMAS_POR_CODIGO[codigo]
+        if lexema is None:
+            lexema = self.fuente[self.inicios[i]:self.fines[i]]
+        return Token(_TIPOS_POR_CODIGO[codigo], lexema, self.lineas[i], self.cols[i])
+
+    def __iter__(self):
+        fuente, lineas, cols, inicios, fines = self.fuente, self.lineas, self.cols, self.inicios, self.fines
+        for i, codigo in enumerate(self.tipos):
+            lexema = _LEXEMAS_POR_CODIGO[codigo]
+            if lexema is None:
+                lexema = fuente[inicios[i]:fines[i]]
+            yield Token(_TIPOS_POR_CODIGO[codigo], lexema, lineas[i], cols[i])
+
+    def bytes_ocupados(self):
+        # Tamaño de los arreglos (sin contar la fuente, que se comparte).
+        return len(self.tipos) + sum(a.itemsize * len(a) for a in (self.lineas, self.cols, self.inicios, self.fines))
+
+    def ids_terminales(self, tc):
+        # Id de terminal de la TablaCompilada para cada token. Si los ids entran en un
+        # byte se traducen todos los códigos de una vez con bytearray.translate. Solo un
+        # buffer con el código genérico KEYWORD (tokenizar_compacto no lo usa) obliga a
+        # resolver esas palabras clave una por una.
+        desconocido = tc.id_desconocido
+        por_codigo = [tc.ids_por_tipo.get(tipo, desconocido) for tipo in TIPOS_TOKEN]
+        por_codigo += [tc.ids_palabras_clave.get(p, desconocido) for p in PALABRAS_CLAVE_ORDENADAS]
+        if desconocido < 256:
+            ids = self.tipos.translate(bytes(por_codigo + [desconocido] * (256 - len(por_codigo))))
+        else:
+            ids = array('h', [por_codigo[codigo] for codigo in self.tipos])
+        palabras, fuente, inicios, fines = tc.ids_palabras_clave, self.fuente, self.inicios, self.fines
+        codigo_clave = CODIGOS_TIPO["KEYWORD"]
+        i = self.tipos.find(codigo_clave)
+        while i >= 0:
+            ids[i] = palabras.get(fuente[inicios[i]:fines[i]], desconocido)
+            i = self.tipos.find(codigo_clave, i + 1)
+        return ids
+
+# Datos por línea que ya calculó otra pasada (prevalidacion.py), para que
+# tokenizar_compacto no los vuelva a calcular: solo las líneas no vacías, con su índice
+# (0 para la primera línea), inicio, fin (incluido el separador), fin de la sangría y
+# ancho de la sangría (tabulación = 4), más la cantidad total de líneas.
+LineasFuente = namedtuple("LineasFuente", ["numeros", "inicios", "fines", "fines_sangria", "anchos", "cantidad"])
+
+def tokenizar_compacto(fuente, primera_linea=1, lineas=None):
+    # Mismos tokens (y mismos ErrorLexer) que tokenizar(fuente), en un BufferTokens.
+    # Sigue el recorrido de _generar_tokens_regex y tokenizar_linea; `primera_linea`
+    # como en _generar_tokens_regex. `lineas` (LineasFuente) evita buscar los fines de
+    # línea, las líneas en blanco y la sangría; debe corresponder a la fuente ya sin \r.
+    if '\r' in fuente:
+        fuente = fuente.replace('\r\n', '\n').replace('\r', '\n')
+    buffer = BufferTokens(fuente)
+    agregar_tipo = buffer.tipos.append
+    agregar_linea = buffer.lineas.append
+    agregar_col = buffer.cols.append
+    agregar_inicio = buffer.inicios.append
+    agregar_fin = buffer.fines.append
+    indent, dedent, newline, eof = (CODIGOS_TIPO[t] for t in ("INDENT", "DEDENT", "NEWLINE", "EOF"))
+    identificador = CODIGOS_TIPO["ID"]
+    codigo_nombre = CODIGOS_PALABRA_CLAVE.get
+    codigo_grupo = {"STRING": CODIGOS_TIPO["STRING"], "FLOAT": CODIGOS_TIPO["FLOAT"], "INT": CODIGOS_TIPO["INT"]}
+    buscar_fin_linea = _PATRON_FIN_LINEA.search
+    buscar_tokens = _PATRON_TOKEN.finditer
+    es_comentario = _PATRON_LINEA_COMENTARIO.match
+
+    def agregar_sin_lexema(codigo, linea, col):
+        agregar_tipo(codigo)
+        agregar_linea(linea)
+        agregar_col(col)
+        agregar_inicio(0)
+        agregar_fin(0)
+
+    pila_indentacion = [0]
+
+    def agregar_linea_no_vacia(num_linea, inicio_linea, fin_cruda, fin_sangria, espacios_inicio):
+        col = fin_sangria - inicio_linea + 1
+        if espacios_inicio > pila_indentacion[-1]:
+            pila_indentacion.append(espacios_inicio)
+            agregar_sin_lexema(indent, num_linea, 1)
+        else:
+            while espacios_inicio < pila_indentacion[-1]:
+                pila_indentacion.pop()
+                agregar_sin_lexema(dedent, num_linea, col)
+            if espacios_inicio != pila_indentacion[-1]:
+                raise ErrorLexer(f"Error de sangría en línea {num_linea}. Nivel actual: {espacios_inicio}, Esperado: {pila_indentacion[-1]}")
+        if es_comentario(fuente, fin_sangria, fin_cruda):
+            return
+
+        fin = fin_cruda - 1 if fuente[fin_cruda - 1] == '\n' else fin_cruda
+        for m in buscar_tokens(fuente, fin_sangria, fin):
+            grupo = m.lastgroup
+            if grupo == "COMMENT":
+                break
+            inicio_lexema, fin_lexema = m.span(m.lastindex)
+            if grupo == "NOMBRE":
+                codigo = codigo_nombre(fuente[inicio_lexema:fin_lexema], identificador)
+            elif grupo == "SIMBOLO":
+                codigo = _CODIGO_SIMBOLO[fuente[inicio_lexema:fin_lexema]]
+            elif grupo == "ILEGAL":
+                raise ErrorLexer(f"Carácter ilegal {fuente[inicio_lexema:fin_lexema]!r} en línea {num_linea} col {m.start() - inicio_linea + 1}")
+            else:
+                codigo = codigo_grupo[grupo]
+            agregar_tipo(codigo)
+            agregar_linea(num_linea)
+            agregar_col(m.start() - inicio_linea + 1)
+            agregar_inicio(inicio_lexema)
+            agregar_fin(fin_lexema)
+
+        agregar_sin_lexema(newline, num_linea, fin - inicio_linea + 1)
+
+    if lineas is not None:
+        for numero, inicio_linea, fin_cruda, fin_sangria, espacios_inicio in zip(*lineas[:5]):
+            agregar_linea_no_vacia(primera_linea + numero, inicio_linea, fin_cruda, fin_sangria, espacios_inicio)
+        num_linea = primera_linea - 1 + lineas.cantidad
+    else:
+        num_linea = primera_linea - 1
+        total = len(fuente)
+        fin_cruda = 0
+        while fin_cruda < total:
+            inicio_linea = fin_cruda
+            num_linea += 1
+            separador = buscar_fin_linea(fuente, inicio_linea)
+            fin_cruda = separador.end() if separador else total
+            if _PATRON_BLANCO.fullmatch(fuente, inicio_linea, fin_cruda):
+                continue
+            fin_sangria = _PATRON_ESPACIOS.match(fuente, inicio_linea, fin_cruda).end()
+            espacios_inicio = fin_sangria - inicio_linea + 3 * fuente.count('\t', inicio_linea, fin_sangria)
+            agregar_linea_no_vacia(num_linea, inicio_linea, fin_cruda, fin_sangria, espacios_inicio)
+
+    for _ in range(len(pila_indentacion) - 1):
+        agregar_sin_lexema(dedent, num_linea + 1, 1)
+    agregar_sin_lexema(eof, num_linea + 1, 1)
+    return buffer
@@ -0,0 +1,133 @@
+import argparse
+import fnmatch
+import glob
+import json
+import multiprocessing
+import os
+import pickle
+import sys
+import time
+import cache_resultados as CRmod
+import main as Mmod
+
+# Análisis por lotes: recorre directorios y patrones glob, construye la tabla una
+# sola vez y reparte los archivos entre procesos trabajadores. Cada archivo produce
+# una línea JSON en el reporte.
+#
+# Con --cache, los resultados se guardan en cache_resultados por contenido: en una
+# corrida posterior los archivos que no cambiaron no se vuelven a analizar y su línea
+# del reporte lleva "en_cache": true. Los trabajadores comparten el directorio.
+
+NOMBRE_REPORTE_LOTE = "reporte_lote.jsonl"
+
+_tabla_trabajador = None
+_cache_trabajador = None
+
+def expandir_entradas(entradas, patron="*.py"):
+    vistos = set()
+    rutas = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            candidatas = []
+            for raiz, dirs, archivos in os.walk(entrada):
+                dirs.sort()
+                candidatas.extend(os.path.join(raiz, a) for a in sorted(archivos) if fnmatch.fnmatch(a, patron))
+        elif any(c in entrada for c in "*?["):
+            candidatas = sorted(r for r in glob.glob(entrada, recursive=True) if os.path.isfile(r))
+        else:
+            candidatas = [entrada]
+        for ruta in candidatas:
+            if ruta not in vistos:
+                vistos.add(ruta)
+                rutas.append(ruta)
+    return rutas
+
+def analizar_archivo(ruta, tc, cache=None):
+    inicio = time.perf_counter()
+    if cache is not None:
+        return _analizar_con_cache(ruta, tc, cache, inicio)
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            fuente = f.read()
+    except Exception as e:
+        return {"archivo": ruta, "ok": False, "mensaje": f"Error leyendo archivo {ruta}: {e}", "segundos": 0.0}
+    ok, mensaje, _ = Mmod.analizar_fuente(fuente, tc, "ninguna")
+    return {"archivo": ruta, "ok": ok, "mensaje": mensaje, "segundos": round(time.perf_counter() - inicio, 6)}
+
+def _analizar_con_cache(ruta, tc, cache, inicio):
+    try:
+        with open(ruta, "rb") as f:
+            datos = f.read()
+        resultado, en_cache = cache.analizar(datos, tc)
+    except (OSError, UnicodeDecodeError) as e:
+        return {"archivo": ruta, "ok": False, "mensaje": f"Error leyendo archivo {ruta}: {e}", "segundos": 0.0}
+    return {"archivo": ruta, "ok": resultado.ok, "mensaje": resultado.mensaje,
+            "segundos": round(time.perf_counter() - inicio, 6), "en_cache": en_cache}
+
+def _inicializar_trabajador(tabla_serializada, opciones_cache=None):
+    global _tabla_trabajador, _cache_trabajador
+    _tabla_trabajador = pickle.loads(tabla_serializada)
+    _cache_trabajador = None if opciones_cache is None else CRmod.CacheResultados(**opciones_cache)
+
+def _analizar_en_trabajador(ruta):
+    return analizar_archivo(ruta, _tabla_trabajador, _cache_trabajador)
+
+def analizar_lote(rutas, tc, trabajadores=None, tamano_lote=16, cache=None):
+    # Generador de resultados en orden de finalización. Con un solo trabajador se
+    # analiza en este mismo proceso, sin crear el pool.
+    trabajadores = trabajadores or os.cpu_count() or 1
+    if trabajadores == 1:
+        for ruta in rutas:
+            yield analizar_archivo(ruta, tc, cache)
+        return
+    # La tabla se serializa una vez y cada trabajador la carga al iniciar; con fork
+    # esto es una copia en memoria y con spawn evita reconstruirla en cada proceso.
+    # Cada trabajador abre su propia cache sobre el mismo directorio.
+    tabla_serializada = pickle.dumps(tc, protocol=pickle.HIGHEST_PROTOCOL)
+    opciones_cache = None
+    if cache is not None:
+        opciones_cache = {"huella": cache.huella, "directorio": cache.directorio,
+                          "max_bytes": cache.max_bytes, "max_memoria": cache.max_memoria}
+    with multiprocessing.Pool(trabajadores, initializer=_inicializar_trabajador, initargs=(tabla_serializada, opciones_cache)) as pool:
+        yield from pool.imap_unordered(_analizar_en_trabajador, rutas, chunksize=tamano_lote)
+
+def principal(argv=None):
+    analizador = argparse.ArgumentParser(description="Analiza árboles de directorios en paralelo y escribe un reporte JSON por líneas.")
+    analizador.add_argument("entradas", nargs="+", help="directorios, archivos o patrones glob (usar comillas para '**')")
+    analizador.add_argument("--patron", default="*.py", help="patrón de nombre para los archivos dentro de directorios (por defecto: %(default)s)")
+    analizador.add_argument("-j", "--trabajadores", type=int, default=None, help="procesos trabajadores (por defecto: núcleos disponibles)")
+    analizador.add_argument("--tamano-lote", type=int, default=16, help="archivos por envío a cada trabajador (por defecto: %(default)s)")
+    analizador.add_argument("-o", "--salida", default=NOMBRE_REPORTE_LOTE, help="reporte JSON por líneas (por defecto: %(default)s)")
+    analizador.add_argument("--cache", action="store_true", help="reutilizar resultados de archivos sin cambios (directorio por defecto: $ANALIZADOR_CACHE_RESULTADOS o uno junto a este módulo)")
+    analizador.add_argument("--cache-dir", default=None, help="directorio de la cache de resultados (implica --cache)")
+    analizador.add_argument("--cache-max-megas", type=float, default=CRmod.MAX_BYTES_POR_DEFECTO / 2**20, help="tamaño máximo de la cache en disco; se poda al terminar (por defecto: %(default)s)")
+    args = analizador.parse_args(argv)
+
+    rutas = expandir_entradas(args.entradas, args.patron)
+    artefacto = Mmod.cargar_tabla()
+    tc = artefacto.compilada
+    cache = None
+    if args.cache or args.cache_dir:
+        cache = CRmod.CacheResultados(artefacto.huella, args.cache_dir or CRmod.DIRECTORIO_POR_DEFECTO,
+                                      max_bytes=int(args.cache_max_megas * 2**20))
+
+    inicio = time.perf_counter()
+    total = correctos = en_cache = 0
+    with open(args.salida, "w", encoding="utf-8") as salida:
+        for resultado in analizar_lote(rutas, tc, args.trabajadores, args.tamano_lote, cache):
+            salida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+            total += 1
+            correctos += resultado["ok"]
+            en_cache += resultado.get("en_cache", False)
+    transcurrido = time.perf_counter() - inicio
+
+    print(f"{total} archivos analizados en {transcurrido:.2f} s: {correctos} correctos, {total - correctos} con errores")
+    if cache is not None:
+        borradas, _ = cache.podar()
+        print(f"Cache: {en_cache}/{total} aciertos ({en_cache / total if total else 0.0:.1%})"
+              + (f", {borradas} entradas podadas" if borradas else ""))
+    print(f"Reporte: {args.salida}")
+    return 0 if correctos == total else 1
+
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -1,82 +1,320 @@
-import sys
-from lexer import tokenizar, ErrorLexer, Token
-import grammar as Gmod
-import table as Tmod
-import parser as Pmod
-import errors as Emod
-
-NOMBRE_ARCHIVO_SALIDA = "reporte_sintactico.txt"
-
-def leer_fuente_desde_argumentos_o_entrada():
-    if len(sys.argv) >= 2:
-        ruta = sys.argv[1]
-        try:
-            with open(ruta, "r", encoding="utf-8") as f:
-                return f.read()
-        except Exception as e:
-            print(f"Error leyendo archivo {ruta}: {e}", file=sys.stderr)
-            sys.exit(1)
-    return sys.stdin.read()
-
-def escribir_salida(mensaje, aplicadas=None):
-    try:
-        with open(NOMBRE_ARCHIVO_SALIDA, "w", encoding="utf-8") as f:
-            f.write(mensaje + ("\n" if not mensaje.endswith("\n") else ""))
-            if aplicadas:
-                f.write("\nSecuencia de producciones aplicadas:\n")
-                for i, (nt, prod) in enumerate(aplicadas, 1):
-                    rhs = " ".join(prod)
-                    f.write(f"{i}. {nt} → {rhs}\n")
-    except Exception as e:
-        print(f"Advertencia: no se pudo escribir el archivo {NOMBRE_ARCHIVO_SALIDA}: {e}", file=sys.stderr)
-
-def principal():
-    fuente = leer_fuente_desde_argumentos_o_entrada()
-    if fuente is None:
-        print("No se proporcionó entrada.", file=sys.stderr)
-        sys.exit(1)
-
-    try:
-        tokens = tokenizar(fuente)
-    except ErrorLexer as e:
-        msg = str(e)
-        if "Indentation" in msg or "indent" in msg.lower():
-            falso = Token(tipo="INDENT", lexema="<INDENT_ERR>", linea=0, col=0)
-            salida = Emod.formatear_error_indentacion(falso)
-        else:
-            falso = Token(tipo="", lexema=str(e), linea=0, col=0)
-            salida = Emod.formatear_error_token(falso, ["EOF"])
-        escribir_salida(salida)
-        print(salida)
-        return
-
-    try:
-        tabla_pred, FIRST, FOLLOW, SELECT = Tmod.construir_tabla_predictiva(Gmod.gramatica, Gmod.SIMBOLO_INICIAL)
-    except Exception as e:
-        msg = f"Error construyendo tabla predictiva LL(1): {e}"
-        print(msg, file=sys.stderr)
-        sys.exit(2)
-
-    gramatica_normalizada = Gmod.normalizar_gramatica_para_ll1(Gmod.gramatica)
-
-    try:
-        res = Pmod.analizar(tokens, tabla_pred, gramatica_normalizada, Gmod.SIMBOLO_INICIAL)
-        if isinstance(res, tuple) and len(res) == 3:
-            ok, mensaje, aplicadas = res
-        elif isinstance(res, tuple) and len(res) == 2:
-            ok, mensaje = res
-            aplicadas = []
-        else:
-            ok = False
-            mensaje = "Error interno: analizar devolvió un resultado inesperado."
-            aplicadas = []
-    except Exception as e:
-        ok = False
-        mensaje = f"ANALIZADOR LANZÓ EXCEPCIÓN: {e}"
-        aplicadas = []
-
-    escribir_salida(mensaje, aplicadas if ok else None)
-    print(mensaje)
-
-if __name__ == "__main__":
-    principal()
\ No newline at end of file
+import argparse
+import mmap
+import sys
+from lexer import tokenizar, tokenizar_flujo, tokenizar_bytes, tokenizar_compacto, ErrorLexer, Token
+import parser as Pmod
+import errors as Emod
+import cache_tabla as Cmod
+import estadisticas as Estmod
+import traza as Trmod
+
+NOMBRE_ARCHIVO_SALIDA = "reporte_sintactico.txt"
+
+def leer_fuente_desde_argumentos_o_entrada(ruta=None):
+    if ruta is not None:
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                return f.read()
+        except Exception as e:
+            print(f"Error leyendo archivo {ruta}: {e}", file=sys.stderr)
+            sys.exit(1)
+    return sys.stdin.read()
+
+def abrir_fuente_desde_argumentos_o_entrada(ruta=None):
+    if ruta is not None:
+        try:
+            return open(ruta, "r", encoding="utf-8")
+        except Exception as e:
+            print(f"Error leyendo archivo {ruta}: {e}", file=sys.stderr)
+            sys.exit(1)
+    return sys.stdin
+
+def salir_por_error_de_lectura(ruta, e):
+    if ruta is None:
+        print(f"Error leyendo la entrada estándar: {e}", file=sys.stderr)
+    else:
+        print(f"Error leyendo archivo {ruta}: {e}", file=sys.stderr)
+    sys.exit(1)
+
+def error_de_decodificacion_en_archivo(ruta, e):
+    # En modo texto el archivo se decodifica por bloques y la posición del error es
+    # relativa al bloque. Para reportar la del archivo, como el modo normal, se vuelve a
+    # decodificar completo; solo pasa una vez, al abortar.
+    try:
+        with open(ruta, "rb") as f:
+            f.read().decode("utf-8")
+    except UnicodeDecodeError as completo:
+        return completo
+    except OSError:
+        pass
+    return e
+
+def mapear_fuente(ruta):
+    # Mapea el archivo en memoria (solo lectura); un archivo vacío no se puede mapear.
+    try:
+        with open(ruta, "rb") as f:
+            if f.seek(0, 2) == 0:
+                return b""
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except Exception as e:
+        print(f"Error leyendo archivo {ruta}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+# Nivel de traza del parser para cada valor de --traza: la traza completa se pide como
+# ids de producción y traza.EscritorTraza la convierte a texto al escribir el reporte.
+NIVEL_PARSER = {"completa": "ids", "conteos": "conteos", "ninguna": "ninguna"}
+
+def escribir_salida(mensaje, aplicadas=None, tc=None, traza="completa"):
+    # `aplicadas` son los ids (traza="completa") o los conteos (traza="conteos") que
+    # devuelve el parser con el nivel NIVEL_PARSER[traza].
+    try:
+        with open(NOMBRE_ARCHIVO_SALIDA, "w", encoding="utf-8") as f:
+            f.write(mensaje + ("\n" if not mensaje.endswith("\n") else ""))
+            if aplicadas:
+                escritor = Trmod.EscritorTraza(f, tc)
+                if traza == "conteos":
+                    escritor.escribir_conteos(aplicadas)
+                else:
+                    escritor.encabezado()
+                    escritor.escribir(aplicadas)
+    except Exception as e:
+        print(f"Advertencia: no se pudo escribir el archivo {NOMBRE_ARCHIVO_SALIDA}: {e}", file=sys.stderr)
+
+def formatear_error_lexer(e):
+    msg = str(e)
+    if "Indentation" in msg or "indent" in msg.lower():
+        falso = Token(tipo="INDENT", lexema="<INDENT_ERR>", linea=0, col=0)
+        return Emod.formatear_error_indentacion(falso)
+    falso = Token(tipo="", lexema=str(e), linea=0, col=0)
+    return Emod.formatear_error_token(falso, ["EOF"])
+
+def normalizar_resultado(res):
+    if isinstance(res, tuple) and len(res) == 3:
+        return res
+    if isinstance(res, tuple) and len(res) == 2:
+        ok, mensaje = res
+        return ok, mensaje, []
+    return False, "Error interno: analizar devolvió un resultado inesperado.", []
+
+def analizar_fuente(fuente, tc, traza="completa", estadisticas=None):
+    # La fuente se lexea a un BufferTokens, que ya trae resuelto el terminal de cada
+    # token, y el parser recorre los ids sin armar un Token por token; con estadísticas
+    # se mide ese mismo camino con la copia instrumentada del parser. Solo el árbol
+    # sintáctico sale de la lista de Token.
+    if traza != "arbol":
+        try:
+            with Estmod.fase(estadisticas, "lexer"):
+                buffer = tokenizar_compacto(fuente)
+        except ErrorLexer as e:
+            return False, formatear_error_lexer(e), []
+        if estadisticas is not None:
+            estadisticas.contar("tokens_lexados", len(buffer))
+        try:
+            with Estmod.fase(estadisticas, "parser"):
+                return normalizar_resultado(Pmod.analizar_buffer(buffer, tc, traza, estadisticas=estadisticas))
+        except Exception as e:
+            return False, f"ANALIZADOR LANZÓ EXCEPCIÓN: {e}", []
+    try:
+        with Estmod.fase(estadisticas, "lexer"):
+            tokens = tokenizar(fuente)
+    except ErrorLexer as e:
+        return False, formatear_error_lexer(e), []
+    if estadisticas is not None:
+        estadisticas.contar("tokens_lexados", len(tokens))
+    try:
+        with Estmod.fase(estadisticas, "parser"):
+            return normalizar_resultado(Pmod.analizar_flujo(iter(tokens), tc, traza, estadisticas))
+    except Exception as e:
+        return False, f"ANALIZADOR LANZÓ EXCEPCIÓN: {e}", []
+
+def analizar_archivo_en_flujo(archivo, tc, traza="completa", estadisticas=None):
+    # El lexer y el parser avanzan juntos sobre el archivo, línea por línea.
+    return analizar_tokens_en_flujo(tokenizar_flujo(archivo), tc, traza, estadisticas)
+
+def analizar_tokens_en_flujo(tokens, tc, traza="completa", estadisticas=None):
+    # Con lexer y parser intercalados, el tiempo de los dos queda en la fase "analisis".
+    try:
+        with Estmod.fase(estadisticas, "analisis"):
+            res = normalizar_resultado(Pmod.analizar_flujo(tokens, tc, traza, estadisticas))
+            if not res[0]:
+                # En el modo normal un error léxico en cualquier parte del archivo tiene
+                # prioridad sobre el error sintáctico; se termina de leer para reportar lo mismo.
+                for _ in tokens:
+                    pass
+        return res
+    except ErrorLexer as e:
+        return False, formatear_error_lexer(e), []
+    except UnicodeDecodeError:
+        # Los tokens se leen del archivo mientras se analiza: un error al decodificarlo
+        # es un error de lectura, y lo reporta quien abrió el archivo.
+        raise
+    except Exception as e:
+        return False, f"ANALIZADOR LANZÓ EXCEPCIÓN: {e}", []
+
+def analizar_todos_los_errores(tokens, tc, traza="completa", estadisticas=None):
+    # Devuelve (ok, mensajes, aplicadas) con un mensaje por error sintáctico. Los errores
+    # léxicos siguen deteniendo el análisis y se reportan solos, como en el modo normal.
+    try:
+        with Estmod.fase(estadisticas, "analisis_con_recuperacion"):
+            errores, aplicadas = Pmod.analizar_recuperando(tokens, tc, traza)
+    except ErrorLexer as e:
+        return False, [formatear_error_lexer(e)], []
+    except UnicodeDecodeError:
+        raise
+    except Exception as e:
+        return False, [f"ANALIZADOR LANZÓ EXCEPCIÓN: {e}"], []
+    if estadisticas is not None:
+        estadisticas.contar("errores_sintacticos", len(errores))
+        estadisticas.contar("producciones_aplicadas", sum(aplicadas) if traza == "conteos" else len(aplicadas))
+    if errores:
+        return False, [err.mensaje for err in errores], []
+    return True, [Pmod.MENSAJE_EXITO], aplicadas
+
+def analizar_fuente_todos_los_errores(fuente, tc, traza="completa", estadisticas=None):
+    try:
+        with Estmod.fase(estadisticas, "lexer"):
+            tokens = tokenizar(fuente)
+    except ErrorLexer as e:
+        return False, [formatear_error_lexer(e)], []
+    if estadisticas is not None:
+        estadisticas.contar("tokens_lexados", len(tokens))
+    return analizar_todos_los_errores(tokens, tc, traza, estadisticas)
+
+def cargar_tabla(estadisticas=None):
+    try:
+        with Estmod.fase(estadisticas, "tabla"):
+            return Cmod.gramatica_compilada(estadisticas=estadisticas)
+    except Exception as e:
+        msg = f"Error construyendo tabla predictiva LL(1): {e}"
+        print(msg, file=sys.stderr)
+        sys.exit(2)
+
+def leer_argumentos(argv=None):
+    analizador = argparse.ArgumentParser(description="Analizador sintáctico LL(1) para un subconjunto de Python.")
+    analizador.add_argument("archivo", nargs="?", help="archivo a analizar (por defecto se lee la entrada estándar)")
+    # Formas de leer y analizar la fuente; se elige una sola. --todos-errores se puede
+    # combinar con --flujo y --mmap, pero no con las otras dos.
+    modos = analizador.add_mutually_exclusive_group()
+    modos.add_argument("--flujo", action="store_true",
+                            help="lee y analiza el archivo línea por línea sin cargarlo completo en memoria")
+    modos.add_argument("--mmap", action="store_true",
+                            help="mapea el archivo en memoria y lo analiza sobre los bytes, sin decodificarlo completo")
+    analizador.add_argument("--traza", choices=["completa", "conteos", "ninguna"], default="completa",
+                            help="escribir en el reporte la secuencia de producciones aplicadas, solo cuántas veces "
+                                 "se aplicó cada una, o nada (por defecto: completa)")
+    analizador.add_argument("--traza-binaria", default=None, metavar="RUTA",
+                            help="guardar los ids de las producciones aplicadas en RUTA (se expande con traza.py)")
+    analizador.add_argument("--todos-errores", action="store_true",
+                            help="recuperarse de los errores sintácticos y reportarlos todos en una sola pasada")
+    modos.add_argument("--paralelo", type=int, default=None, metavar="N",
+                            help="repartir un archivo grande en partes por sentencias de nivel superior y "
+                                 "analizarlas en N procesos (0: uno por CPU)")
+    modos.add_argument("--prevalidar", action="store_true",
+                            help="revisar sangría y paréntesis con NumPy antes de lexear, para rechazar antes "
+                                 "los archivos con errores (sin NumPy se analiza como siempre)")
+    analizador.add_argument("--stats", action="store_true",
+                            help="escribir tiempos por fase y contadores en JSON (en stderr, o en --stats-salida)")
+    analizador.add_argument("--stats-salida", default=None, metavar="RUTA",
+                            help="archivo para el JSON de --stats (implica --stats)")
+    analizador.add_argument("--stats-memoria", action="store_true",
+                            help="medir también el pico de memoria asignada por fase, más lento (implica --stats)")
+    args = analizador.parse_args(argv)
+    if args.todos_errores and (args.prevalidar or args.paralelo is not None):
+        opcion = "--prevalidar" if args.prevalidar else "--paralelo"
+        analizador.error(f"argument --todos-errores: not allowed with argument {opcion}")
+    return args
+
+def escribir_estadisticas(estadisticas, destino):
+    if destino == "-":
+        print(estadisticas.a_json(), file=sys.stderr)
+        return
+    try:
+        with open(destino, "w", encoding="utf-8") as f:
+            f.write(estadisticas.a_json() + "\n")
+    except Exception as e:
+        print(f"Advertencia: no se pudo escribir el archivo {destino}: {e}", file=sys.stderr)
+
+def escribir_traza_binaria(ruta, ids, huella):
+    try:
+        Trmod.escribir_binaria(ruta, ids, huella)
+    except Exception as e:
+        print(f"Advertencia: no se pudo escribir el archivo {ruta}: {e}", file=sys.stderr)
+
+def principal(argv=None):
+    args = leer_argumentos(argv)
+    estadisticas = None
+    if args.stats or args.stats_salida or args.stats_memoria:
+        estadisticas = Estmod.Estadisticas(memoria=args.stats_memoria)
+    artefacto = cargar_tabla(estadisticas)
+    tc = artefacto.compilada
+    traza = "ids" if args.traza_binaria else NIVEL_PARSER[args.traza]
+
+    if args.mmap:
+        if args.archivo is None:
+            print("--mmap requiere un archivo.", file=sys.stderr)
+            sys.exit(1)
+        datos = mapear_fuente(args.archivo)
+        tokens = tokenizar_bytes(datos)
+        try:
+            if args.todos_errores:
+                ok, mensajes, aplicadas = analizar_todos_los_errores(tokens, tc, traza, estadisticas)
+                mensaje = "\n".join(mensajes)
+            else:
+                ok, mensaje, aplicadas = analizar_tokens_en_flujo(tokens, tc, traza, estadisticas)
+        except UnicodeDecodeError as e:
+            # tokenizar_bytes ya da la posición dentro del archivo, como el modo normal.
+            salir_por_error_de_lectura(args.archivo, e)
+        finally:
+            # El generador tiene coincidencias que apuntan al mapa: se cierra primero.
+            tokens.close()
+            if isinstance(datos, mmap.mmap):
+                datos.close()
+    elif args.flujo:
+        archivo = abrir_fuente_desde_argumentos_o_entrada(args.archivo)
+        try:
+            if args.todos_errores:
+                ok, mensajes, aplicadas = analizar_todos_los_errores(tokenizar_flujo(archivo), tc, traza, estadisticas)
+                mensaje = "\n".join(mensajes)
+            else:
+                ok, mensaje, aplicadas = analizar_archivo_en_flujo(archivo, tc, traza, estadisticas)
+        except UnicodeDecodeError as e:
+            if args.archivo is not None:
+                e = error_de_decodificacion_en_archivo(args.archivo, e)
+            salir_por_error_de_lectura(args.archivo, e)
+        finally:
+            if archivo is not sys.stdin:
+                archivo.close()
+    else:
+        with Estmod.fase(estadisticas, "lectura"):
+            fuente = leer_fuente_desde_argumentos_o_entrada(args.archivo)
+        if fuente is None:
+            print("No se proporcionó entrada.", file=sys.stderr)
+            sys.exit(1)
+        if args.todos_errores:
+            ok, mensajes, aplicadas = analizar_fuente_todos_los_errores(fuente, tc, traza, estadisticas)
+            mensaje = "\n".join(mensajes)
+        elif args.prevalidar:
+            import prevalidacion as Prevmod
+            with Estmod.fase(estadisticas, "analisis"):
+                ok, mensaje, aplicadas = Prevmod.analizar_prevalidando(fuente, tc, traza)
+        elif args.paralelo is not None:
+            import paralelo as Parmod
+            with Estmod.fase(estadisticas, "analisis"):
+                ok, mensaje, aplicadas = Parmod.analizar_paralelo(fuente, tc, traza, args.paralelo or None)
+        else:
+            ok, mensaje, aplicadas = analizar_fuente(fuente, tc, traza, estadisticas)
+
+    with Estmod.fase(estadisticas, "reporte"):
+        if ok and args.traza_binaria:
+            escribir_traza_binaria(args.traza_binaria, aplicadas, artefacto.huella)
+            if args.traza == "conteos":
+                aplicadas = Trmod.contar_ids(aplicadas, tc)
+            elif args.traza == "ninguna":
+                aplicadas = None
+        escribir_salida(mensaje, aplicadas if ok else None, tc, args.traza)
+    print(mensaje)
+    if estadisticas is not None:
+        escribir_estadisticas(estadisticas, args.stats_salida or "-")
+
+if __name__ == "__main__":
+    principal()
@@ -0,0 +1,18 @@
+def promedio(valores)
+    total = 0
+    for v in valores:
+        total = total + v
+    return total / len(valores
+
+def maximo(valores):
+    mayor = = max(valores)
+    for v in valores
+        if v > mayor:
+            mayor = v
+    return mayor
+
+datos = [3, 1, 4, 1, 5]
+if len(datos) > 0:
+    print(promedio(datos), maximo(datos)
+else
+    print("sin datos")
@@ -0,0 +1,211 @@
+import multiprocessing
+import os
+import pickle
+import re
+from array import array
+from collections import namedtuple
+import main as Mmod
+import parser as Pmod
+import tabla_compilada as TCmod
+from lexer import tokenizar_compacto, tokenizar_flujo, tokenizar_linea, ErrorLexer
+
+# Análisis de un archivo grande repartido entre procesos. La fuente se corta al
+# comienzo de líneas sin sangría que empiezan una sentencia nueva: ahí la pila de
+# sangría del lexer está en [0] y la pila del parser es la cola de la lista de
+# sentencias de nivel superior, así que cada parte se puede lexear y analizar como un
+# programa aparte (con los números de línea del archivo) y los resultados se unen:
+#  - la traza de cada parte empieza con la producción inicial (programa → lista EOF) y
+#    termina con la lista vacía (lista → ε); al unir se quitan las que sobran;
+#  - un error léxico gana sobre los sintácticos, porque el análisis en serie lexea
+#    todo antes de analizar: se reporta el de la primera parte que lo tenga;
+#  - ante un error sintáctico se vuelve a analizar en serie desde el comienzo de la
+#    primera parte con error (con el lexer en flujo, que se detiene en el error), así
+#    que el mensaje es siempre el del análisis completo.
+#
+# Una línea es punto de corte si:
+#  - no tiene sangría y la línea no vacía anterior no es solo un comentario (si no, los
+#    DEDENT que cierran los bloques saldrían en esa línea y no en la de corte);
+#  - su primer token es un terminal "seguro" (estructura_de_corte): empieza una sentencia
+#    y, para todo no terminal que con EOF elegiría una producción, elige la misma. Esto
+#    descarta elif y else, que continúan la sentencia anterior.
+# Si la gramática no tiene la forma S → lista EOF con lista → ... lista | ε, o la
+# fuente usa separadores de línea que no sean \n, se analiza en serie.
+
+# Mismos separadores de línea que el lexer, además de \n.
+_OTROS_SEPARADORES = re.compile('[\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+_LINEA_SIN_SANGRIA = re.compile(r'\n(?=[^ \t\n#])')
+_LINEA_BLANCA = re.compile(r'\s*')
+_LINEA_COMENTARIO = re.compile(r'\s*#')
+
+# Por debajo de este tamaño (en caracteres) no conviene repartir.
+TAMANO_MINIMO_PARTE = 256 * 1024
+
+EstructuraCorte = namedtuple("EstructuraCorte", ["produccion_inicial", "produccion_vacia", "seguros"])
+
+_tabla_trabajador = None
+
+def estructura_de_corte(tc):
+    inicial = tc.simbolos[tc.id_inicial]
+    producciones_inicial = [p for p, (A, _) in enumerate(tc.producciones) if A == inicial]
+    if len(producciones_inicial) != 1:
+        return None
+    p_inicial = producciones_inicial[0]
+    cuerpo = tc.producciones[p_inicial][1]
+    if len(cuerpo) != 2 or cuerpo[1] != tc.simbolos[tc.id_eof] or cuerpo[0] == inicial:
+        return None
+    lista = cuerpo[0]
+    ids = { simb: i for i, simb in enumerate(tc.simbolos) if simb is not None }
+    id_lista = ids.get(lista)
+    if id_lista is None or tc.filas[id_lista] < 0:
+        return None
+    vacias = [p for p, (A, prod) in enumerate(tc.producciones) if A == lista and not tc.cuerpos_invertidos[p]]
+    if len(vacias) != 1 or tc.matriz[tc.filas[id_lista] + tc.id_eof] != vacias[0]:
+        return None
+
+    fila_lista = tc.filas[id_lista]
+    con_eof = [(tc.filas[A], tc.matriz[tc.filas[A] + tc.id_eof])
+               for A in range(len(tc.simbolos))
+               if A != id_lista and tc.filas[A] >= 0 and tc.matriz[tc.filas[A] + tc.id_eof] >= 0]
+    seguros = set()
+    for t in range(tc.num_terminales):
+        p = tc.matriz[fila_lista + t]
+        if p < 0 or p == vacias[0]:
+            continue
+        if all(tc.matriz[fila + t] == elegida for fila, elegida in con_eof):
+            seguros.add(t)
+    return EstructuraCorte(p_inicial, vacias[0], frozenset(seguros))
+
+def _anterior_es_codigo(fuente, inicio):
+    # La línea no vacía anterior a la que empieza en `inicio` existe y no es solo un comentario.
+    fin = inicio - 1
+    while fin > 0:
+        comienzo = fuente.rfind('\n', 0, fin) + 1
+        if not _LINEA_BLANCA.fullmatch(fuente, comienzo, fin):
+            return not _LINEA_COMENTARIO.match(fuente, comienzo, fin)
+        fin = comienzo - 1
+    return False
+
+def _primer_terminal(fuente, inicio, tc):
+    fin = fuente.find('\n', inicio)
+    fin = len(fuente) if fin < 0 else fin + 1
+    try:
+        tokens = tokenizar_linea(fuente, inicio, fin, 1, [0])
+    except ErrorLexer:
+        return None
+    return TCmod.id_de_token(tokens[0], tc) if tokens else None
+
+def siguiente_corte(fuente, desde, tc, seguros):
+    # Comienzo de la primera línea de corte en `desde` o después, o None.
+    buscar = _LINEA_SIN_SANGRIA.search
+    m = buscar(fuente, max(desde - 1, 0))
+    while m is not None:
+        inicio = m.end()
+        if _anterior_es_codigo(fuente, inicio) and _primer_terminal(fuente, inicio, tc) in seguros:
+            return inicio
+        m = buscar(fuente, inicio)
+    return None
+
+def puntos_de_corte(fuente, tc, partes, seguros):
+    # Desplazamientos donde empieza cada parte, el primero 0, repartidos lo más parejo
+    # posible en tamaño.
+    cortes = [0]
+    total = len(fuente)
+    for k in range(1, partes):
+        corte = siguiente_corte(fuente, max(cortes[-1] + 1, total * k // partes), tc, seguros)
+        if corte is None:
+            break
+        cortes.append(corte)
+    return cortes
+
+def analizar_parte(texto, primera_linea, tc, traza):
+    # ("lexer", mensaje, None), ("sintaxis", mensaje, None) u ("ok", mensaje, aplicadas).
+    try:
+        buffer = tokenizar_compacto(texto, primera_linea)
+    except ErrorLexer as e:
+        return "lexer", Mmod.formatear_error_lexer(e), None
+    ok, mensaje, aplicadas = Mmod.normalizar_resultado(Pmod.analizar_buffer(buffer, tc, traza))
+    return ("ok", mensaje, aplicadas) if ok else ("sintaxis", mensaje, None)
+
+def _inicializar_trabajador(tabla_serializada):
+    global _tabla_trabajador
+    _tabla_trabajador = pickle.loads(tabla_serializada)
+
+def _analizar_en_trabajador(parte):
+    texto, primera_linea, traza = parte
+    return analizar_parte(texto, primera_linea, _tabla_trabajador, traza)
+
+def _unir_trazas(trazas, traza, tc, estructura):
+    # None si alguna parte no empieza con la producción inicial o no termina con la
+    # lista vacía (con conteos solo se puede ver que cada parte las aplique); el que
+    # llama analiza entonces en serie. No son assert para que `python -O` no las quite.
+    if traza == "ninguna":
+        return []
+    sobrantes = len(trazas) - 1
+    if traza == "conteos":
+        if any(parte[estructura.produccion_inicial] < 1 or parte[estructura.produccion_vacia] < 1 for parte in trazas):
+            return None
+        conteos = [sum(columna) for columna in zip(*trazas)]
+        conteos[estructura.produccion_inicial] -= sobrantes
+        conteos[estructura.produccion_vacia] -= sobrantes
+        return conteos
+    ids = array(trazas[0].typecode)
+    for k, parte in enumerate(trazas):
+        if not parte or parte[0] != estructura.produccion_inicial or parte[-1] != estructura.produccion_vacia:
+            return None
+        ids.extend(parte[1 if k else 0:len(parte) if k == sobrantes else -1])
+    if traza == "completa":
+        return [tc.producciones[p] for p in ids]
+    return ids
+
+def _reanalizar_desde(fuente, inicio, primera_linea, tc):
+    # Mensaje del primer error sintáctico a partir de `inicio`, o None si no hay error.
+    tokens = tokenizar_flujo((fuente[inicio:],), primera_linea)
+    ok, mensaje, _ = Mmod.normalizar_resultado(Pmod.analizar_flujo(tokens, tc, "ninguna"))
+    return None if ok else mensaje
+
+def _resultados_en_orden(partes, tc, trabajadores):
+    if trabajadores == 1:
+        for texto, primera_linea, traza in partes:
+            yield analizar_parte(texto, primera_linea, tc, traza)
+        return
+    tabla_serializada = pickle.dumps(tc, protocol=pickle.HIGHEST_PROTOCOL)
+    with multiprocessing.Pool(trabajadores, initializer=_inicializar_trabajador, initargs=(tabla_serializada,)) as pool:
+        yield from pool.imap(_analizar_en_trabajador, partes)
+
+def analizar_paralelo(fuente, tc, traza="completa", trabajadores=None, partes=None, tamano_minimo=TAMANO_MINIMO_PARTE):
+    # Mismo resultado (ok, mensaje, aplicadas) que main.analizar_fuente(fuente, tc, traza).
+    # Por defecto una parte por trabajador, sin bajar de `tamano_minimo` caracteres por parte.
+    trabajadores = trabajadores or os.cpu_count() or 1
+    if '\r' in fuente:
+        fuente = fuente.replace('\r\n', '\n').replace('\r', '\n')
+    partes = partes or min(trabajadores, max(1, len(fuente) // max(tamano_minimo, 1)))
+    estructura = estructura_de_corte(tc)
+    if partes < 2 or estructura is None or traza == "arbol" or _OTROS_SEPARADORES.search(fuente):
+        return Mmod.analizar_fuente(fuente, tc, traza)
+    cortes = puntos_de_corte(fuente, tc, partes, estructura.seguros)
+    if len(cortes) < 2:
+        return Mmod.analizar_fuente(fuente, tc, traza)
+
+    lineas = [1]
+    for anterior, corte in zip(cortes, cortes[1:]):
+        lineas.append(lineas[-1] + fuente.count('\n', anterior, corte))
+    nivel = "ids" if traza == "completa" else traza
+    limites = cortes[1:] + [len(fuente)]
+    trozos = [(fuente[inicio:fin], linea, nivel) for inicio, fin, linea in zip(cortes, limites, lineas)]
+
+    resultados = []
+    for estado, mensaje, aplicadas in _resultados_en_orden(trozos, tc, min(trabajadores, len(trozos))):
+        if estado == "lexer":
+            return False, mensaje, []
+        resultados.append((estado, mensaje, aplicadas))
+    for k, (estado, _, _) in enumerate(resultados):
+        if estado == "sintaxis":
+            mensaje = _reanalizar_desde(fuente, cortes[k], lineas[k], tc)
+            if mensaje is None:
+                # La parte solo fallaba al cortarla: se analiza todo en serie.
+                return Mmod.analizar_fuente(fuente, tc, traza)
+            return False, mensaje, []
+    aplicadas = _unir_trazas([r[2] for r in resultados], traza, tc, estructura)
+    if aplicadas is None:
+        return Mmod.analizar_fuente(fuente, tc, traza)
+    return True, resultados[-1][1], aplicadas
@@ -1,149 +1,569 @@
-from collections import deque
-import grammar as Gmod
-import table as Tmod
-from lexer import Token
-
-EPS = 'ε'
-MARCA_FIN = '$'
-
-LEGIBLE = {
-    'COLON': ':',
-    'COMMA': ',',
-    'DOT': '.',
-    'LPAR': '(',
-    'RPAR': ')',
-    'LBRACK': '[',
-    'RBRACK': ']',
-    'LBRACE': '{',
-    'RBRACE': '}',
-    'ASSIGN': '=',
-    'NEWLINE': 'NUEVALINEA',
-    'INDENT': 'INDENTACION',
-    'DEDENT': 'DEDENTACION',
-    'EOF': 'EOF',
-    'ID': 'identificador',
-    'INT': 'entero',
-    'FLOAT': 'flotante',
-    'STRING': 'cadena',
-    'BINOP': 'operador',
-}
-
-def token_a_terminal(token):
-    tipo = token.tipo
-    lex = token.lexema
-    if tipo == 'KEYWORD':
-        return f"KEYWORD_{lex}"
-    if tipo == 'OP' or tipo == 'CMP':
-        return 'BINOP'
-    return tipo
-
-def legible_de_terminal(terminal):
-    if terminal in LEGIBLE:
-        return LEGIBLE[terminal]
-    if terminal.startswith('KEYWORD_'):
-        return terminal.split('KEYWORD_', 1)[1]
-    return terminal
-
-def formatear_error_token(token, lista_esperados):
-    if lista_esperados == ['INDENTATION_ERROR']:
-        return f"<{token.linea}, {token.col}>Error sintactico: falla de indentacion"
-    lex = token.lexema.replace('"', '\\"')
-    esperados_fmt = ', '.join(f'"{e}"' for e in lista_esperados)
-    return f'<{token.linea}, {token.col}> Error sintactico: se encontro: "{lex}"; se esperaba: {esperados_fmt}.'
-
-def recopilar_esperados_para_no_terminal(no_terminal, tabla):
-    terminales_esperados = Tmod.terminales_esperados_para_no_terminal(no_terminal, tabla)
-    legibles = [legible_de_terminal(t) for t in terminales_esperados]
-    return legibles if legibles else [legible_de_terminal('EOF')]
-
-def analizar(tokens, tabla, gramatica, simbolo_inicial, depuracion=False):
-    from collections import deque
-
-    pila = deque()
-    pila.append('EOF')
-    pila.append(simbolo_inicial)
-
-    cursor = 0
-    n = len(tokens)
-    if n == 0:
-        return False, '<0, 0> Error sintactico: se encontro: ""; se esperaba: "EOF".'
-
-    if tokens[-1].tipo != 'EOF':
-        tokens = tokens + [Token('EOF', '<EOF>', tokens[-1].linea, tokens[-1].col + 1)]
-        n += 1
-
-    producciones_aplicadas = []
-
-    while pila:
-        tope = pila.pop()
-        actual = tokens[cursor]
-        terminal_actual = token_a_terminal(actual)
-
-        if depuracion:
-            print(f"[DEPURACION] pila_tope={tope}  actual=({cursor}){actual.tipo}:{actual.lexema}  terminal_actual={terminal_actual}")
-
-        if tope == EPS:
-            continue
-
-        if tope not in gramatica:
-            if tope == terminal_actual:
-                cursor += 1
-                if tope == 'EOF':
-                    return True, "El analisis sintactico ha finalizado exitosamente.", producciones_aplicadas
-                continue
-            else:
-                esperados = [legible_de_terminal(tope)]
-                mensaje = formatear_error_token(actual, esperados)
-                return False, mensaje, []
-        else:
-            clave = (tope, terminal_actual)
-            prod = tabla.get(clave)
-            if prod is None:
-                esperados = Tmod.terminales_esperados_para_no_terminal(tope, tabla)
-                esperados_legibles = [legible_de_terminal(t) for t in esperados] or [legible_de_terminal('EOF')]
-                mensaje = formatear_error_token(actual, esperados_legibles)
-                return False, mensaje, []
-            producciones_aplicadas.append((tope, prod))
-            for simb in reversed(prod):
-                if simb != EPS:
-                    pila.append(simb)
-
-        if cursor >= n:
-            ultimo = tokens[-1]
-            return False, formatear_error_token(ultimo, [legible_de_terminal('EOF')]), []
-
-    if cursor < n and tokens[cursor].tipo == 'EOF':
-        return True, "El analisis sintactico ha finalizado exitosamente.", producciones_aplicadas
-    if cursor >= n:
-        return True, "El analisis sintactico ha finalizado exitosamente.", producciones_aplicadas
-
-    actual = tokens[cursor]
-    return False, formatear_error_token(actual, [legible_de_terminal('EOF')]), []
-
-
-
-if __name__ == "__main__":
-    from lexer import tokenizar, ErrorLexer
-    import table as T
-    import grammar as G
-
-    fuente = """def foo(x):
-    if x > 0:
-        return x + 1
-    else:
-        return 0
-"""
-    try:
-        toks = tokenizar(fuente)
-    except ErrorLexer as e:
-        print("ErrorLexer:", e)
-        raise
-
-    try:
-        tabla_pred, FIRST, FOLLOW, SELECT = T.construir_tabla_predictiva(G.gramatica, G.SIMBOLO_INICIAL)
-    except Exception as e:
-        print("Error al construir tabla predictiva:", e)
-        raise
-
-    ok, mensaje = analizar(toks, tabla_pred, G.normalizar_gramatica_para_ll1(G.gramatica), G.SIMBOLO_INICIAL)
+from array import array
+from collections import deque
+import grammar as Gmod
+import errors as Emod
+import arbol as Amod
+import tabla_compilada as TCmod
+from lexer import Token, PALABRAS_CLAVE
+
+EPS = 'ε'
+MARCA_FIN = '$'
+
+LEGIBLE = {
+    'COLON': ':',
+    'COMMA': ',',
+    'DOT': '.',
+    'LPAR': '(',
+    'RPAR': ')',
+    'LBRACK': '[',
+    'RBRACK': ']',
+    'LBRACE': '{',
+    'RBRACE': '}',
+    'ASSIGN': '=',
+    'NEWLINE': 'NUEVALINEA',
+    'INDENT': 'INDENTACION',
+    'DEDENT': 'DEDENTACION',
+    'EOF': 'EOF',
+    'ID': 'identificador',
+    'INT': 'entero',
+    'FLOAT': 'flotante',
+    'STRING': 'cadena',
+    'BINOP': 'operador',
+}
+
+MENSAJE_EXITO = "El analisis sintactico ha finalizado exitosamente."
+MENSAJE_ENTRADA_VACIA = '<0, 0> Error sintactico: se encontro: ""; se esperaba: "EOF".'
+
+# Nombre de terminal de cada palabra clave, armado una sola vez.
+_TERMINALES_PALABRA_CLAVE = { lex: f"KEYWORD_{lex}" for lex in PALABRAS_CLAVE }
+
+def token_a_terminal(token):
+    tipo = token.tipo
+    lex = token.lexema
+    if tipo == 'KEYWORD':
+        return _TERMINALES_PALABRA_CLAVE.get(lex) or f"KEYWORD_{lex}"
+    if tipo == 'OP' or tipo == 'CMP':
+        return 'BINOP'
+    return tipo
+
+def legible_de_terminal(terminal):
+    if terminal in LEGIBLE:
+        return LEGIBLE[terminal]
+    if terminal.startswith('KEYWORD_'):
+        return terminal.split('KEYWORD_', 1)[1]
+    return terminal
+
+def formatear_error_token(token, lista_esperados):
+    if lista_esperados == ['INDENTATION_ERROR']:
+        return f"<{token.linea}, {token.col}>Error sintactico: falla de indentacion"
+    lex = token.lexema.replace('"', '\\"')
+    esperados_fmt = ', '.join(f'"{e}"' for e in lista_esperados)
+    return f'<{token.linea}, {token.col}> Error sintactico: se encontro: "{lex}"; se esperaba: {esperados_fmt}.'
+
+def recopilar_esperados_para_no_terminal(no_terminal, tabla):
+    return Emod.esperados_para_no_terminal(no_terminal, tabla)
+
+# Niveles de traza de las versiones compiladas del parser; el tercer elemento del
+# resultado depende del nivel:
+#  - "completa": lista de tuplas (A, prod), como analizar;
+#  - "ids": array con el id de cada producción aplicada (tc.producciones[p] es la tupla),
+#    2 bytes por producción; es lo que usan traza.EscritorTraza y la traza binaria;
+#  - "conteos": lista con cuántas veces se aplicó cada producción, sin guardar el orden;
+#  - "ninguna": lista vacía, sin registrar nada durante el análisis;
+#  - "arbol": un arbol.ArbolSintactico con el árbol sintáctico concreto (solo
+#    analizar_flujo y analizar_compilado).
+NIVELES_TRAZA = ("completa", "ids", "conteos", "ninguna", "arbol")
+
+def _preparar_traza(traza, tc):
+    # (registrar, contar, registro, valores): con registrar se hace registro.append(valores[p])
+    # en cada producción; con contar, registro[p] += 1.
+    if traza == "completa":
+        return True, False, [], tc.producciones
+    if traza == "ids":
+        return True, False, array(tipo_id_produccion(tc)), list(range(len(tc.producciones)))
+    if traza == "conteos":
+        return False, True, [0] * len(tc.producciones), None
+    if traza == "ninguna":
+        return False, False, [], None
+    if traza == "arbol":
+        raise ValueError("traza='arbol' solo la admiten analizar_flujo y analizar_compilado")
+    raise ValueError(f"Nivel de traza desconocido: {traza!r} (opciones: {', '.join(NIVELES_TRAZA)})")
+
+def tipo_id_produccion(tc):
+    return 'H' if len(tc.producciones) <= 0xFFFF else 'I'
+
+def analizar(tokens, tabla, gramatica, simbolo_inicial, depuracion=False, traza="completa"):
+    # Solo admite traza="completa" o "ninguna": los demás niveles usan los ids de
+    # producción de la tabla compilada.
+    if traza not in ("completa", "ninguna"):
+        raise ValueError(f"analizar solo admite traza 'completa' o 'ninguna', no {traza!r}")
+    registrar = traza == "completa"
+
+    pila = deque()
+    pila.append('EOF')
+    pila.append(simbolo_inicial)
+
+    cursor = 0
+    n = len(tokens)
+    if n == 0:
+        return False, MENSAJE_ENTRADA_VACIA
+
+    if tokens[-1].tipo != 'EOF':
+        tokens = tokens + [Token('EOF', '<EOF>', tokens[-1].linea, tokens[-1].col + 1)]
+        n += 1
+
+    producciones_aplicadas = []
+
+    while pila:
+        tope = pila.pop()
+        actual = tokens[cursor]
+        terminal_actual = token_a_terminal(actual)
+
+        if depuracion:
+            print(f"[DEPURACION] pila_tope={tope}  actual=({cursor}){actual.tipo}:{actual.lexema}  terminal_actual={terminal_actual}")
+
+        if tope == EPS:
+            continue
+
+        if tope not in gramatica:
+            if tope == terminal_actual:
+                cursor += 1
+                if tope == 'EOF':
+                    return True, MENSAJE_EXITO, producciones_aplicadas
+                continue
+            else:
+                esperados = [legible_de_terminal(tope)]
+                mensaje = formatear_error_token(actual, esperados)
+                return False, mensaje, []
+        else:
+            clave = (tope, terminal_actual)
+            prod = tabla.get(clave)
+            if prod is None:
+                mensaje = formatear_error_token(actual, Emod.esperados_para_no_terminal(tope, tabla))
+                return False, mensaje, []
+            if registrar:
+                producciones_aplicadas.append((tope, prod))
+            for simb in reversed(prod):
+                if simb != EPS:
+                    pila.append(simb)
+
+        if cursor >= n:
+            ultimo = tokens[-1]
+            return False, formatear_error_token(ultimo, [legible_de_terminal('EOF')]), []
+
+    if cursor < n and tokens[cursor].tipo == 'EOF':
+        return True, MENSAJE_EXITO, producciones_aplicadas
+    if cursor >= n:
+        return True, MENSAJE_EXITO, producciones_aplicadas
+
+    actual = tokens[cursor]
+    return False, formatear_error_token(actual, [legible_de_terminal('EOF')]), []
+
+def analizar_compilado(tokens, tc, traza="completa"):
+    # Mismo algoritmo que analizar, pero sobre la TablaCompilada de tabla_compilada.py:
+    # la pila guarda enteros, la tabla es un array plano y los cuerpos ya vienen invertidos.
+    resultado = analizar_flujo(iter(tokens), tc, traza)
+    if traza == "arbol" and resultado[0]:
+        resultado[2].tokens = tokens
+    return resultado
+
+def analizar_flujo(tokens, tc, traza="completa", estadisticas=None):
+    # Versión de analizar_compilado que consume un iterador de tokens con un solo token
+    # de anticipación (p. ej. lexer.tokenizar_flujo), así que la memoria queda acotada
+    # por la profundidad de la pila. `traza` es uno de NIVELES_TRAZA.
+    # Con un estadisticas.Estadisticas se usa _analizar_con_ganchos, que lleva los contadores.
+    if traza == "arbol":
+        return _analizar_flujo_arbol(tokens, tc, estadisticas)
+    if estadisticas is not None:
+        return _analizar_con_ganchos(_LectorFlujo(tokens, tc), tc, traza, estadisticas)
+    actual = next(tokens, None)
+    if actual is None:
+        return False, MENSAJE_ENTRADA_VACIA
+
+    base = tc.num_terminales + 1
+    id_eof = tc.id_eof
+    desconocido = tc.id_desconocido
+    filas = tc.filas
+    matriz = tc.matriz
+    cuerpos = tc.cuerpos_invertidos
+    ids_por_tipo = tc.ids_por_tipo
+    ids_palabras = tc.ids_palabras_clave
+    registrar, contar, producciones_aplicadas, valores = _preparar_traza(traza, tc)
+
+    pila = [id_eof, tc.id_inicial]
+    if actual.tipo == 'KEYWORD':
+        terminal_actual = ids_palabras.get(actual.lexema, desconocido)
+    else:
+        terminal_actual = ids_por_tipo.get(actual.tipo, desconocido)
+
+    while pila:
+        tope = pila.pop()
+        if tope < base:
+            if tope != terminal_actual:
+                return False, formatear_error_token(actual, tc.esperados[tope]), []
+            if tope == id_eof:
+                return True, MENSAJE_EXITO, producciones_aplicadas
+            siguiente = next(tokens, None)
+            if siguiente is None:
+                # La secuencia terminó sin EOF: se agrega uno, igual que analizar.
+                siguiente = Token('EOF', '<EOF>', actual.linea, actual.col + 1)
+            actual = siguiente
+            if actual.tipo == 'KEYWORD':
+                terminal_actual = ids_palabras.get(actual.lexema, desconocido)
+            else:
+                terminal_actual = ids_por_tipo.get(actual.tipo, desconocido)
+        else:
+            p = matriz[filas[tope] + terminal_actual]
+            if p < 0:
+                return False, formatear_error_token(actual, tc.esperados[tope]), []
+            if registrar:
+                producciones_aplicadas.append(valores[p])
+            elif contar:
+                producciones_aplicadas[p] += 1
+            pila.extend(cuerpos[p])
+
+    return False, formatear_error_token(actual, [legible_de_terminal('EOF')]), []
+
+class _LectorFlujo:
+    # Tokens de un iterador con uno de anticipación, para _analizar_con_ganchos:
+    # `terminal` es el id del token actual (None si no hay ninguno), `cursor` su índice y
+    # avanzar() pasa al siguiente y devuelve su id.
+    def __init__(self, tokens, tc):
+        self.tokens = tokens
+        self.tc = tc
+        self.cursor = 0
+        self.actual = next(tokens, None)
+        self.terminal = None if self.actual is None else TCmod.id_de_token(self.actual, tc)
+
+    def avanzar(self):
+        siguiente = next(self.tokens, None)
+        if siguiente is None:
+            siguiente = Token('EOF', '<EOF>', self.actual.linea, self.actual.col + 1)
+        self.actual = siguiente
+        self.cursor += 1
+        self.terminal = TCmod.id_de_token(siguiente, self.tc)
+        return self.terminal
+
+    def token(self):
+        return self.actual
+
+class _LectorBuffer:
+    # Los tokens de un lexer.BufferTokens, con la misma interfaz que _LectorFlujo.
+    def __init__(self, buffer, tc):
+        self.buffer = buffer
+        self.ids = buffer.ids_terminales(tc)
+        self.cursor = 0
+        self.terminal = self.ids[0] if self.ids else None
+
+    def avanzar(self):
+        self.cursor += 1
+        self.terminal = self.ids[self.cursor]
+        return self.terminal
+
+    def token(self):
+        return self.buffer[self.cursor]
+
+def _analizar_con_ganchos(lector, tc, traza, estadisticas=None, observador=None):
+    # El ciclo de analizar_flujo sobre un lector de tokens, para los caminos que no son
+    # el ciclo rápido. Con un estadisticas.Estadisticas cuenta tokens consumidos,
+    # apilados, desapilados, producciones aplicadas y la profundidad máxima de la pila.
+    # `observador` es un dict {id de producción: función}: al aplicar una producción p
+    # que está en él se llama a observador[p](cursor) con el índice del token de
+    # anticipación (el primero que cubre la producción). Lo usan pasadas que necesitan
+    # posiciones sin armar el árbol (indice_simbolos.py).
+    if lector.terminal is None:
+        return False, MENSAJE_ENTRADA_VACIA
+
+    base = tc.num_terminales + 1
+    id_eof = tc.id_eof
+    filas = tc.filas
+    matriz = tc.matriz
+    cuerpos = tc.cuerpos_invertidos
+    registrar, contar, producciones_aplicadas, valores = _preparar_traza(traza, tc)
+    avisos = None if observador is None else [observador.get(p) for p in range(len(tc.producciones))]
+
+    avanzar = lector.avanzar
+    terminal_actual = lector.terminal
+    pila = [id_eof, tc.id_inicial]
+    desapilados = 0
+    apilados = 2
+    aplicadas = 0
+    profundidad_maxima = 2
+
+    try:
+        while pila:
+            tope = pila.pop()
+            desapilados += 1
+            if tope < base:
+                if tope != terminal_actual:
+                    return False, formatear_error_token(lector.token(), tc.esperados[tope]), []
+                if tope == id_eof:
+                    return True, MENSAJE_EXITO, producciones_aplicadas
+                terminal_actual = avanzar()
+            else:
+                p = matriz[filas[tope] + terminal_actual]
+                if p < 0:
+                    return False, formatear_error_token(lector.token(), tc.esperados[tope]), []
+                if registrar:
+                    producciones_aplicadas.append(valores[p])
+                elif contar:
+                    producciones_aplicadas[p] += 1
+                aplicadas += 1
+                if avisos is not None and avisos[p] is not None:
+                    avisos[p](lector.cursor)
+                cuerpo = cuerpos[p]
+                pila.extend(cuerpo)
+                apilados += len(cuerpo)
+                if len(pila) > profundidad_maxima:
+                    profundidad_maxima = len(pila)
+
+        return False, formatear_error_token(lector.token(), [legible_de_terminal('EOF')]), []
+    finally:
+        if estadisticas is not None:
+            estadisticas.contar("tokens_consumidos", lector.cursor + 1)
+            estadisticas.contar("apilados", apilados)
+            estadisticas.contar("desapilados", desapilados)
+            estadisticas.contar("producciones_aplicadas", aplicadas)
+            estadisticas.maximo("profundidad_maxima_pila", profundidad_maxima)
+
+_BLOQUE_NODOS = 1 << 16
+
+def _cuerpos_en_orden(tc):
+    return [array('H', reversed(cuerpo)) for cuerpo in tc.cuerpos_invertidos]
+
+def _analizar_flujo_arbol(tokens, tc, estadisticas=None):
+    # Copia de analizar_flujo que arma un arbol.ArbolSintactico. La pila guarda números
+    # de nodo en lugar de símbolos (el símbolo está en simbolos[nodo]); al expandir un no
+    # terminal sus hijos se agregan juntos al final de simbolos. Los otros arreglos se
+    # agrandan de a _BLOQUE_NODOS y se recortan al final, para no extender cuatro
+    # arreglos en cada expansión. El centinela EOF del fondo de la pila se reemplaza por
+    # el chequeo después del ciclo.
+    actual = next(tokens, None)
+    if actual is None:
+        return False, MENSAJE_ENTRADA_VACIA
+
+    base = tc.num_terminales + 1
+    id_eof = tc.id_eof
+    desconocido = tc.id_desconocido
+    filas = tc.filas
+    matriz = tc.matriz
+    ids_por_tipo = tc.ids_por_tipo
+    ids_palabras = tc.ids_palabras_clave
+    hijos_por_produccion = _cuerpos_en_orden(tc)
+    bloque_producciones = array('h', [-1]) * _BLOQUE_NODOS
+    bloque_inicios = array('I', bytes(4 * _BLOQUE_NODOS))
+    bloque_primeros = array('i', [-1]) * _BLOQUE_NODOS
+
+    simbolos = array('H', [tc.id_inicial])
+    producciones = array('h', bloque_producciones)
+    inicios = array('I', bloque_inicios)
+    primeros_hijos = array('i', bloque_primeros)
+    capacidad = _BLOQUE_NODOS
+    pila = [0]
+    cursor = 0
+    if actual.tipo == 'KEYWORD':
+        terminal_actual = ids_palabras.get(actual.lexema, desconocido)
+    else:
+        terminal_actual = ids_por_tipo.get(actual.tipo, desconocido)
+
+    def terminado():
+        n = len(simbolos)
+        del producciones[n:], inicios[n:], primeros_hijos[n:]
+        if estadisticas is not None:
+            estadisticas.contar("tokens_consumidos", cursor + 1)
+            estadisticas.contar("nodos_arbol", n)
+        arbol = Amod.ArbolSintactico(tc, simbolos, producciones, inicios, primeros_hijos)
+        return True, MENSAJE_EXITO, arbol
+
+    while pila:
+        nodo = pila.pop()
+        tope = simbolos[nodo]
+        if tope < base:
+            if tope != terminal_actual:
+                return False, formatear_error_token(actual, tc.esperados[tope]), []
+            inicios[nodo] = cursor
+            if tope == id_eof:
+                return terminado()
+            siguiente = next(tokens, None)
+            if siguiente is None:
+                siguiente = Token('EOF', '<EOF>', actual.linea, actual.col + 1)
+            actual = siguiente
+            cursor += 1
+            if actual.tipo == 'KEYWORD':
+                terminal_actual = ids_palabras.get(actual.lexema, desconocido)
+            else:
+                terminal_actual = ids_por_tipo.get(actual.tipo, desconocido)
+        else:
+            p = matriz[filas[tope] + terminal_actual]
+            if p < 0:
+                return False, formatear_error_token(actual, tc.esperados[tope]), []
+            producciones[nodo] = p
+            inicios[nodo] = cursor
+            hijos = hijos_por_produccion[p]
+            if hijos:
+                primero = len(simbolos)
+                primeros_hijos[nodo] = primero
+                simbolos.extend(hijos)
+                if len(simbolos) > capacidad:
+                    producciones.extend(bloque_producciones)
+                    inicios.extend(bloque_inicios)
+                    primeros_hijos.extend(bloque_primeros)
+                    capacidad += _BLOQUE_NODOS
+                pila.extend(range(len(simbolos) - 1, primero - 1, -1))
+
+    if terminal_actual != id_eof:
+        return False, formatear_error_token(actual, tc.esperados[id_eof]), []
+    return terminado()
+
+def analizar_buffer(buffer, tc, traza="completa", observador=None, estadisticas=None):
+    # Versión de analizar_flujo sobre un lexer.BufferTokens: los ids de terminal salen
+    # todos juntos de buffer.ids_terminales y solo se arma un Token para el mensaje de error.
+    # Con un `observador` ({id de producción: función}) o un estadisticas.Estadisticas se
+    # usa _analizar_con_ganchos, con los mismos contadores que analizar_flujo.
+    if observador is not None or estadisticas is not None:
+        return _analizar_con_ganchos(_LectorBuffer(buffer, tc), tc, traza, estadisticas, observador)
+    ids = buffer.ids_terminales(tc)
+    if not ids:
+        return False, MENSAJE_ENTRADA_VACIA
+
+    base = tc.num_terminales + 1
+    id_eof = tc.id_eof
+    filas = tc.filas
+    matriz = tc.matriz
+    cuerpos = tc.cuerpos_invertidos
+    registrar, contar, producciones_aplicadas, valores = _preparar_traza(traza, tc)
+
+    pila = [id_eof, tc.id_inicial]
+    cursor = 0
+    terminal_actual = ids[0]
+
+    while pila:
+        tope = pila.pop()
+        if tope < base:
+            if tope != terminal_actual:
+                return False, formatear_error_token(buffer[cursor], tc.esperados[tope]), []
+            if tope == id_eof:
+                return True, MENSAJE_EXITO, producciones_aplicadas
+            cursor += 1
+            terminal_actual = ids[cursor]
+        else:
+            p = matriz[filas[tope] + terminal_actual]
+            if p < 0:
+                return False, formatear_error_token(buffer[cursor], tc.esperados[tope]), []
+            if registrar:
+                producciones_aplicadas.append(valores[p])
+            elif contar:
+                producciones_aplicadas[p] += 1
+            pila.extend(cuerpos[p])
+
+    return False, formatear_error_token(buffer[cursor], [legible_de_terminal('EOF')]), []
+
+def _informacion_error(token, lista_esperados):
+    mensaje = formatear_error_token(token, lista_esperados)
+    return Emod.InformacionErrorSintactico(token.linea, token.col, token.lexema, lista_esperados, mensaje)
+
+def analizar_recuperando(tokens, tc, traza="completa"):
+    # Recuperación en modo pánico: cada error se registra y el análisis sigue hasta EOF.
+    #  - terminal que no coincide: se descarta de la pila (como si se hubiera insertado);
+    #  - no terminal sin producción: se saltan tokens hasta uno que lo inicie (se reintenta)
+    #    o que esté en tc.sincronizacion (SIGUIENTES más NEWLINE/DEDENT/EOF; se descarta).
+    # Para no reportar errores en cascada, después de un error no se registra otro hasta
+    # que se haya consumido algún token. Devuelve (errores, producciones_aplicadas) con
+    # errores como lista de errors.InformacionErrorSintactico; la traza solo es válida
+    # si no hubo errores.
+    tokens = iter(tokens)
+    actual = next(tokens, None)
+    if actual is None:
+        return [_informacion_error(Token('', '', 0, 0), ['EOF'])], []
+
+    base = tc.num_terminales + 1
+    id_eof = tc.id_eof
+    desconocido = tc.id_desconocido
+    filas = tc.filas
+    matriz = tc.matriz
+    cuerpos = tc.cuerpos_invertidos
+    sincronizacion = tc.sincronizacion
+    ids_por_tipo = tc.ids_por_tipo
+    ids_palabras = tc.ids_palabras_clave
+    registrar, contar, producciones_aplicadas, valores = _preparar_traza(traza, tc)
+
+    def id_de(token):
+        if token.tipo == 'KEYWORD':
+            return ids_palabras.get(token.lexema, desconocido)
+        return ids_por_tipo.get(token.tipo, desconocido)
+
+    def avanzar(actual):
+        siguiente = next(tokens, None)
+        if siguiente is None:
+            siguiente = Token('EOF', '<EOF>', actual.linea, actual.col + 1)
+        return siguiente
+
+    pila = [id_eof, tc.id_inicial]
+    errores = []
+    consumidos = 0
+    consumidos_en_error = -1
+    terminal_actual = id_de(actual)
+
+    while True:
+        tope = pila.pop()
+        if tope < base:
+            if tope == terminal_actual:
+                if tope == id_eof:
+                    return errores, producciones_aplicadas
+                actual = avanzar(actual)
+                terminal_actual = id_de(actual)
+                consumidos += 1
+                continue
+            if consumidos > consumidos_en_error:
+                errores.append(_informacion_error(actual, tc.esperados[tope]))
+                consumidos_en_error = consumidos
+            if tope == id_eof:
+                # Sobra entrada después del programa: se descarta el token y se vuelve a empezar.
+                actual = avanzar(actual)
+                terminal_actual = id_de(actual)
+                pila.extend((id_eof, tc.id_inicial))
+            continue
+
+        p = matriz[filas[tope] + terminal_actual]
+        if p < 0:
+            if consumidos > consumidos_en_error:
+                errores.append(_informacion_error(actual, tc.esperados[tope]))
+                consumidos_en_error = consumidos
+            sinc = sincronizacion[tope]
+            while terminal_actual not in sinc and matriz[filas[tope] + terminal_actual] < 0:
+                actual = avanzar(actual)
+                terminal_actual = id_de(actual)
+            p = matriz[filas[tope] + terminal_actual]
+            if p < 0:
+                continue
+        if registrar:
+            producciones_aplicadas.append(valores[p])
+        elif contar:
+            producciones_aplicadas[p] += 1
+        pila.extend(cuerpos[p])
+
+if __name__ == "__main__":
+    from lexer import tokenizar, ErrorLexer
+    import cache_tabla as Cmod
+    import grammar as G
+
+    fuente = """def foo(x):
+    if x > 0:
+        return x + 1
+    else:
+        return 0
+"""
+    try:
+        toks = tokenizar(fuente)
+    except ErrorLexer as e:
+        print("ErrorLexer:", e)
+        raise
+
+    try:
+        gc = Cmod.gramatica_compilada()
+    except Exception as e:
+        print("Error al construir tabla predictiva:", e)
+        raise
+
+    ok, mensaje = analizar(toks, gc.tabla, gc.gramatica_norm, G.SIMBOLO_INICIAL)[:2]
     print(mensaje)
\ No newline at end of file
@@ -0,0 +1,330 @@
+import argparse
+import re
+import sys
+import time
+from bisect import bisect_left
+from collections import namedtuple
+import main as Mmod
+import parser as Pmod
+from lexer import tokenizar_compacto, tokenizar_linea, ErrorLexer, LineasFuente, _PATRON_BLANCO, _PATRON_LINEA_COMENTARIO, _PATRON_ESPACIOS, _PATRON_SIN_ILEGALES
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Prevalidación vectorizada con NumPy (opcional): antes de lexear, una pasada sobre los
+# códigos de la fuente calcula con operaciones sobre arreglos el comienzo de cada línea,
+# el ancho de su sangría (tabulación = 4, como el lexer), si es blanca o solo un
+# comentario, dónde están las cadenas entre comillas dobles, si fuera de ellas hay algún
+# carácter que podría dar un error léxico y el balance de paréntesis, corchetes y llaves.
+# Con eso:
+#  - la sangría se verifica recorriendo solo las líneas donde cambia el ancho. El primer
+#    error léxico del archivo es el de sangría o uno anterior en alguna línea "dudosa"
+#    (comillas simples, barras invertidas, caracteres raros), y solo esas se revisan;
+#  - si el archivo no tiene errores léxicos y una línea sin nada dudoso deja un
+#    paréntesis abierto o cierra uno de más, el análisis falla en esa línea o antes (el
+#    lexer no une líneas): se analiza solo hasta ella, y se comprueba que el error
+#    quede antes del final agregado;
+#  - si no, se lexea con los datos por línea ya calculados (lexer.LineasFuente).
+# El resultado es siempre el de main.analizar_fuente, mensajes incluidos, pero un
+# archivo con un error se rechaza sin lexear todo lo que sigue. Sin NumPy, o si la
+# fuente usa separadores de línea que no sean \n, se analiza como siempre.
+
+# Separadores de línea del lexer además de \n (U+2028 y U+2029 se buscan aparte).
+_OTROS_SEPARADORES = (0x0b, 0x0c, 0x1c, 0x1d, 0x1e, 0x85)
+_LINEA_DEL_MENSAJE = re.compile(r'<(\d+), \d+>')
+
+BLANCA, CODIGO, COMENTARIO = 0, 1, 2
+
+# Caracteres que fuera de una cadena nunca producen un error léxico (! solo seguido de
+# =, aparte). La comilla doble está porque las cadenas se ubican por paridad.
+_SEGUROS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_ \t+-*/%=<>:,.()[]{}\""
+
+# Caracteres cuya posición se necesita; son pocos, así que después de una pasada sobre
+# la fuente se trabaja solo con sus posiciones.
+_ESPECIALES = "\n\t\"\\!()[]{}"
+
+# Hasta este ancho la sangría se mide con arreglos, un carácter por vuelta; las líneas
+# con más sangría se terminan de medir con el patrón del lexer. También es el máximo de
+# anchos distintos que se revisan con arreglos al buscar errores de sangría.
+_MAX_VUELTAS_SANGRIA = 64
+
+# lineas: LineasFuente para el lexer; sangria: (índice de línea, ancho, esperado) del
+# primer error de sangría o None; dudosas: índices de las líneas de código que hay que
+# lexear para saber si tienen un error léxico; desbalanceada: índice de la primera línea
+# sin nada dudoso con paréntesis, corchetes o llaves desbalanceados fuera de las
+# cadenas y comentarios, o None.
+Prevalidacion = namedtuple("Prevalidacion", ["lineas", "sangria", "dudosas", "desbalanceada"])
+
+_tablas_cache = None
+
+def disponible():
+    return np is not None
+
+def _tablas():
+    seguros = np.zeros(256, dtype=bool)
+    seguros[[ord(c) for c in _SEGUROS]] = True
+    especiales = np.zeros(256, dtype=bool)
+    especiales[[ord(c) for c in _ESPECIALES] + list(_OTROS_SEPARADORES)] = True
+    return seguros, especiales
+
+def _codigos(fuente):
+    # Un elemento por carácter de la fuente, así los índices coinciden con los de la cadena.
+    if fuente.isascii():
+        return np.frombuffer(fuente.encode("ascii"), dtype=np.uint8)
+    return np.frombuffer(fuente.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+
+def _linea_de(posiciones, inicios):
+    # Índice de la línea de cada posición.
+    return np.searchsorted(inicios, posiciones, "right") - 1
+
+def _fines_de_sangria(fuente, codigos, inicios, fines):
+    # Primer carácter de cada línea que no es espacio ni tabulación (o el fin de la línea).
+    total = len(codigos)
+    fines_sangria = inicios.copy()
+    activas = np.flatnonzero(fines_sangria < fines)
+    for _ in range(_MAX_VUELTAS_SANGRIA):
+        if len(activas) == 0:
+            return fines_sangria
+        c = codigos[np.minimum(fines_sangria[activas], total - 1)]
+        activas = activas[((c == 32) | (c == 9)) & (fines_sangria[activas] < fines[activas])]
+        fines_sangria[activas] += 1
+    for k in activas.tolist():
+        fines_sangria[k] = min(_PATRON_ESPACIOS.match(fuente, int(fines_sangria[k])).end(), int(fines[k]))
+    return fines_sangria
+
+def _primer_error_de_sangria(numeros, anchos):
+    # Antes del primer error, la pila de sangría del lexer en una línea que retrocede a
+    # un ancho w tiene como mayor nivel <= w el ancho de la última línea anterior con
+    # ancho <= w (o 0 si no hay): la línea es válida si ese ancho es w. Se calcula por
+    # cada ancho distinto al que se retrocede; si son demasiados se simula la pila.
+    if len(anchos) == 0:
+        return None
+    retroceden = np.flatnonzero(anchos[1:] < anchos[:-1]) + 1
+    distintos = np.unique(anchos[retroceden])
+    if len(distintos) > _MAX_VUELTAS_SANGRIA:
+        return _simular_pila_de_sangria(numeros, anchos)
+    indices = np.arange(len(anchos))
+    primero = None
+    for ancho in distintos.tolist():
+        lineas = retroceden[anchos[retroceden] == ancho]
+        ultimas = np.maximum.accumulate(np.where(anchos <= ancho, indices, -1))
+        anteriores = ultimas[lineas - 1]
+        esperados = np.where(anteriores >= 0, anchos[np.maximum(anteriores, 0)], 0)
+        invalidas = np.flatnonzero(esperados != ancho)
+        if len(invalidas) and (primero is None or lineas[invalidas[0]] < primero[0]):
+            k = invalidas[0]
+            primero = (int(lineas[k]), ancho, int(esperados[k]))
+    if primero is None:
+        return None
+    k, ancho, esperado = primero
+    return int(numeros[k]), ancho, esperado
+
+def _simular_pila_de_sangria(numeros, anchos):
+    # La pila del lexer, recorriendo solo las líneas donde cambia el ancho.
+    cambios = np.flatnonzero(np.diff(anchos)) + 1
+    if anchos[0] != 0:
+        cambios = np.concatenate(([0], cambios))
+    pila = [0]
+    for k, ancho in zip(cambios.tolist(), anchos[cambios].tolist()):
+        if ancho > pila[-1]:
+            pila.append(ancho)
+            continue
+        while ancho < pila[-1]:
+            pila.pop()
+        if ancho != pila[-1]:
+            return int(numeros[k]), ancho, pila[-1]
+    return None
+
+def prevalidar(fuente):
+    # Prevalidacion de la fuente (ya sin \r), o None sin NumPy, si está vacía o si usa
+    # otros separadores.
+    global _tablas_cache
+    if np is None or not fuente:
+        return None
+    if _tablas_cache is None:
+        _tablas_cache = _tablas()
+    seguros, especiales = _tablas_cache
+
+    codigos = _codigos(fuente)
+    total = len(codigos)
+    acotados = codigos if codigos.dtype == np.uint8 else np.minimum(codigos, 255).astype(np.uint8)
+    posiciones = np.flatnonzero(especiales[acotados])
+    codigos_especiales = codigos[posiciones]
+    if np.isin(codigos_especiales, _OTROS_SEPARADORES).any():
+        return None
+    if codigos.dtype != np.uint8 and ((codigos == 0x2028) | (codigos == 0x2029)).any():
+        return None
+    de_caracter = lambda c: posiciones[codigos_especiales == ord(c)]
+
+    inicios = np.concatenate(([0], de_caracter('\n') + 1))
+    if inicios[-1] == total:
+        inicios = inicios[:-1]
+    cantidad = len(inicios)
+    fines = np.append(inicios[1:], total)
+    fines_contenido = fines - (codigos[fines - 1] == 10)
+
+    # Sangría: las tabulaciones son pocas, se cuentan por posición.
+    fines_sangria = _fines_de_sangria(fuente, codigos, inicios, fines_contenido)
+    anchos = fines_sangria - inicios
+    tabulaciones = de_caracter('\t')
+    if len(tabulaciones):
+        lineas_tab = _linea_de(tabulaciones, inicios)
+        en_sangria = tabulaciones < fines_sangria[lineas_tab]
+        anchos += 3 * np.bincount(lineas_tab[en_sangria], minlength=cantidad)
+
+    primeros = np.where(fines_sangria < total, codigos[np.minimum(fines_sangria, total - 1)], 10)
+    clases = np.full(cantidad, CODIGO, dtype=np.int8)
+    clases[primeros == 10] = BLANCA
+    clases[primeros == ord('#')] = COMENTARIO
+    # Primer carácter de control o no ASCII: se clasifica con los patrones del lexer.
+    raras = np.flatnonzero((primeros != 10) & ((primeros < 33) | (primeros > 126)))
+    for k in raras.tolist():
+        inicio, fin = int(inicios[k]), int(fines[k])
+        if _PATRON_BLANCO.fullmatch(fuente, inicio, fin):
+            clases[k] = BLANCA
+        elif _PATRON_LINEA_COMENTARIO.match(fuente, int(fines_sangria[k]), fin):
+            clases[k] = COMENTARIO
+    de_codigo = clases == CODIGO
+
+    # Cadenas entre comillas dobles: dentro de una cadena la cantidad de comillas desde el
+    # comienzo es impar. Una línea con cantidad impar queda dudosa y se le agrega una
+    # comilla al final, así la paridad vuelve a empezar en la línea siguiente.
+    comillas = de_caracter('"')
+    impares = np.zeros(cantidad, dtype=bool)
+    inseguros = ~seguros[acotados]
+    if len(comillas):
+        impares = (np.bincount(_linea_de(comillas, inicios), minlength=cantidad) & 1).astype(bool)
+        marcas = np.zeros(total + 1, dtype=np.uint8)
+        marcas[comillas] = 1
+        marcas[fines_contenido[impares]] = 1
+        dentro = np.cumsum(marcas[:total], dtype=np.uint8)
+        dentro &= 1
+        inseguros &= ~dentro.view(bool)
+    # La barra invertida cambia dónde cierra una cadena: siempre es dudosa.
+    inseguros[de_caracter('\\')] = True
+    admiracion = de_caracter('!')
+    admiracion = admiracion[admiracion + 1 < total]
+    inseguros[admiracion[codigos[admiracion + 1] == ord('=')]] = False
+
+    # Primer carácter inseguro de cada línea: si es # empieza un comentario y el código
+    # termina ahí; cualquier otro hace la línea dudosa.
+    posiciones_inseguras = np.append(np.flatnonzero(inseguros), total)
+    primeros_inseguros = posiciones_inseguras[np.searchsorted(posiciones_inseguras, fines_sangria)]
+    hay_inseguro = primeros_inseguros < fines_contenido
+    es_comentario = hay_inseguro & (codigos[np.minimum(primeros_inseguros, total - 1)] == ord('#'))
+    fines_codigo = np.where(hay_inseguro, primeros_inseguros, fines_contenido)
+    dudosas = de_codigo & ((hay_inseguro & ~es_comentario) | impares)
+
+    # Balance de cada par fuera de las cadenas y comentarios, en las líneas no dudosas.
+    desbalanceadas = np.zeros(cantidad, dtype=bool)
+    limpias = de_codigo & ~dudosas
+    for abre, cierra in ("()", "[]", "{}"):
+        balance = np.zeros(cantidad, dtype=np.int64)
+        for caracter, signo in ((abre, 1), (cierra, -1)):
+            del_par = de_caracter(caracter)
+            if len(del_par) == 0:
+                continue
+            lineas_par = _linea_de(del_par, inicios)
+            validas = (del_par < fines_codigo[lineas_par]) & (del_par >= fines_sangria[lineas_par])
+            if len(comillas):
+                validas &= ~dentro[del_par].view(bool)
+            balance += signo * np.bincount(lineas_par[validas], minlength=cantidad)
+        desbalanceadas |= balance != 0
+    desbalanceadas &= limpias
+    primera_desbalanceada = np.flatnonzero(desbalanceadas)
+
+    no_vacias = np.flatnonzero(clases != BLANCA)
+    lineas = LineasFuente(no_vacias.tolist(), inicios[no_vacias].tolist(), fines[no_vacias].tolist(),
+                          fines_sangria[no_vacias].tolist(), anchos[no_vacias].tolist(), cantidad)
+    return Prevalidacion(
+        lineas,
+        _primer_error_de_sangria(no_vacias, anchos[no_vacias]),
+        np.flatnonzero(dudosas),
+        int(primera_desbalanceada[0]) if len(primera_desbalanceada) else None,
+    )
+
+def primer_error_lexer(fuente, prevalidacion):
+    # Mensaje de ErrorLexer del primer error léxico del archivo, o None si no tiene.
+    lineas = prevalidacion.lineas
+    limite = lineas.cantidad if prevalidacion.sangria is None else prevalidacion.sangria[0]
+    dudosas = prevalidacion.dudosas
+    sin_ilegales = _PATRON_SIN_ILEGALES.fullmatch
+    for k in dudosas[dudosas < limite].tolist():
+        i = bisect_left(lineas.numeros, k)
+        fin = lineas.fines[i]
+        if sin_ilegales(fuente, lineas.fines_sangria[i], fin - 1 if fuente[fin - 1] == '\n' else fin):
+            continue
+        # Con la pila en el ancho de la propia línea solo se revisan sus tokens.
+        try:
+            tokenizar_linea(fuente, lineas.inicios[i], lineas.fines[i], lineas.numeros[i] + 1, [lineas.anchos[i]])
+        except ErrorLexer as e:
+            return str(e)
+    if prevalidacion.sangria is not None:
+        k, ancho, esperado = prevalidacion.sangria
+        return f"Error de sangría en línea {k + 1}. Nivel actual: {ancho}, Esperado: {esperado}"
+    return None
+
+def _analizar_hasta(fuente, fin, linea, tc):
+    # Analiza fuente[:fin]; devuelve el mensaje si falla en la línea `linea` o antes
+    # (y por lo tanto igual que el archivo completo), o None.
+    ok, mensaje, _ = Mmod.normalizar_resultado(Pmod.analizar_buffer(tokenizar_compacto(fuente[:fin]), tc, "ninguna"))
+    if ok:
+        return None
+    m = _LINEA_DEL_MENSAJE.match(mensaje)
+    return mensaje if m is not None and int(m.group(1)) <= linea else None
+
+def analizar_prevalidando(fuente, tc, traza="completa"):
+    # Mismo resultado (ok, mensaje, aplicadas) que main.analizar_fuente(fuente, tc, traza).
+    if '\r' in fuente:
+        fuente = fuente.replace('\r\n', '\n').replace('\r', '\n')
+    prevalidacion = prevalidar(fuente) if traza != "arbol" else None
+    if prevalidacion is None:
+        return Mmod.analizar_fuente(fuente, tc, traza)
+    lineas = prevalidacion.lineas
+    try:
+        if prevalidacion.sangria is not None or prevalidacion.desbalanceada is not None:
+            error = primer_error_lexer(fuente, prevalidacion)
+            if error is not None:
+                return False, Mmod.formatear_error_lexer(ErrorLexer(error)), []
+            k = prevalidacion.desbalanceada
+            if k is not None:
+                i = bisect_left(lineas.numeros, k)
+                mensaje = _analizar_hasta(fuente, lineas.fines[i], k + 1, tc)
+                if mensaje is not None:
+                    return False, mensaje, []
+        try:
+            buffer = tokenizar_compacto(fuente, lineas=lineas)
+        except ErrorLexer as e:
+            return False, Mmod.formatear_error_lexer(e), []
+        return Mmod.normalizar_resultado(Pmod.analizar_buffer(buffer, tc, traza))
+    except Exception as e:
+        return False, f"ANALIZADOR LANZÓ EXCEPCIÓN: {e}", []
+
+def principal(argv=None):
+    analizador = argparse.ArgumentParser(description="Prevalida un archivo (sangría y paréntesis) sin analizarlo.")
+    analizador.add_argument("archivo")
+    args = analizador.parse_args(argv)
+    if np is None:
+        print("La prevalidación necesita NumPy (pip install numpy).", file=sys.stderr)
+        return 2
+    with open(args.archivo, "r", encoding="utf-8") as f:
+        fuente = f.read()
+    inicio = time.perf_counter()
+    prevalidacion = prevalidar(fuente)
+    if prevalidacion is None:
+        print("La fuente usa separadores de línea que la prevalidación no admite.", file=sys.stderr)
+        return 2
+    error = primer_error_lexer(fuente, prevalidacion)
+    transcurrido = time.perf_counter() - inicio
+    print(f"{prevalidacion.lineas.cantidad} líneas, {len(prevalidacion.dudosas)} para lexear aparte ({transcurrido * 1000:.1f} ms)")
+    if error is not None:
+        print(error)
+    if prevalidacion.desbalanceada is not None:
+        print(f"Paréntesis desbalanceados en línea {prevalidacion.desbalanceada + 1}")
+    return 1 if error is not None or prevalidacion.desbalanceada is not None else 0
+
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -0,0 +1,183 @@
+from copy import deepcopy
+import parser as Pmod
+import tabla_compilada as TCmod
+from lexer import Token
+from sets import EPS, MARCA_FIN, simbolos_de_gramatica, first_de_secuencia
+
+# Versiones simples y lentas de algoritmos que el analizador resuelve de otra forma.
+# Ningún módulo del analizador las importa: son la referencia de las pruebas de
+# test_diferencial.py y de las mediciones de benchmarks.py.
+
+# Barridos completos sobre la gramática: el algoritmo de la versión original con la
+# corrección del punto fijo de calcular_first (ver calcular_first_original, que es la
+# original sin tocar).
+
+def calcular_first_referencia(gramatica):
+    G = deepcopy(gramatica)
+    no_terminales, terminales = simbolos_de_gramatica(G)
+
+    FIRST = { simb: set() for simb in no_terminales.union(terminales) }
+    for t in terminales:
+        FIRST[t].add(t)
+    cambiado = True
+    while cambiado:
+        cambiado = False
+        for A in no_terminales:
+            for prod in G[A]:
+                if prod == [EPS]:
+                    if EPS not in FIRST[A]:
+                        FIRST[A].add(EPS)
+                        cambiado = True
+                    continue
+                agregar_eps = True
+                for X in prod:
+                    antes = len(FIRST[A])
+                    FIRST[A].update(x for x in FIRST.get(X, set()) if x != EPS)
+                    if len(FIRST[A]) > antes:
+                        cambiado = True
+                    if EPS in FIRST.get(X, set()):
+                        agregar_eps = True
+                    else:
+                        agregar_eps = False
+                        break
+                if agregar_eps:
+                    if EPS not in FIRST[A]:
+                        FIRST[A].add(EPS)
+                        cambiado = True
+    return FIRST
+
+# calcular_first tal como estaba antes de la tabla compilada, sin cambios. Marca
+# `cambiado` después del `break`, así que un símbolo no anulable que agrega terminales
+# no provoca otra vuelta y el resultado depende del orden en que se recorre el set de no
+# terminales: con grammar.py y PYTHONHASHSEED de 0 a 40, entre 100 y 201 entradas de
+# PRIMEROS en los no terminales (201 con la corrección) y entre 167 y 247 entradas en la
+# tabla (247). La única diferencia con calcular_first_referencia es esa corrección.
+
+def calcular_first_original(gramatica):
+    G = deepcopy(gramatica)
+    no_terminales, terminales = simbolos_de_gramatica(G)
+
+    FIRST = { simb: set() for simb in no_terminales.union(terminales) }
+    for t in terminales:
+        FIRST[t].add(t)
+    cambiado = True
+    while cambiado:
+        cambiado = False
+        for A in no_terminales:
+            for prod in G[A]:
+                if prod == [EPS]:
+                    if EPS not in FIRST[A]:
+                        FIRST[A].add(EPS)
+                        cambiado = True
+                    continue
+                agregar_eps = True
+                for X in prod:
+                    antes = len(FIRST[A])
+                    FIRST[A].update(x for x in FIRST.get(X, set()) if x != EPS)
+                    if EPS in FIRST.get(X, set()):
+                        agregar_eps = True
+                    else:
+                        agregar_eps = False
+                        break
+                    if len(FIRST[A]) > antes:
+                        cambiado = True
+                if agregar_eps:
+                    if EPS not in FIRST[A]:
+                        FIRST[A].add(EPS)
+                        cambiado = True
+    return FIRST
+
+def calcular_follow_referencia(gramatica, FIRST, simbolo_inicial):
+    G = deepcopy(gramatica)
+    no_terminales, terminales = simbolos_de_gramatica(G)
+    FOLLOW = { A: set() for A in no_terminales }
+    FOLLOW[simbolo_inicial].add(MARCA_FIN)
+
+    cambiado = True
+    while cambiado:
+        cambiado = False
+        for A in no_terminales:
+            for prod in G[A]:
+                for i, B in enumerate(prod):
+                    if B not in no_terminales:
+                        continue
+                    beta = prod[i+1:] if i+1 < len(prod) else []
+                    first_beta = first_de_secuencia(beta, FIRST)
+                    antes = len(FOLLOW[B])
+                    FOLLOW[B].update(x for x in first_beta if x != EPS)
+                    if EPS in first_beta or beta == []:
+                        FOLLOW[B].update(FOLLOW[A])
+                    if len(FOLLOW[B]) > antes:
+                        cambiado = True
+    return FOLLOW
+
+class NodoObjeto:
+    # Un objeto por nodo con su lista de hijos; lo arma analizar_arbol_referencia.
+    def __init__(self, simbolo, inicio):
+        self.simbolo = simbolo
+        self.produccion = -1
+        self.inicio = inicio
+        self.fin = inicio
+        self.hijos = []
+
+def recorrido_arbol_referencia(raiz):
+    # Mismo formato que arbol.ArbolSintactico.recorrido.
+    pila = [raiz]
+    while pila:
+        nodo = pila.pop()
+        yield nodo.simbolo, nodo.produccion, nodo.inicio, nodo.fin
+        pila.extend(reversed(nodo.hijos))
+
+def analizar_arbol_referencia(tokens, tc):
+    # El mismo árbol que parser.analizar_compilado(tokens, tc, traza="arbol") con un
+    # NodoObjeto por nodo y una lista de hijos en cada uno.
+    tokens = iter(tokens)
+    actual = next(tokens, None)
+    if actual is None:
+        return False, Pmod.MENSAJE_ENTRADA_VACIA
+
+    base = tc.num_terminales + 1
+    id_eof = tc.id_eof
+    hijos_por_produccion = [list(reversed(cuerpo)) for cuerpo in tc.cuerpos_invertidos]
+    raiz = NodoObjeto(tc.id_inicial, 0)
+    pila = [raiz]
+    cursor = 0
+    terminal_actual = TCmod.id_de_token(actual, tc)
+
+    while pila:
+        nodo = pila.pop()
+        tope = nodo.simbolo
+        nodo.inicio = nodo.fin = cursor
+        if tope < base:
+            if tope != terminal_actual:
+                return False, Pmod.formatear_error_token(actual, tc.esperados[tope]), []
+            nodo.fin = cursor + 1
+            if tope == id_eof:
+                break
+            siguiente = next(tokens, None)
+            if siguiente is None:
+                siguiente = Token('EOF', '<EOF>', actual.linea, actual.col + 1)
+            actual = siguiente
+            cursor += 1
+            terminal_actual = TCmod.id_de_token(actual, tc)
+        else:
+            p = tc.matriz[tc.filas[tope] + terminal_actual]
+            if p < 0:
+                return False, Pmod.formatear_error_token(actual, tc.esperados[tope]), []
+            nodo.produccion = p
+            nodo.hijos = [NodoObjeto(s, cursor) for s in hijos_por_produccion[p]]
+            pila.extend(reversed(nodo.hijos))
+    else:
+        if terminal_actual != id_eof:
+            return False, Pmod.formatear_error_token(actual, tc.esperados[id_eof]), []
+
+    # Fin de cada no terminal: el del último hijo, en postorden.
+    pila = [(raiz, False)]
+    while pila:
+        nodo, visto = pila.pop()
+        if visto:
+            nodo.fin = nodo.hijos[-1].fin
+        elif nodo.hijos:
+            pila.append((nodo, True))
+            pila.extend((h, False) for h in nodo.hijos)
+    return True, Pmod.MENSAJE_EXITO, raiz
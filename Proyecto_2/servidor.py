@@ -0,0 +1,234 @@
+import argparse
+import asyncio
+import functools
+import json
+import os
+import pickle
+import signal
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import cache_resultados as CRmod
+import cliente as Clmod
+import estadisticas as Estmod
+import main as Mmod
+
+# Servidor de análisis: mantiene cargada la tabla compilada y atiende peticiones JSON
+# por líneas sobre un socket Unix (el protocolo está descrito en cliente.py). Cada
+# conexión se atiende en una tarea de asyncio y el análisis nunca corre en el bucle de
+# eventos: con un trabajador va a un hilo aparte (las peticiones se analizan de a una,
+# pero el servidor sigue aceptando conexiones y respondiendo ping), y con más de uno a
+# un pool de procesos, así que varias conexiones se analizan en paralelo.
+#
+# Con una cache de resultados (cache_resultados, en memoria y opcionalmente en disco)
+# un archivo o fuente ya analizado con la misma gramática se responde sin volver a
+# analizarlo. Las peticiones con estadísticas no pasan por la cache. Con varios
+# trabajadores cada proceso tiene su propio nivel en memoria.
+
+_tabla_trabajador = None
+_cache_trabajador = None
+
+# Niveles de traza que se responden a partir de los ids guardados en la cache.
+_TRAZAS_CON_IDS = ("completa", "ids", "conteos")
+# Niveles de traza que acepta el protocolo: el árbol sintáctico ("arbol" en
+# parser.NIVELES_TRAZA) no tiene representación en la respuesta JSON.
+TRAZAS_PROTOCOLO = _TRAZAS_CON_IDS + ("ninguna",)
+
+# Largo máximo de una línea del protocolo; una petición con "fuente" lleva el archivo
+# entero en una línea, así que el límite por defecto de asyncio (64 KiB) no alcanza.
+MAX_LINEA = 1 << 30
+
+def procesar_peticion(peticion, tc, cache=None):
+    inicio = time.perf_counter()
+    respuesta = {"id": peticion.get("id"), "archivo": peticion.get("archivo")}
+    traza = peticion.get("traza", "ninguna")
+    invalida = _peticion_invalida(peticion)
+    if invalida is not None:
+        respuesta.update(ok=False, mensaje=f"Petición inválida: {invalida}", segundos=0.0)
+        return respuesta
+    if cache is not None and not peticion.get("estadisticas") and traza in TRAZAS_PROTOCOLO:
+        return _procesar_con_cache(peticion, tc, cache, respuesta, traza, inicio)
+    estadisticas = Estmod.Estadisticas() if peticion.get("estadisticas") else None
+    if "fuente" in peticion:
+        fuente = peticion["fuente"]
+    else:
+        ruta = peticion.get("archivo")
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                fuente = f.read()
+        except Exception as e:
+            respuesta.update(ok=False, mensaje=f"Error leyendo archivo {ruta}: {e}", segundos=0.0)
+            return respuesta
+
+    if peticion.get("todos_errores"):
+        ok, mensajes, aplicadas = Mmod.analizar_fuente_todos_los_errores(fuente, tc, traza, estadisticas)
+        mensaje = "\n".join(mensajes)
+    else:
+        ok, mensaje, aplicadas = Mmod.analizar_fuente(fuente, tc, traza, estadisticas)
+    respuesta.update(ok=ok, mensaje=mensaje, segundos=round(time.perf_counter() - inicio, 6))
+    if ok and traza == "completa":
+        respuesta["aplicadas"] = [[nt, list(prod)] for nt, prod in aplicadas]
+    elif ok and traza in ("ids", "conteos"):
+        respuesta[traza] = list(aplicadas)
+    if estadisticas is not None:
+        respuesta["estadisticas"] = estadisticas.a_dict()
+    return respuesta
+
+def _peticion_invalida(peticion):
+    # Mensaje de error si "fuente" o "archivo" no son cadenas o la traza no existe o no
+    # se puede responder (None si la petición sirve).
+    if peticion.get("traza", "ninguna") not in TRAZAS_PROTOCOLO:
+        return f"\"traza\" debe ser uno de {', '.join(TRAZAS_PROTOCOLO)}"
+    if "fuente" in peticion:
+        if not isinstance(peticion["fuente"], str):
+            return "\"fuente\" debe ser una cadena"
+    elif not isinstance(peticion.get("archivo"), str):
+        return "se esperaba \"archivo\" o \"fuente\" como cadena"
+    return None
+
+def _procesar_con_cache(peticion, tc, cache, respuesta, traza, inicio):
+    ruta = peticion.get("archivo")
+    try:
+        if "fuente" in peticion:
+            datos = peticion["fuente"].encode("utf-8")
+        else:
+            with open(ruta, "rb") as f:
+                datos = f.read()
+        resultado, en_cache = cache.analizar(datos, tc, traza in _TRAZAS_CON_IDS)
+    except (OSError, UnicodeError) as e:
+        respuesta.update(ok=False, mensaje=f"Error leyendo archivo {ruta}: {e}", segundos=0.0)
+        return respuesta
+    mensaje = resultado.mensaje
+    if peticion.get("todos_errores") and resultado.errores:
+        mensaje = "\n".join(err.mensaje for err in resultado.errores)
+    respuesta.update(ok=resultado.ok, mensaje=mensaje, segundos=round(time.perf_counter() - inicio, 6), en_cache=en_cache)
+    if resultado.ok and traza == "completa":
+        respuesta["aplicadas"] = [[nt, list(prod)] for nt, prod in (tc.producciones[p] for p in resultado.traza)]
+    elif resultado.ok and traza == "ids":
+        respuesta["ids"] = list(resultado.traza)
+    elif resultado.ok and traza == "conteos":
+        conteos = [0] * len(tc.producciones)
+        for p in resultado.traza:
+            conteos[p] += 1
+        respuesta["conteos"] = conteos
+    return respuesta
+
+def _inicializar_trabajador(tabla_serializada, opciones_cache=None):
+    global _tabla_trabajador, _cache_trabajador
+    _tabla_trabajador = pickle.loads(tabla_serializada)
+    _cache_trabajador = None if opciones_cache is None else CRmod.CacheResultados(**opciones_cache)
+
+def _procesar_en_trabajador(peticion):
+    return procesar_peticion(peticion, _tabla_trabajador, _cache_trabajador)
+
+def _socket_en_uso(ruta):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as prueba:
+        try:
+            prueba.connect(ruta)
+            return True
+        except OSError:
+            return False
+
+async def servir(ruta, tc, trabajadores=1, cache=None):
+    if os.path.exists(ruta):
+        if _socket_en_uso(ruta):
+            raise RuntimeError(f"ya hay un servidor escuchando en {ruta}")
+        os.remove(ruta)
+
+    bucle = asyncio.get_running_loop()
+    detener = asyncio.Event()
+    if trabajadores > 1:
+        tabla_serializada = pickle.dumps(tc, protocol=pickle.HIGHEST_PROTOCOL)
+        opciones_cache = None
+        if cache is not None:
+            opciones_cache = {"huella": cache.huella, "directorio": cache.directorio,
+                              "max_bytes": cache.max_bytes, "max_memoria": cache.max_memoria}
+        pool = ProcessPoolExecutor(trabajadores, initializer=_inicializar_trabajador, initargs=(tabla_serializada, opciones_cache))
+        tarea = _procesar_en_trabajador
+    else:
+        # Un solo hilo: la tabla y la cache no se comparten entre hilos.
+        pool = ThreadPoolExecutor(1)
+        tarea = functools.partial(procesar_peticion, tc=tc, cache=cache)
+
+    async def ejecutar(peticion):
+        return await bucle.run_in_executor(pool, tarea, peticion)
+
+    async def atender(lector, escritor):
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                try:
+                    peticion = json.loads(linea)
+                    if not isinstance(peticion, dict):
+                        raise ValueError("se esperaba un objeto JSON")
+                except ValueError as e:
+                    respuesta = {"ok": False, "mensaje": f"Petición inválida: {e}"}
+                else:
+                    comando = peticion.get("comando")
+                    if comando == "ping":
+                        respuesta = {"ok": True, "mensaje": "pong"}
+                    elif comando == "detener":
+                        respuesta = {"ok": True, "mensaje": "deteniendo"}
+                        detener.set()
+                    elif comando is not None:
+                        respuesta = {"ok": False, "mensaje": f"Comando desconocido: {comando}"}
+                    else:
+                        try:
+                            respuesta = await ejecutar(peticion)
+                        except Exception as e:
+                            # Un error inesperado en una petición no corta la conexión:
+                            # se responde y se sigue con la siguiente.
+                            respuesta = {"id": peticion.get("id"), "archivo": peticion.get("archivo"),
+                                         "ok": False, "mensaje": f"Error interno: {type(e).__name__}: {e}"}
+                escritor.write(json.dumps(respuesta, ensure_ascii=False).encode("utf-8") + b"\n")
+                await escritor.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Conexión cortada por el cliente o cancelada al detener el servidor.
+            pass
+        finally:
+            escritor.close()
+
+    servidor = await asyncio.start_unix_server(atender, path=ruta, limit=MAX_LINEA)
+    os.chmod(ruta, 0o600)
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        bucle.add_signal_handler(senal, detener.set)
+    print(f"Escuchando en {ruta} ({trabajadores} trabajador{'es' if trabajadores > 1 else ''})", flush=True)
+    try:
+        async with servidor:
+            await detener.wait()
+    finally:
+        pool.shutdown()
+        if cache is not None:
+            cache.podar()
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+def principal(argv=None):
+    analizador = argparse.ArgumentParser(description="Servidor de análisis sobre un socket Unix (JSON por líneas).")
+    analizador.add_argument("--socket", default=Clmod.RUTA_SOCKET_POR_DEFECTO, help="ruta del socket (por defecto: %(default)s)")
+    analizador.add_argument("-j", "--trabajadores", type=int, default=1, help="procesos para analizar en paralelo (por defecto: %(default)s, un hilo del mismo proceso que analiza las peticiones de a una)")
+    analizador.add_argument("--cache-memoria", type=int, default=CRmod.MAX_MEMORIA_POR_DEFECTO, help="resultados guardados en memoria por proceso; 0 desactiva la cache (por defecto: %(default)s)")
+    analizador.add_argument("--cache-dir", default=None, help="guardar también los resultados en este directorio (ver lote.py --cache)")
+    args = analizador.parse_args(argv)
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("Esta plataforma no tiene sockets Unix; usar main.py directamente.", file=sys.stderr)
+        return 2
+    artefacto = Mmod.cargar_tabla()
+    cache = None
+    if args.cache_memoria > 0 or args.cache_dir:
+        cache = CRmod.CacheResultados(artefacto.huella, args.cache_dir, max_memoria=max(args.cache_memoria, 0))
+    try:
+        asyncio.run(servir(args.socket, artefacto.compilada, args.trabajadores, cache))
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(principal())
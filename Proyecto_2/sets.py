@@ -1,137 +1,206 @@
-from copy import deepcopy
-
-EPS = 'ε'
-MARCA_FIN = '$'
-
-def simbolos_de_gramatica(gramatica):
-    no_terminales = set(gramatica.keys())
-    usados = set()
-    for prods in gramatica.values():
-        for prod in prods:
-            for simb in prod:
-                usados.add(simb)
-    terminales = set(simb for simb in usados if simb not in no_terminales and simb != EPS)
-    return no_terminales, terminales
-
-def calcular_first(gramatica):
-    G = deepcopy(gramatica)
-    no_terminales, terminales = simbolos_de_gramatica(G)
-
-    FIRST = { simb: set() for simb in no_terminales.union(terminales) }
-    for t in terminales:
-        FIRST[t].add(t)
-    cambiado = True
-    while cambiado:
-        cambiado = False
-        for A in no_terminales:
-            for prod in G[A]:
-                if prod == [EPS]:
-                    if EPS not in FIRST[A]:
-                        FIRST[A].add(EPS)
-                        cambiado = True
-                    continue
-                agregar_eps = True
-                for X in prod:
-                    antes = len(FIRST[A])
-                    FIRST[A].update(x for x in FIRST.get(X, set()) if x != EPS)
-                    if EPS in FIRST.get(X, set()):
-                        agregar_eps = True
-                    else:
-                        agregar_eps = False
-                        break
-                    if len(FIRST[A]) > antes:
-                        cambiado = True
-                if agregar_eps:
-                    if EPS not in FIRST[A]:
-                        FIRST[A].add(EPS)
-                        cambiado = True
-    return FIRST
-
-def first_de_secuencia(secuencia, FIRST):
-    resultado = set()
-    if secuencia == []:
-        resultado.add(EPS)
-        return resultado
-    for X in secuencia:
-        fx = FIRST.get(X, set())
-        resultado.update(x for x in fx if x != EPS)
-        if EPS in fx:
-            continue
-        else:
-            break
-    else:
-        resultado.add(EPS)
-    return resultado
-
-def calcular_follow(gramatica, FIRST, simbolo_inicial):
-    G = deepcopy(gramatica)
-    no_terminales, terminales = simbolos_de_gramatica(G)
-    FOLLOW = { A: set() for A in no_terminales }
-    FOLLOW[simbolo_inicial].add(MARCA_FIN)
-
-    cambiado = True
-    while cambiado:
-        cambiado = False
-        for A in no_terminales:
-            for prod in G[A]:
-                for i, B in enumerate(prod):
-                    if B not in no_terminales:
-                        continue
-                    beta = prod[i+1:] if i+1 < len(prod) else []
-                    first_beta = first_de_secuencia(beta, FIRST)
-                    antes = len(FOLLOW[B])
-                    FOLLOW[B].update(x for x in first_beta if x != EPS)
-                    if EPS in first_beta or beta == []:
-                        FOLLOW[B].update(FOLLOW[A])
-                    if len(FOLLOW[B]) > antes:
-                        cambiado = True
-    return FOLLOW
-
-def calcular_select(gramatica, FIRST, FOLLOW):
-    G = deepcopy(gramatica)
-    select = {}
-    for A, prods in G.items():
-        for idx, prod in enumerate(prods):
-            if prod == [EPS]:
-                select[(A, idx)] = set(FOLLOW[A])
-            else:
-                first_alpha = first_de_secuencia(prod, FIRST)
-                sel = set(x for x in first_alpha if x != EPS)
-                if EPS in first_alpha:
-                    sel.update(FOLLOW[A])
-                select[(A, idx)] = sel
-    return select
-
-def construir_tabla_analisis(gramatica, select):
-    tabla = {}
-    for (A, idx), terminales in select.items():
-        for a in terminales:
-            clave = (A, a)
-            if clave in tabla:
-                raise ValueError(f"Conflicto en tabla de análisis para {A} en terminal {a}: ya existe {tabla[clave]}, intentando {idx}")
-            tabla[clave] = idx
-    return tabla
-
-def calcular_todos_conjuntos(gramatica, simbolo_inicial):
-    FIRST = calcular_first(gramatica)
-    FOLLOW = calcular_follow(gramatica, FIRST, simbolo_inicial)
-    SELECT = calcular_select(gramatica, FIRST, FOLLOW)
-    TABLA_ANALISIS = construir_tabla_analisis(gramatica, SELECT)
-    return FIRST, FOLLOW, SELECT, TABLA_ANALISIS
-
-if __name__ == "__main__":
-    import grammar as Gmod
-    g = Gmod.normalizar_gramatica_para_ll1(Gmod.gramatica)
-    FIRST, FOLLOW, SELECT, TABLA = calcular_todos_conjuntos(g, Gmod.SIMBOLO_INICIAL)
-    print("Primeros:")
-    for k in sorted(FIRST):
-        print(k, ":", FIRST[k])
-    print("\nSiguientes:")
-    for k in sorted(FOLLOW):
-        print(k, ":", FOLLOW[k])
-    print("\nEntradas:")
-    for k in list(SELECT.keys())[:20]:
-        print(k, "->", SELECT[k])
-    print("\nEntradas de la tabla de análisis:")
-    for k in list(TABLA.keys())[:20]:
+from collections import defaultdict
+import estadisticas as Estmod
+
+EPS = 'ε'
+MARCA_FIN = '$'
+
+def simbolos_de_gramatica(gramatica):
+    no_terminales = set(gramatica.keys())
+    usados = set()
+    for prods in gramatica.values():
+        for prod in prods:
+            for simb in prod:
+                usados.add(simb)
+    terminales = set(simb for simb in usados if simb not in no_terminales and simb != EPS)
+    return no_terminales, terminales
+
+def calcular_anulables(gramatica):
+    # Cada producción cuenta cuántos de sus símbolos aún no se sabe si son anulables;
+    # cuando un no terminal resulta anulable se descuenta solo en las producciones que
+    # lo usan, y si alguna llega a cero su lado izquierdo también es anulable.
+    anulables = set()
+    pendientes = {}
+    usos = defaultdict(list)
+    nuevos = []
+    for A, prods in gramatica.items():
+        for idx, prod in enumerate(prods):
+            if prod == [EPS] or not prod:
+                if A not in anulables:
+                    anulables.add(A)
+                    nuevos.append(A)
+            elif all(X in gramatica for X in prod):
+                pendientes[(A, idx)] = len(prod)
+                for X in prod:
+                    usos[X].append((A, idx))
+    while nuevos:
+        B = nuevos.pop()
+        for clave in usos[B]:
+            pendientes[clave] -= 1
+            if pendientes[clave] == 0 and clave[0] not in anulables:
+                anulables.add(clave[0])
+                nuevos.append(clave[0])
+    return anulables
+
+def _propagar(bits, sucesores):
+    # Punto fijo de bits[A] |= bits[B] para cada arista B -> A de `sucesores`. Solo se
+    # vuelven a revisar las aristas que salen de un símbolo cuyo conjunto creció.
+    pendientes = [B for B in bits if bits[B]]
+    en_cola = set(pendientes)
+    while pendientes:
+        B = pendientes.pop()
+        en_cola.discard(B)
+        valor = bits[B]
+        for A in sucesores[B]:
+            nuevo = bits[A] | valor
+            if nuevo != bits[A]:
+                bits[A] = nuevo
+                if A not in en_cola:
+                    en_cola.add(A)
+                    pendientes.append(A)
+    return bits
+
+def _bits_a_conjunto(bits, universo):
+    conjunto = set()
+    while bits:
+        bajo = bits & -bits
+        conjunto.add(universo[bajo.bit_length() - 1])
+        bits ^= bajo
+    return conjunto
+
+# calcular_first y calcular_follow trabajan con conjuntos codificados como enteros (un
+# bit por terminal) y propagan por el grafo de dependencias entre no terminales en
+# lugar de recorrer toda la gramática hasta que nada cambie. Los resultados son los
+# mismos que los de los barridos de referencias.py.
+#
+# calcular_first llega siempre al punto fijo. La versión original
+# (referencias.calcular_first_original) podía cortar antes y entonces la tabla dependía
+# del orden de recorrido del set de no terminales, es decir de PYTHONHASHSEED: con
+# grammar.py y las semillas 0 a 40 dio entre 100 y 201 entradas de PRIMEROS en los no
+# terminales y entre 167 y 247 entradas en la tabla. Ahora son siempre 201 y 247, así que
+# con algunas semillas se aceptan programas que antes se rechazaban.
+
+def calcular_first(gramatica):
+    no_terminales, terminales = simbolos_de_gramatica(gramatica)
+    anulables = calcular_anulables(gramatica)
+    universo = sorted(terminales)
+    bit = { t: 1 << i for i, t in enumerate(universo) }
+
+    # Arista B -> A si FIRST(B) está contenido en FIRST(A).
+    bits = dict.fromkeys(gramatica, 0)
+    sucesores = { A: set() for A in gramatica }
+    for A, prods in gramatica.items():
+        for prod in prods:
+            if prod == [EPS]:
+                continue
+            for X in prod:
+                if X not in gramatica:
+                    bits[A] |= bit.get(X, 0)
+                    break
+                if X != A:
+                    sucesores[X].add(A)
+                if X not in anulables:
+                    break
+    _propagar(bits, sucesores)
+
+    FIRST = { t: {t} for t in terminales }
+    for A in no_terminales:
+        FIRST[A] = _bits_a_conjunto(bits[A], universo)
+        if A in anulables:
+            FIRST[A].add(EPS)
+    return FIRST
+
+def first_de_secuencia(secuencia, FIRST):
+    resultado = set()
+    if secuencia == []:
+        resultado.add(EPS)
+        return resultado
+    for X in secuencia:
+        fx = FIRST.get(X, set())
+        resultado.update(x for x in fx if x != EPS)
+        if EPS in fx:
+            continue
+        else:
+            break
+    else:
+        resultado.add(EPS)
+    return resultado
+
+def calcular_follow(gramatica, FIRST, simbolo_inicial):
+    no_terminales, terminales = simbolos_de_gramatica(gramatica)
+    universo = sorted(terminales.union(x for fx in FIRST.values() for x in fx if x != EPS)) + [MARCA_FIN]
+    bit = { t: 1 << i for i, t in enumerate(universo) }
+    bits_first = { X: sum(bit[x] for x in fx if x != EPS) for X, fx in FIRST.items() }
+
+    # Cada producción se recorre una vez de derecha a izquierda llevando FIRST del sufijo
+    # (y si es anulable); la arista A -> B indica que FOLLOW(A) está contenido en FOLLOW(B).
+    bits = dict.fromkeys(no_terminales, 0)
+    bits[simbolo_inicial] |= bit[MARCA_FIN]
+    sucesores = { A: set() for A in no_terminales }
+    for A in no_terminales:
+        for prod in gramatica[A]:
+            bits_sufijo = 0
+            sufijo_anulable = True
+            for B in reversed(prod):
+                if B in no_terminales:
+                    bits[B] |= bits_sufijo
+                    if sufijo_anulable and B != A:
+                        sucesores[A].add(B)
+                fx = FIRST.get(B, ())
+                if EPS in fx:
+                    bits_sufijo |= bits_first.get(B, 0)
+                else:
+                    bits_sufijo = bits_first.get(B, 0)
+                    sufijo_anulable = False
+    _propagar(bits, sucesores)
+    return { A: _bits_a_conjunto(bits[A], universo) for A in no_terminales }
+
+def calcular_select(gramatica, FIRST, FOLLOW):
+    select = {}
+    for A, prods in gramatica.items():
+        for idx, prod in enumerate(prods):
+            if prod == [EPS]:
+                select[(A, idx)] = set(FOLLOW[A])
+            else:
+                first_alpha = first_de_secuencia(prod, FIRST)
+                sel = set(x for x in first_alpha if x != EPS)
+                if EPS in first_alpha:
+                    sel.update(FOLLOW[A])
+                select[(A, idx)] = sel
+    return select
+
+def construir_tabla_analisis(gramatica, select):
+    tabla = {}
+    for (A, idx), terminales in select.items():
+        for a in terminales:
+            clave = (A, a)
+            if clave in tabla:
+                raise ValueError(f"Conflicto en tabla de análisis para {A} en terminal {a}: ya existe {tabla[clave]}, intentando {idx}")
+            tabla[clave] = idx
+    return tabla
+
+def calcular_todos_conjuntos(gramatica, simbolo_inicial, estadisticas=None):
+    with Estmod.fase(estadisticas, "first"):
+        FIRST = calcular_first(gramatica)
+    with Estmod.fase(estadisticas, "follow"):
+        FOLLOW = calcular_follow(gramatica, FIRST, simbolo_inicial)
+    with Estmod.fase(estadisticas, "select"):
+        SELECT = calcular_select(gramatica, FIRST, FOLLOW)
+        TABLA_ANALISIS = construir_tabla_analisis(gramatica, SELECT)
+    return FIRST, FOLLOW, SELECT, TABLA_ANALISIS
+
+if __name__ == "__main__":
+    import grammar as Gmod
+    g = Gmod.normalizar_gramatica_para_ll1(Gmod.gramatica)
+    FIRST, FOLLOW, SELECT, TABLA = calcular_todos_conjuntos(g, Gmod.SIMBOLO_INICIAL)
+    print("Primeros:")
+    for k in sorted(FIRST):
+        print(k, ":", FIRST[k])
+    print("\nSiguientes:")
+    for k in sorted(FOLLOW):
+        print(k, ":", FOLLOW[k])
+    print("\nEntradas:")
+    for k in list(SELECT.keys())[:20]:
+        print(k, "->", SELECT[k])
+    print("\nEntradas de la tabla de análisis:")
+    for k in list(TABLA.keys())[:20]:
         print(k, ":", TABLA[k])
\ No newline at end of file
@@ -0,0 +1,103 @@
+from array import array
+from collections import namedtuple
+import errors as Emod
+from lexer import PALABRAS_CLAVE
+
+EPS = 'ε'
+SIN_PRODUCCION = -1
+
+# Tipos de token que produce el lexer, además de KEYWORD (que se resuelve por lexema).
+TIPOS_TOKEN = [
+    'ID', 'INT', 'FLOAT', 'STRING', 'OP', 'CMP', 'ASSIGN',
+    'COLON', 'COMMA', 'DOT', 'LPAR', 'RPAR', 'LBRACK', 'RBRACK', 'LBRACE', 'RBRACE',
+    'NEWLINE', 'INDENT', 'DEDENT', 'EOF'
+]
+
+# Terminales de sincronización que se agregan a los SIGUIENTES de cada no terminal
+# para la recuperación de errores: fin de sentencia, fin de bloque y fin de archivo.
+TERMINALES_SINCRONIZACION = ['NEWLINE', 'DEDENT', 'EOF']
+
+# Representación de la tabla predictiva con símbolos enteros:
+#  - terminales: ids 0..T-1; el id T ("desconocido") representa tokens que no son
+#    terminales de la gramática y nunca coincide con nada.
+#  - no terminales: ids T+1..T+N.
+#  - matriz: array('h') plano de N filas por T+1 columnas con el id de producción
+#    o SIN_PRODUCCION; filas[s] es el desplazamiento de la fila del no terminal s.
+#  - cuerpos_invertidos[p]: lado derecho de la producción p ya invertido y sin ε,
+#    listo para apilarse con extend().
+#  - producciones[p]: la tupla (A, prod) que se registra en la traza, igual a la de analizar.
+#  - sincronizacion[A]: frozenset de ids de SIGUIENTES(A) más TERMINALES_SINCRONIZACION,
+#    usado por parser.analizar_recuperando.
+TablaCompilada = namedtuple("TablaCompilada", [
+    "simbolos", "num_terminales", "id_desconocido", "filas", "matriz",
+    "producciones", "cuerpos_invertidos", "esperados", "sincronizacion",
+    "ids_por_tipo", "ids_palabras_clave", "id_inicial", "id_eof"
+])
+
+def compilar_tabla(tabla, gramatica_norm, simbolo_inicial, FOLLOW):
+    terminales = set(terminal for (_, terminal) in tabla)
+    for prods in gramatica_norm.values():
+        for prod in prods:
+            terminales.update(s for s in prod if s not in gramatica_norm and s != EPS)
+    terminales.add('EOF')
+    terminales = sorted(terminales)
+    no_terminales = list(gramatica_norm)
+
+    num_terminales = len(terminales)
+    id_desconocido = num_terminales
+    ancho = num_terminales + 1
+    simbolos = terminales + [None] + no_terminales
+    ids = { simb: i for i, simb in enumerate(simbolos) if simb is not None }
+
+    producciones = []
+    cuerpos_invertidos = []
+    id_produccion = {}
+    for A in no_terminales:
+        for idx, prod in enumerate(gramatica_norm[A]):
+            id_produccion[(A, idx)] = len(producciones)
+            producciones.append((A, prod))
+            cuerpos_invertidos.append(tuple(ids[s] for s in reversed(prod) if s != EPS))
+
+    filas = [-1] * len(simbolos)
+    matriz = array('h', [SIN_PRODUCCION]) * (len(no_terminales) * ancho)
+    for j, A in enumerate(no_terminales):
+        filas[ids[A]] = j * ancho
+    for (A, terminal), prod in tabla.items():
+        idx = gramatica_norm[A].index(prod)
+        matriz[filas[ids[A]] + ids[terminal]] = id_produccion[(A, idx)]
+
+    # Mensajes de error precalculados: los mismos que arma analizar a partir de la tabla.
+    esperados = [None] * len(simbolos)
+    for A in no_terminales:
+        esperados[ids[A]] = Emod.esperados_para_no_terminal(A, tabla)
+    for t in terminales:
+        esperados[ids[t]] = [Emod.legible_de_terminal(t)]
+
+    sincronizacion = [None] * len(simbolos)
+    for A in no_terminales:
+        # MARCA_FIN ('$') no es un terminal de la tabla: el fin de archivo es EOF.
+        nombres = set(FOLLOW.get(A, ())) | set(TERMINALES_SINCRONIZACION)
+        sincronizacion[ids[A]] = frozenset(ids[t] for t in nombres if t in ids)
+
+    ids_por_tipo = {}
+    for tipo in TIPOS_TOKEN:
+        terminal = 'BINOP' if tipo in ('OP', 'CMP') else tipo
+        ids_por_tipo[tipo] = ids.get(terminal, id_desconocido)
+    ids_palabras_clave = { lex: ids.get(f"KEYWORD_{lex}", id_desconocido) for lex in PALABRAS_CLAVE }
+
+    return TablaCompilada(
+        simbolos, num_terminales, id_desconocido, filas, matriz,
+        producciones, cuerpos_invertidos, esperados, sincronizacion,
+        ids_por_tipo, ids_palabras_clave, ids[simbolo_inicial], ids['EOF']
+    )
+
+def id_de_token(token, tc):
+    if token.tipo == 'KEYWORD':
+        return tc.ids_palabras_clave.get(token.lexema, tc.id_desconocido)
+    return tc.ids_por_tipo.get(token.tipo, tc.id_desconocido)
+
+if __name__ == "__main__":
+    import cache_tabla as Cmod
+    tc = Cmod.gramatica_compilada().compilada
+    print(f"Terminales: {tc.num_terminales}  No terminales: {len(tc.simbolos) - tc.num_terminales - 1}")
+    print(f"Producciones: {len(tc.producciones)}  Celdas de la matriz: {len(tc.matriz)} ({tc.matriz.itemsize * len(tc.matriz)} bytes)")
@@ -0,0 +1,173 @@
+import sys
+from array import array
+from collections import Counter
+from collections.abc import Mapping
+import errors as Emod
+
+# Tabla predictiva comprimida: el mismo {(A, terminal): producción} que
+# table.construir_tabla_predictiva, con la misma búsqueda y los mismos huecos (error),
+# pero sin una entrada por celda:
+#  - producción por defecto: en cada fila, la producción que más celdas ocupa (en las
+#    filas de cola_*, *_opcional y similares, la ε) no se guarda celda por celda; una
+#    máscara de bits marca las columnas donde vale, así que las columnas de error
+#    siguen siendo error;
+#  - filas compartidas: los no terminales cuya fila queda igual (por defecto, máscara y
+#    resto de las celdas, comparando los cuerpos de las producciones) usan la misma fila;
+#  - peine (desplazamientos): las celdas que no son la producción por defecto de cada
+#    fila se encajan en un solo arreglo `siguiente`; la fila r empieza en base[r] y
+#    `verificacion` dice a qué fila pertenece cada posición.
+#
+# Búsqueda de (A, t): r = filas[A], c = columnas[t], i = base[r] + c;
+# si verificacion[i] == r la producción es cuerpos[siguiente[i]]; si no, si el bit c
+# de mascaras[r] está prendido es cuerpos[por_defecto[r]]; si no, no hay producción.
+#
+# TablaComprimida es un Mapping, así que parser.analizar la usa en lugar del dict, y
+# tiene el mismo índice `esperados` para los mensajes de error.
+
+SIN_FILA = -1
+
+def _tipo_para(maximo):
+    return 'h' if maximo < 0x8000 else 'i'
+
+class TablaComprimida(Mapping):
+    def __init__(self, filas, columnas, cuerpos, base, siguiente, verificacion, por_defecto, mascaras, cantidad):
+        self.filas = filas
+        self.columnas = columnas
+        self.cuerpos = cuerpos
+        self.base = base
+        self.siguiente = siguiente
+        self.verificacion = verificacion
+        self.por_defecto = por_defecto
+        self.mascaras = mascaras
+        self.cantidad = cantidad
+        self.esperados = Emod.construir_indice_esperados(self)
+
+    def get(self, clave, defecto=None):
+        try:
+            A, t = clave
+        except (TypeError, ValueError):
+            return defecto
+        fila = self.filas.get(A)
+        columna = self.columnas.get(t)
+        if fila is None or columna is None:
+            return defecto
+        i = self.base[fila] + columna
+        if self.verificacion[i] == fila:
+            return self.cuerpos[self.siguiente[i]]
+        if self.mascaras[fila] >> columna & 1:
+            return self.cuerpos[self.por_defecto[fila]]
+        return defecto
+
+    def __getitem__(self, clave):
+        prod = self.get(clave)
+        if prod is None:
+            raise KeyError(clave)
+        return prod
+
+    def __contains__(self, clave):
+        return self.get(clave) is not None
+
+    def __len__(self):
+        return self.cantidad
+
+    def __iter__(self):
+        terminales = list(self.columnas)
+        for A in self.filas:
+            for t in terminales:
+                if self.get((A, t)) is not None:
+                    yield (A, t)
+
+    def filas_distintas(self):
+        return len(self.base)
+
+    def bytes_usados(self):
+        # Memoria propia de la estructura (sin las cadenas ni las listas de producciones,
+        # que son las de la gramática normalizada, igual que en el dict).
+        total = sum(sys.getsizeof(x) for x in (self.filas, self.columnas, self.cuerpos, self.base,
+                                               self.siguiente, self.verificacion, self.por_defecto, self.mascaras))
+        return total + sum({id(m): sys.getsizeof(m) for m in self.mascaras}.values())
+
+def comprimir_tabla(tabla):
+    # TablaComprimida con las mismas entradas que `tabla` ({(A, terminal): producción}).
+    columnas = {}
+    por_no_terminal = {}
+    for (A, t) in tabla:
+        columnas.setdefault(t, len(columnas))
+        por_no_terminal.setdefault(A, []).append(t)
+
+    cuerpos = []
+    id_cuerpo = {}
+    def cuerpo(prod):
+        clave = tuple(prod)
+        if clave not in id_cuerpo:
+            id_cuerpo[clave] = len(cuerpos)
+            cuerpos.append(prod)
+        return id_cuerpo[clave]
+
+    # Cada fila queda como (por defecto, máscara, ((columna, cuerpo), ...)); las filas
+    # iguales se guardan una vez.
+    filas = {}
+    id_fila = {}
+    contenidos = []
+    for A, terminales in por_no_terminal.items():
+        celdas = sorted((columnas[t], cuerpo(tabla[(A, t)])) for t in terminales)
+        defecto = Counter(p for _, p in celdas).most_common(1)[0][0]
+        mascara = 0
+        resto = []
+        for c, p in celdas:
+            if p == defecto:
+                mascara |= 1 << c
+            else:
+                resto.append((c, p))
+        contenido = (defecto, mascara, tuple(resto))
+        if contenido not in id_fila:
+            id_fila[contenido] = len(contenidos)
+            contenidos.append(contenido)
+        filas[A] = id_fila[contenido]
+
+    # Peine: las filas con más celdas primero, cada una en el primer desplazamiento
+    # donde todas sus columnas están libres.
+    ocupadas = []
+    base = [0] * len(contenidos)
+    primera_libre = 0
+    for r in sorted(range(len(contenidos)), key=lambda r: -len(contenidos[r][2])):
+        resto = contenidos[r][2]
+        if not resto:
+            continue
+        while primera_libre < len(ocupadas) and ocupadas[primera_libre] is not None:
+            primera_libre += 1
+        desplazamiento = max(primera_libre - resto[0][0], 0)
+        while True:
+            if all(desplazamiento + c >= len(ocupadas) or ocupadas[desplazamiento + c] is None for c, _ in resto):
+                break
+            desplazamiento += 1
+        base[r] = desplazamiento
+        for c, p in resto:
+            i = desplazamiento + c
+            if i >= len(ocupadas):
+                ocupadas.extend([None] * (i + 1 - len(ocupadas)))
+            ocupadas[i] = (r, p)
+    # Relleno para que base[r] + columna siempre esté dentro de los arreglos.
+    largo = max(base, default=0) + len(columnas)
+    ocupadas.extend([None] * (largo - len(ocupadas)))
+
+    tipo_fila = _tipo_para(len(contenidos))
+    tipo_cuerpo = _tipo_para(len(cuerpos))
+    siguiente = array(tipo_cuerpo, [SIN_FILA if o is None else o[1] for o in ocupadas])
+    verificacion = array(tipo_fila, [SIN_FILA if o is None else o[0] for o in ocupadas])
+    return TablaComprimida(
+        filas, columnas, cuerpos, array(_tipo_para(largo), base), siguiente, verificacion,
+        array(tipo_cuerpo, [c[0] for c in contenidos]), [c[1] for c in contenidos], len(tabla)
+    )
+
+def bytes_de_dict(tabla):
+    # Memoria propia del dict de table.py: la tabla hash y las tuplas de las claves.
+    return sys.getsizeof(tabla) + sum(sys.getsizeof(clave) for clave in tabla)
+
+if __name__ == "__main__":
+    import cache_tabla as Cmod
+    tabla = Cmod.gramatica_compilada().tabla
+    tz = comprimir_tabla(tabla)
+    print(f"Entradas: {len(tabla)}  No terminales: {len(tz.filas)}  Filas distintas: {tz.filas_distintas()}  "
+          f"Celdas en el peine: {sum(v >= 0 for v in tz.verificacion)} de {len(tz.verificacion)}")
+    print(f"Memoria: dict {bytes_de_dict(tabla)} bytes, comprimida {tz.bytes_usados()} bytes")
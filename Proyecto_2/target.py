@@ -1,3 +1,3 @@
-def main():
-        arr = [1, 2, 3]
-    foo(arr)
+def main():
+        arr = [1, 2, 3]
+    foo(arr)
@@ -0,0 +1,212 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import cache_resultados as CRmod
+import cache_tabla as Cmod
+import grammar as Gmod
+
+# Cache en disco de la tabla predictiva (cache_tabla.py): ida y vuelta, claves viejas
+# (otra gramática, otro código, otra versión) y archivos dañados o truncados, que se
+# tienen que tratar como ausentes y reconstruir. Cache de resultados
+# (cache_resultados.py): claves, LRU en memoria, nivel en disco y poda.
+
+class PruebaCacheTabla(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.artefacto = Cmod.construir_artefacto(Gmod.gramatica, Gmod.SIMBOLO_INICIAL)
+        cls.datos = Cmod.serializar_artefacto(cls.artefacto)
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, "tabla.cache")
+
+    def escribir(self, datos):
+        with open(self.ruta, "wb") as f:
+            f.write(datos)
+
+    def test_ida_y_vuelta(self):
+        self.assertTrue(Cmod.escribir_cache(self.artefacto, self.ruta))
+        leido = Cmod.leer_cache(self.ruta)
+        self.assertIsNotNone(leido)
+        self.assertEqual(leido._asdict(), self.artefacto._asdict())
+        self.assertEqual(list(leido.compilada.matriz), list(self.artefacto.compilada.matriz))
+        self.assertEqual(leido.tabla.esperados, self.artefacto.tabla.esperados)
+
+    def test_sin_archivo(self):
+        self.assertIsNone(Cmod.leer_cache(self.ruta))
+        artefacto = Cmod.cargar_o_construir(Gmod.gramatica, Gmod.SIMBOLO_INICIAL, self.ruta)
+        self.assertEqual(artefacto.huella, self.artefacto.huella)
+        self.assertIsNotNone(Cmod.leer_cache(self.ruta))
+
+    def test_otra_gramatica(self):
+        Cmod.escribir_cache(self.artefacto, self.ruta)
+        gramatica = {"programa": [["sentencia", "programa"], ["EOF"]], "sentencia": [["ID", "NEWLINE"]]}
+        artefacto = Cmod.cargar_o_construir(gramatica, "programa", self.ruta)
+        self.assertEqual(artefacto.huella, Cmod.huella_gramatica(gramatica, "programa"))
+        self.assertNotEqual(artefacto.huella, self.artefacto.huella)
+        self.assertEqual(Cmod.leer_cache(self.ruta).huella, artefacto.huella)
+
+    def test_otro_codigo(self):
+        # Un archivo escrito por otra versión de los módulos que arman el artefacto no
+        # se usa aunque la gramática sea la misma.
+        with mock.patch.object(Cmod, "huella_codigo_artefacto", return_value=bytes(32)):
+            Cmod.escribir_cache(self.artefacto, self.ruta)
+            self.assertIsNotNone(Cmod.leer_cache(self.ruta))
+        self.assertIsNone(Cmod.leer_cache(self.ruta))
+        Cmod.cargar_o_construir(Gmod.gramatica, Gmod.SIMBOLO_INICIAL, self.ruta)
+        self.assertIsNotNone(Cmod.leer_cache(self.ruta))
+
+    def test_huella_codigo(self):
+        self.assertEqual(Cmod.huella_codigo(Cmod.MODULOS_ARTEFACTO), Cmod.huella_codigo_artefacto())
+        self.assertNotEqual(Cmod.huella_codigo(("sets",)), Cmod.huella_codigo(("table",)))
+        self.assertNotEqual(Cmod.huella_codigo(("sets", "table")), Cmod.huella_codigo(("sets",)))
+
+    def test_otra_version(self):
+        inicio = len(Cmod.MAGIA_CACHE)
+        self.escribir(self.datos[:inicio] + (Cmod.VERSION_CACHE - 1).to_bytes(2, "little") + self.datos[inicio + 2:])
+        self.assertIsNone(Cmod.leer_cache(self.ruta))
+
+    def test_truncado(self):
+        cabecera = len(Cmod.MAGIA_CACHE) + 2 + 64
+        for largo in (0, 3, cabecera - 1, cabecera, cabecera + 10, len(self.datos) // 2, len(self.datos) - 1):
+            with self.subTest(largo=largo):
+                self.escribir(self.datos[:largo])
+                self.assertIsNone(Cmod.leer_cache(self.ruta))
+
+    def test_corrupto(self):
+        cabecera = len(Cmod.MAGIA_CACHE) + 2 + 64
+        for posicion in (0, cabecera - 1, cabecera, cabecera + 1):
+            with self.subTest(posicion=posicion):
+                datos = bytearray(self.datos)
+                datos[posicion] ^= 0xFF
+                self.escribir(bytes(datos))
+                self.assertIsNone(Cmod.leer_cache(self.ruta))
+        self.escribir(b"\0" * len(self.datos))
+        self.assertIsNone(Cmod.leer_cache(self.ruta))
+
+    def test_reconstruye_si_esta_danado(self):
+        self.escribir(self.datos[:len(self.datos) // 2])
+        artefacto = Cmod.cargar_o_construir(Gmod.gramatica, Gmod.SIMBOLO_INICIAL, self.ruta)
+        self.assertEqual(artefacto.huella, self.artefacto.huella)
+        self.assertEqual(Cmod.leer_cache(self.ruta)._asdict(), self.artefacto._asdict())
+
+VALIDO = b"def f(x):\n    return x + 1\n"
+INVALIDO = b"x = (1\n"
+
+class PruebaCacheResultados(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        gc = Cmod.gramatica_compilada()
+        cls.huella = gc.huella
+        cls.tc = gc.compilada
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = directorio.name
+
+    def resultado(self, datos, traza=False):
+        return CRmod.analizar_para_cache(datos.decode("utf-8"), self.tc, traza)
+
+    def test_clave(self):
+        clave = CRmod.clave_contenido(VALIDO, self.huella)
+        self.assertEqual(clave, CRmod.clave_contenido(VALIDO, self.huella))
+        self.assertNotEqual(clave, CRmod.clave_contenido(VALIDO + b"\n", self.huella))
+        self.assertNotEqual(clave, CRmod.clave_contenido(VALIDO, bytes(32)))
+        # Otro código del lexer o del parser da otra clave: no se sirven resultados viejos.
+        with mock.patch.object(CRmod, "huella_codigo_resultados", return_value=bytes(32)):
+            self.assertNotEqual(clave, CRmod.clave_contenido(VALIDO, self.huella))
+
+    def test_ida_y_vuelta(self):
+        for datos in (VALIDO, INVALIDO):
+            for traza in (False, True):
+                resultado = self.resultado(datos, traza)
+                with self.subTest(datos=datos, traza=traza):
+                    self.assertEqual(CRmod.deserializar_resultado(CRmod.serializar_resultado(resultado)), resultado)
+        self.assertFalse(self.resultado(INVALIDO).ok)
+        self.assertTrue(self.resultado(INVALIDO).errores)
+        serializado = CRmod.serializar_resultado(self.resultado(VALIDO, True))
+        for datos in (b"", serializado[:5], serializado[:len(serializado) // 2], b"X" + serializado[1:]):
+            self.assertIsNone(CRmod.deserializar_resultado(datos))
+
+    def test_lru_en_memoria(self):
+        cache = CRmod.CacheResultados(self.huella, None, max_memoria=2)
+        resultado = self.resultado(VALIDO)
+        cache.guardar("a", resultado)
+        cache.guardar("b", resultado)
+        self.assertIsNotNone(cache.obtener("a"))
+        cache.guardar("c", resultado)
+        # "b" es la usada hace más tiempo.
+        self.assertIsNone(cache.obtener("b"))
+        self.assertIsNotNone(cache.obtener("a"))
+        self.assertIsNotNone(cache.obtener("c"))
+        self.assertEqual((cache.aciertos_memoria, cache.aciertos_disco, cache.fallos), (3, 0, 1))
+
+        sin_memoria = CRmod.CacheResultados(self.huella, None, max_memoria=0)
+        sin_memoria.guardar("a", resultado)
+        self.assertIsNone(sin_memoria.obtener("a"))
+
+    def test_traza(self):
+        # Un resultado exitoso guardado sin traza no sirve si se pide la traza; uno con
+        # error sí, porque no tiene traza.
+        cache = CRmod.CacheResultados(self.huella, self.directorio)
+        cache.guardar("ok", self.resultado(VALIDO))
+        cache.guardar("error", self.resultado(INVALIDO))
+        self.assertIsNone(cache.obtener("ok", traza=True))
+        self.assertIsNotNone(cache.obtener("ok"))
+        self.assertIsNotNone(cache.obtener("error", traza=True))
+
+    def test_disco(self):
+        cache = CRmod.CacheResultados(self.huella, self.directorio, max_memoria=0)
+        resultado, en_cache = cache.analizar(VALIDO, self.tc, traza=True)
+        self.assertFalse(en_cache)
+        self.assertEqual(resultado, self.resultado(VALIDO, True))
+        self.assertEqual(CRmod.tamano_en_disco(self.directorio)[0], 1)
+
+        # Otro proceso con el mismo directorio: acierto en disco, que queda en su memoria.
+        otra = CRmod.CacheResultados(self.huella, self.directorio)
+        self.assertEqual(otra.analizar(VALIDO, self.tc, traza=True), (resultado, True))
+        self.assertEqual(otra.analizar(VALIDO, self.tc, traza=True), (resultado, True))
+        self.assertEqual((otra.aciertos_memoria, otra.aciertos_disco, otra.fallos), (1, 1, 0))
+        self.assertEqual(otra.tasa_aciertos(), 1.0)
+
+        # Una entrada ilegible cuenta como fallo y se vuelve a analizar.
+        ruta = otra._ruta(CRmod.clave_contenido(VALIDO, self.huella))
+        with open(ruta, "wb") as f:
+            f.write(b"LL1RES basura")
+        tercera = CRmod.CacheResultados(self.huella, self.directorio)
+        self.assertEqual(tercera.analizar(VALIDO, self.tc, traza=True), (resultado, False))
+        self.assertEqual(tercera.fallos, 1)
+        with open(ruta, "rb") as f:
+            self.assertEqual(CRmod.deserializar_resultado(f.read()), resultado)
+
+    def test_podar(self):
+        cache = CRmod.CacheResultados(self.huella, self.directorio, max_memoria=0)
+        claves = [CRmod.clave_contenido(b"x = %d\n" % i, self.huella) for i in range(6)]
+        for i, clave in enumerate(claves):
+            cache.guardar(clave, self.resultado(b"x = %d\n" % i))
+            os.utime(cache._ruta(clave), (1000 + i, 1000 + i))
+        # Un acierto cuenta como uso reciente.
+        self.assertIsNotNone(cache.obtener(claves[0]))
+        with open(os.path.join(os.path.dirname(cache._ruta(claves[0])), "a_medias.tmp"), "wb") as f:
+            f.write(b"x" * 100_000)
+
+        entradas, total = CRmod.tamano_en_disco(self.directorio)
+        self.assertEqual(entradas, 6)
+        tamano = total // entradas
+        self.assertEqual(CRmod.podar(self.directorio, total), (0, 0))
+        borradas, liberados = cache.podar(3 * tamano)
+        self.assertEqual(borradas, 3)
+        self.assertEqual(CRmod.tamano_en_disco(self.directorio), (3, total - liberados))
+        quedan = [clave for clave in claves if os.path.exists(cache._ruta(clave))]
+        self.assertEqual(quedan, [claves[0], claves[4], claves[5]])
+
+        self.assertEqual(CRmod.podar(self.directorio, 0)[0], 3)
+        self.assertEqual(CRmod.tamano_en_disco(self.directorio), (0, 0))
+        self.assertEqual(CRmod.podar(None), (0, 0))
+        self.assertEqual(CRmod.podar(os.path.join(self.directorio, "no_existe")), (0, 0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,407 @@
+import functools
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import generador
+import grammar as Gmod
+import main as Mmod
+import parser as Pmod
+from lexer import tokenizar, tokenizar_compacto, ErrorLexer
+
+# Pruebas diferenciales: cada camino rápido (motor regex del lexer, BufferTokens, tabla
+# compilada o comprimida, análisis descendente, en partes, incremental, prevalidado,
+# desde .tok) tiene que dar exactamente lo mismo que el camino de referencia sobre un
+# corpus de programas generados, entradas aleatorias del lexer y programas con errores.
+# Los tiempos de cada camino están en benchmarks.py.
+#
+# ANALIZADOR_ESCALA_PRUEBAS multiplica el tamaño de los corpus (por defecto 1, que tarda
+# alrededor de un minuto).
+
+ESCALA = int(os.environ.get("ANALIZADOR_ESCALA_PRUEBAS", "1"))
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+TRAZAS = ("completa", "ids", "conteos", "ninguna")
+
+@functools.lru_cache(maxsize=None)
+def _artefacto():
+    return Mmod.cargar_tabla()
+
+@functools.lru_cache(maxsize=None)
+def _corpus_lexer():
+    fuentes = []
+    for nombre in ("test.py", "target.py"):
+        with open(os.path.join(DIRECTORIO, nombre), "r", encoding="utf-8") as f:
+            fuentes.append(f.read())
+    fuentes.extend(generador.generar_programa(5000, semilla=i) for i in range(20))
+    fuentes.extend(generador.generar_texto_lexer(30, semilla=i) for i in range(200 * ESCALA))
+    return tuple(fuentes)
+
+@functools.lru_cache(maxsize=None)
+def _corpus():
+    # Corpus del lexer más programas con un token reemplazado.
+    return _corpus_lexer() + tuple(generador.generar_programas_mutados(100 * ESCALA))
+
+def _tokens_o_none(fuente):
+    try:
+        return tokenizar(fuente)
+    except ErrorLexer:
+        return None
+
+def _tokenizar_o_error(fuente, motor="regex"):
+    try:
+        return tokenizar(fuente, motor)
+    except ErrorLexer as e:
+        return ("ErrorLexer", str(e))
+
+class PruebaLexer(unittest.TestCase):
+    def test_motores(self):
+        for fuente in _corpus_lexer():
+            self.assertEqual(_tokenizar_o_error(fuente, "clasico"), _tokenizar_o_error(fuente, "regex"), repr(fuente))
+
+    def test_buffer_tokens(self):
+        for fuente in _corpus():
+            try:
+                buffer = list(tokenizar_compacto(fuente))
+            except ErrorLexer as e:
+                buffer = ("ErrorLexer", str(e))
+            self.assertEqual(buffer, _tokenizar_o_error(fuente), repr(fuente))
+
+class PruebaParser(unittest.TestCase):
+    def test_tabla_compilada(self):
+        gc = _artefacto()
+        for fuente in _corpus():
+            tokens = _tokens_o_none(fuente)
+            if tokens is not None:
+                esperado = Pmod.analizar(tokens, gc.tabla, gc.gramatica_norm, Gmod.SIMBOLO_INICIAL)
+                self.assertEqual(Pmod.analizar_compilado(tokens, gc.compilada), esperado, repr(fuente))
+
+    def test_buffer_contra_lista(self):
+        # main.analizar_fuente (BufferTokens, con el terminal de cada token resuelto por el
+        # lexer), con y sin estadísticas, contra la lista de Token con analizar_flujo.
+        import estadisticas as Estmod
+        tc = _artefacto().compilada
+        fuentes = _corpus() + tuple(generador.generar_programa_nombres(5000, semilla=i) for i in range(10))
+        def por_lista(fuente, traza):
+            try:
+                tokens = tokenizar(fuente)
+            except ErrorLexer as e:
+                return False, Mmod.formatear_error_lexer(e), []
+            return Mmod.normalizar_resultado(Pmod.analizar_flujo(iter(tokens), tc, traza))
+
+        for fuente in fuentes:
+            for traza in TRAZAS:
+                esperado = por_lista(fuente, traza)
+                self.assertEqual(Mmod.analizar_fuente(fuente, tc, traza), esperado, f"traza={traza}: {fuente!r}")
+                self.assertEqual(Mmod.analizar_fuente(fuente, tc, traza, Estmod.Estadisticas()), esperado, f"traza={traza}: {fuente!r}")
+
+    def test_contadores(self):
+        # Con estadísticas, la lista de Token y el BufferTokens pasan por el mismo ciclo
+        # instrumentado: mismo resultado que sin ellas y los mismos contadores.
+        import estadisticas as Estmod
+        tc = _artefacto().compilada
+        for fuente in _corpus():
+            tokens = _tokens_o_none(fuente)
+            if tokens is None:
+                continue
+            buffer = tokenizar_compacto(fuente)
+            for traza in TRAZAS:
+                por_lista, por_buffer = Estmod.Estadisticas(), Estmod.Estadisticas()
+                resultado = Pmod.analizar_flujo(iter(tokens), tc, traza, por_lista)
+                self.assertEqual(resultado, Pmod.analizar_flujo(iter(tokens), tc, traza), repr(fuente))
+                self.assertEqual(Pmod.analizar_buffer(buffer, tc, traza, estadisticas=por_buffer),
+                                 Pmod.analizar_buffer(buffer, tc, traza), repr(fuente))
+                self.assertEqual(por_lista.contadores, por_buffer.contadores, repr(fuente))
+
+    def test_descendente(self):
+        # Analizador descendente generado contra la pila, con y sin EOF al final.
+        import descendente as Dmod
+        gc = _artefacto()
+        tc = gc.compilada
+        modulo = Dmod.cargar(gc)
+        fuentes = _corpus() + tuple(generador.generar_programa_forma(forma, 3000, semilla=i) for forma in generador.FORMAS for i in range(2))
+        for fuente in fuentes:
+            tokens = _tokens_o_none(fuente)
+            if tokens is None:
+                continue
+            for secuencia in (tokens, tokens[:-1]):
+                for traza in TRAZAS:
+                    esperado = Pmod.analizar_flujo(iter(secuencia), tc, traza)
+                    self.assertEqual(modulo.analizar(secuencia, tc, traza), esperado, f"traza={traza}: {fuente!r}")
+
+    def test_arbol(self):
+        # Árbol compacto (traza="arbol") contra un objeto por nodo.
+        import referencias as Rmod
+        tc = _artefacto().compilada
+        for fuente in _corpus():
+            tokens = _tokens_o_none(fuente)
+            if tokens is None:
+                continue
+            ok, mensaje, compacto = Pmod.analizar_compilado(tokens, tc, traza="arbol")
+            ok_ref, mensaje_ref, referencia = Rmod.analizar_arbol_referencia(tokens, tc)
+            self.assertEqual((ok, mensaje), (ok_ref, mensaje_ref), repr(fuente))
+            if ok:
+                self.assertEqual(list(compacto.recorrido()), list(Rmod.recorrido_arbol_referencia(referencia)), repr(fuente))
+
+    def test_recuperacion(self):
+        # Sin errores la recuperación no cambia nada, y con errores el primero es el del modo normal.
+        tc = _artefacto().compilada
+        for semilla in range(50 * ESCALA):
+            fuente = generador.generar_programa(3000, semilla=semilla)
+            rota, _ = generador.generar_programa_con_errores(3000, semilla=semilla, num_errores=3)
+            for texto in (fuente, rota):
+                tokens = tokenizar(texto)
+                ok, mensaje, aplicadas = Mmod.normalizar_resultado(Pmod.analizar_flujo(iter(tokens), tc))
+                errores, aplicadas_rec = Pmod.analizar_recuperando(tokens, tc)
+                self.assertEqual(ok, not errores, f"semilla {semilla}")
+                if ok:
+                    self.assertEqual(aplicadas_rec, aplicadas, f"semilla {semilla}")
+                else:
+                    self.assertEqual(errores[0].mensaje, mensaje, f"semilla {semilla}")
+
+class PruebaTablas(unittest.TestCase):
+    def test_esperados(self):
+        # Mensajes con el índice de table.TablaPredictiva y con un dict simple.
+        gc = _artefacto()
+        for fuente in _corpus():
+            tokens = _tokens_o_none(fuente)
+            if tokens is not None:
+                self.assertEqual(Pmod.analizar(tokens, dict(gc.tabla), gc.gramatica_norm, Gmod.SIMBOLO_INICIAL),
+                                 Pmod.analizar(tokens, gc.tabla, gc.gramatica_norm, Gmod.SIMBOLO_INICIAL), repr(fuente))
+
+    def test_esperados_dict_simple(self):
+        # Con un dict simple el índice se arma en la primera consulta y no en cada una.
+        import errors as Emod
+        tabla = _artefacto().tabla
+        tabla_simple = dict(tabla)
+        with mock.patch.object(Emod, "construir_indice_esperados", wraps=Emod.construir_indice_esperados) as construir:
+            for A in _artefacto().gramatica_norm:
+                self.assertEqual(Emod.esperados_para_no_terminal(A, tabla_simple), Emod.esperados_para_no_terminal(A, tabla), A)
+            self.assertEqual(construir.call_count, 1)
+            otra = dict(tabla_simple)
+            Emod.esperados_para_no_terminal("sentencia", otra)
+            Emod.esperados_para_no_terminal("sentencia", otra)
+            self.assertEqual(construir.call_count, 2)
+
+    def test_tabla_comprimida(self):
+        # Todas las búsquedas (incluidos no terminales y terminales que no están) en la
+        # gramática actual y en copias de ella, y parser.analizar con la gramática actual.
+        import table as Tmod
+        import tabla_comprimida as TZmod
+        gc = _artefacto()
+        casos = [(gc.gramatica_norm, Gmod.SIMBOLO_INICIAL)]
+        casos += [generador.replicar_gramatica(gc.gramatica_norm, Gmod.SIMBOLO_INICIAL, 3, propios) for propios in (False, True)]
+        for gramatica, inicial in casos:
+            tabla = Tmod.construir_tabla_desde_normalizada(gramatica, inicial)[0]
+            comprimida = TZmod.comprimir_tabla(tabla)
+            self.assertEqual(comprimida, tabla)
+            self.assertEqual(comprimida.esperados, tabla.esperados)
+            terminales = sorted({t for (_, t) in tabla}) + ["NO_EXISTE"]
+            for A in list(gramatica) + ["no_existe"]:
+                for t in terminales:
+                    self.assertEqual(comprimida.get((A, t)), tabla.get((A, t)), (A, t))
+
+        comprimida = TZmod.comprimir_tabla(gc.tabla)
+        for fuente in _corpus():
+            tokens = _tokens_o_none(fuente)
+            if tokens is not None:
+                self.assertEqual(Pmod.analizar(tokens, comprimida, gc.gramatica_norm, Gmod.SIMBOLO_INICIAL),
+                                 Pmod.analizar(tokens, gc.tabla, gc.gramatica_norm, Gmod.SIMBOLO_INICIAL), repr(fuente))
+
+    def test_conjuntos(self):
+        # PRIMEROS/SIGUIENTES/SELECCION por propagación contra los barridos completos; los
+        # PRIMEROS de la versión original (que puede cortar antes del punto fijo) tienen
+        # que estar contenidos en los calculados.
+        import referencias as Rmod
+        import sets as Smod
+        casos = [(_artefacto().gramatica_norm, Gmod.SIMBOLO_INICIAL)]
+        casos += [(generador.generar_gramatica(n, semilla=ESCALA), "N0") for n in (50, 100, 300)]
+        for gramatica, inicial in casos:
+            FIRST = Smod.calcular_first(gramatica)
+            FOLLOW = Smod.calcular_follow(gramatica, FIRST, inicial)
+            FIRST_ref = Rmod.calcular_first_referencia(gramatica)
+            FOLLOW_ref = Rmod.calcular_follow_referencia(gramatica, FIRST_ref, inicial)
+            self.assertEqual(FIRST, FIRST_ref)
+            self.assertEqual(FOLLOW, FOLLOW_ref)
+            self.assertEqual(Smod.calcular_select(gramatica, FIRST, FOLLOW), Smod.calcular_select(gramatica, FIRST_ref, FOLLOW_ref))
+            original = Rmod.calcular_first_original(gramatica)
+            for X in original:
+                self.assertLessEqual(original[X], FIRST[X], X)
+
+    def test_tabla_independiente_del_hash(self):
+        # La tabla no puede depender del orden de los sets (PYTHONHASHSEED). Con estas
+        # semillas la versión original de calcular_first daba 247, 206, 226 y 171 entradas.
+        programa = ("import grammar as G, table as T; "
+                    "print(len(T.construir_tabla_predictiva(G.gramatica, G.SIMBOLO_INICIAL)[0]))")
+        tamanos = set()
+        for semilla in ("0", "3", "4", "7"):
+            entorno = dict(os.environ, PYTHONHASHSEED=semilla)
+            salida = subprocess.run([sys.executable, "-c", programa], cwd=DIRECTORIO, env=entorno,
+                                    capture_output=True, text=True, check=True).stdout
+            tamanos.add(int(salida))
+        self.assertEqual(tamanos, {len(_artefacto().tabla)})
+
+class PruebaCaminosAlternativos(unittest.TestCase):
+    def test_paralelo(self):
+        # Las partes se analizan en el mismo proceso; el resultado tiene que ser el del
+        # análisis en serie con 2, 3 y 7 partes.
+        import paralelo as Parmod
+        tc = _artefacto().compilada
+        fuentes = _corpus() + tuple(generador.generar_programas_partidos(100 * ESCALA))
+        for fuente in fuentes:
+            for traza in TRAZAS:
+                esperado = Mmod.analizar_fuente(fuente, tc, traza)
+                for partes in (2, 3, 7):
+                    self.assertEqual(Parmod.analizar_paralelo(fuente, tc, traza, 1, partes), esperado,
+                                     f"{partes} partes, traza={traza}: {fuente!r}")
+
+    def test_incremental(self):
+        # Después de cada edición el resultado es el de un análisis completo. Una de cada
+        # diez ediciones rompe el programa y la siguiente la deshace.
+        import incremental as Imod
+        tc = _artefacto().compilada
+        rnd = random.Random(0)
+        analizador = Imod.AnalizadorIncremental(generador.generar_programa(6000), tc)
+        deshacer = None
+        for paso in range(300 * ESCALA):
+            if deshacer is not None:
+                inicio, fin, texto = deshacer
+                deshacer = None
+            elif rnd.randrange(10) == 0:
+                inicio, fin, texto = generador.edicion_que_rompe(rnd, analizador.lineas)
+                deshacer = (inicio, inicio + len(texto.splitlines()), "".join(analizador.lineas[inicio:fin]))
+            else:
+                inicio, fin, texto = generador.edicion_aleatoria(rnd, analizador.lineas)
+            analizador.editar(inicio, fin, texto)
+            self.assertEqual(analizador.resultado(), Mmod.analizar_fuente(analizador.fuente, tc),
+                             f"edición {paso}: ({inicio}, {fin}, {texto!r})")
+
+    def test_prevalidacion(self):
+        import prevalidacion as Prevmod
+        if not Prevmod.disponible():
+            self.skipTest("la prevalidación necesita NumPy")
+        tc = _artefacto().compilada
+        fuentes = _corpus() + tuple(generador.generar_programas_partidos(100 * ESCALA))
+        for i in range(20):
+            programa = generador.generar_programa(5000, semilla=i)
+            fuentes += tuple(generador.con_error_en(programa, i / 20, tipo) for tipo in ("sangria", "parentesis"))
+        for fuente in fuentes:
+            for traza in TRAZAS:
+                self.assertEqual(Prevmod.analizar_prevalidando(fuente, tc, traza), Mmod.analizar_fuente(fuente, tc, traza),
+                                 f"traza={traza}: {fuente!r}")
+
+    def test_tokens_binarios(self):
+        # Cargar lo volcado da los mismos tokens y el mismo análisis, también con parser.analizar.
+        import tokens_binarios as TBmod
+        gc = _artefacto()
+        tc = gc.compilada
+        fuentes = _corpus() + tuple(generador.generar_programa(20_000, semilla=i) for i in range(5))
+        fuentes += ('s = "ñandú → ☃"\nif s:\n    t = "' + "x" * 300 + '"\n',)
+        for fuente in fuentes:
+            try:
+                buffer = tokenizar_compacto(fuente)
+            except ErrorLexer:
+                continue
+            datos = TBmod.volcar_bytes(buffer)
+            cargado = TBmod.cargar_bytes(datos)
+            self.assertEqual(list(cargado), list(buffer), repr(fuente))
+            self.assertEqual(TBmod.volcar_bytes(tokenizar(fuente)), datos, repr(fuente))
+            self.assertEqual(list(TBmod.cargar_bytes(TBmod.volcar_bytes(buffer, comprimir=False))), list(buffer), repr(fuente))
+            for traza in TRAZAS:
+                self.assertEqual(Pmod.analizar_buffer(cargado, tc, traza), Pmod.analizar_buffer(buffer, tc, traza),
+                                 f"traza={traza}: {fuente!r}")
+            self.assertEqual(Pmod.analizar(cargado, gc.tabla, gc.gramatica_norm, Gmod.SIMBOLO_INICIAL),
+                             Pmod.analizar(list(buffer), gc.tabla, gc.gramatica_norm, Gmod.SIMBOLO_INICIAL), repr(fuente))
+
+    def test_lectura_de_bytes_invalidos(self):
+        # Con --flujo y con --mmap, un archivo que no es UTF-8 válido se reporta como en el
+        # modo normal: el mismo mensaje, con la posición dentro del archivo, y el mismo
+        # código de salida.
+        contenidos = (b'x = 1\ny = "\xff"\n', b"x = 1\n" * 5000 + b"s = '\xc3\xb1\xe2\x82'\n",
+                      b"# \xc3\xb1\r\nx = 1\r\ny = '\xc3'", 'x = "ñandú"\n'.encode("utf-8"))
+        with tempfile.TemporaryDirectory() as directorio:
+            for i, contenido in enumerate(contenidos):
+                ruta = os.path.join(directorio, f"entrada{i}.py")
+                with open(ruta, "wb") as f:
+                    f.write(contenido)
+                salidas = []
+                for opciones in ([], ["--flujo"], ["--mmap"], ["--flujo", "--todos-errores"]):
+                    proceso = subprocess.run([sys.executable, os.path.join(DIRECTORIO, "main.py"), *opciones, ruta],
+                                             cwd=directorio, capture_output=True, text=True)
+                    salidas.append((proceso.returncode, proceso.stdout, proceso.stderr))
+                for salida in salidas[1:]:
+                    self.assertEqual(salida, salidas[0], repr(contenido))
+
+class PruebaIndiceSimbolos(unittest.TestCase):
+    def test_simbolos_del_arbol(self):
+        # Los símbolos del observador del parser contra un recorrido del árbol sintáctico.
+        import indice_simbolos as ISmod
+        tc = _artefacto().compilada
+        reglas = {}
+        for p, (A, prod) in enumerate(tc.producciones):
+            for no_terminal, comienzo, tipo, desplazamiento in ISmod._REGLAS:
+                if A == no_terminal and tuple(prod[:len(comienzo)]) == comienzo:
+                    reglas[p] = (tipo, desplazamiento)
+
+        def referencia(tokens):
+            ok, _, arbol = Pmod.analizar_compilado(tokens, tc, "arbol")
+            if not ok:
+                return []
+            simbolos = []
+            for nodo in arbol.recorrer():
+                regla = reglas.get(arbol.producciones[nodo])
+                if regla is not None:
+                    token = tokens[arbol.inicios[nodo] + regla[1]]
+                    simbolos.append(ISmod.Simbolo(token.lexema, regla[0], token.linea, token.col))
+            return simbolos
+
+        for fuente in _corpus() + tuple(generador.generar_programa(20_000, semilla=i) for i in range(5)):
+            tokens = _tokens_o_none(fuente)
+            esperado = [] if tokens is None else referencia(tokens)
+            self.assertEqual(ISmod.simbolos_de_fuente(fuente, tc)[2], esperado, repr(fuente))
+
+    def test_actualizacion_incremental(self):
+        # Modificar, reescribir sin cambios y borrar archivos, y actualizar el índice, da
+        # lo mismo que construirlo de nuevo; solo se vuelven a analizar los modificados.
+        import indice_simbolos as ISmod
+        artefacto = _artefacto()
+        tc = artefacto.compilada
+        rnd = random.Random(0)
+
+        def contenido(indice):
+            return sorted((indice.nombres[n], indice.archivos[a].ruta, l, c, t) for n, a, l, c, t in
+                          zip(indice.e_nombres, indice.e_archivos, indice.e_lineas, indice.e_cols, indice.e_tipos))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            rutas = []
+            for i in range(40):
+                rutas.append(os.path.join(tmp, f"m{i}.py"))
+                with open(rutas[-1], "w", encoding="utf-8") as f:
+                    f.write(generador.generar_programa(1500, semilla=i))
+            indice = ISmod.IndiceSimbolos(artefacto.huella)
+            indice.actualizar(rutas, tc)
+
+            modificados = rnd.sample(rutas, 6)
+            for k, ruta in enumerate(modificados):
+                with open(ruta, "a", encoding="utf-8") as f:
+                    f.write(f"\ndef agregada_{k}(p, q):\n    r = p\n    return agregada_{k}(q, r)\n")
+            intacto = rnd.choice([r for r in rutas if r not in modificados])
+            with open(intacto, "rb") as f:
+                datos = f.read()
+            with open(intacto, "wb") as f:
+                f.write(datos)
+            borrados = rnd.sample([r for r in rutas if r not in modificados and r != intacto], 3)
+            for ruta in borrados:
+                os.remove(ruta)
+            vigentes = [r for r in rutas if r not in borrados]
+
+            indice.quitar(borrados)
+            self.assertEqual(indice.actualizar(vigentes, tc), len(modificados))
+            completo = ISmod.IndiceSimbolos(artefacto.huella)
+            completo.actualizar(vigentes, tc)
+            self.assertEqual(contenido(indice), contenido(completo))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+import lote as Lmod
+import main as Mmod
+
+# Análisis por lotes (lote.py): expansión de directorios y patrones, una línea del
+# reporte por archivo, código de salida y la interacción con --cache / --cache-dir, con
+# uno y con varios trabajadores.
+
+ARCHIVOS = {
+    "a.py": "x = 1\n",
+    "sub/b.py": "def f(x):\n    return x\n",
+    "sub/interno/c.py": "if x:\n    y = 2\n",
+    "sub/error.py": "x = (1\n",
+    "sub/notas.txt": "no es python\n",
+    "otro/d.py": "print(1)\n",
+}
+
+class PruebaLote(unittest.TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.raiz = directorio.name
+        for nombre, contenido in ARCHIVOS.items():
+            self.escribir(nombre, contenido)
+
+    def ruta(self, nombre):
+        return os.path.join(self.raiz, *nombre.split("/"))
+
+    def escribir(self, nombre, contenido):
+        ruta = self.ruta(nombre)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        if isinstance(contenido, str):
+            contenido = contenido.encode("utf-8")
+        with open(ruta, "wb") as f:
+            f.write(contenido)
+
+    def correr(self, *argumentos):
+        # (código de salida, salida estándar, líneas del reporte por archivo).
+        reporte = os.path.join(self.raiz, "reporte.jsonl")
+        salida = io.StringIO()
+        with contextlib.redirect_stdout(salida):
+            codigo = Lmod.principal(list(argumentos) + ["-o", reporte])
+        with open(reporte, "r", encoding="utf-8") as f:
+            lineas = [json.loads(linea) for linea in f]
+        return codigo, salida.getvalue(), {linea["archivo"]: linea for linea in lineas}
+
+    def test_expandir_directorio(self):
+        esperado = [self.ruta(n) for n in ("a.py", "otro/d.py", "sub/b.py", "sub/error.py", "sub/interno/c.py")]
+        self.assertEqual(Lmod.expandir_entradas([self.raiz]), esperado)
+        self.assertEqual(Lmod.expandir_entradas([self.raiz], "*.txt"), [self.ruta("sub/notas.txt")])
+
+    def test_expandir_glob_y_repetidos(self):
+        patron = os.path.join(self.raiz, "sub", "**", "*.py")
+        esperado = [self.ruta(n) for n in ("sub/b.py", "sub/error.py", "sub/interno/c.py")]
+        self.assertEqual(Lmod.expandir_entradas([patron]), esperado)
+        # Cada archivo una sola vez, en el orden en que aparece por primera vez; un
+        # archivo nombrado explícitamente se incluye aunque no exista (y se reporta).
+        no_existe = self.ruta("no_existe.py")
+        rutas = Lmod.expandir_entradas([self.ruta("sub/b.py"), patron, os.path.join(self.raiz, "sub"), no_existe])
+        self.assertEqual(rutas, [self.ruta("sub/b.py"), self.ruta("sub/error.py"), self.ruta("sub/interno/c.py"), no_existe])
+
+    def test_analizar_archivo(self):
+        tc = Mmod.cargar_tabla().compilada
+        self.escribir("latin1.py", b"x = '\xf1'\n")
+        self.escribir("lexico.py", "x = 1 $ 2\n")
+        casos = {"a.py": True, "sub/error.py": False, "lexico.py": False, "latin1.py": False, "no_existe.py": False}
+        for nombre, ok in casos.items():
+            with self.subTest(archivo=nombre):
+                resultado = Lmod.analizar_archivo(self.ruta(nombre), tc)
+                self.assertEqual(resultado["archivo"], self.ruta(nombre))
+                self.assertEqual(resultado["ok"], ok, resultado["mensaje"])
+                if nombre in ("latin1.py", "no_existe.py"):
+                    self.assertTrue(resultado["mensaje"].startswith(f"Error leyendo archivo {self.ruta(nombre)}"))
+                else:
+                    with open(self.ruta(nombre), "r", encoding="utf-8") as f:
+                        self.assertEqual(resultado["mensaje"], Mmod.analizar_fuente(f.read(), tc, "ninguna")[1])
+
+    def test_reporte_y_codigo_de_salida(self):
+        for trabajadores in ("1", "2"):
+            with self.subTest(trabajadores=trabajadores):
+                codigo, salida, reporte = self.correr(self.raiz, "-j", trabajadores)
+                self.assertEqual(codigo, 1)
+                self.assertEqual(set(reporte), set(Lmod.expandir_entradas([self.raiz])))
+                self.assertEqual({r for r, linea in reporte.items() if not linea["ok"]}, {self.ruta("sub/error.py")})
+                for linea in reporte.values():
+                    self.assertEqual(set(linea), {"archivo", "ok", "mensaje", "segundos"})
+                self.assertIn("5 archivos analizados", salida)
+                self.assertIn("4 correctos, 1 con errores", salida)
+
+                codigo, _, reporte = self.correr(os.path.join(self.raiz, "sub", "b.py"), self.ruta("a.py"), "-j", trabajadores)
+                self.assertEqual(codigo, 0)
+                self.assertEqual(len(reporte), 2)
+
+    def test_cache(self):
+        cache = os.path.join(self.raiz, "cache")
+        for trabajadores in ("1", "2"):
+            with self.subTest(trabajadores=trabajadores):
+                directorio = f"{cache}{trabajadores}"
+                codigo, salida, primero = self.correr(self.raiz, "-j", trabajadores, "--cache-dir", directorio)
+                self.assertEqual(codigo, 1)
+                self.assertFalse(any(linea["en_cache"] for linea in primero.values()))
+                self.assertIn("Cache: 0/5 aciertos", salida)
+
+                codigo, salida, segundo = self.correr(self.raiz, "-j", trabajadores, "--cache-dir", directorio)
+                self.assertEqual(codigo, 1)
+                self.assertTrue(all(linea["en_cache"] for linea in segundo.values()))
+                self.assertIn("Cache: 5/5 aciertos", salida)
+                for ruta, linea in segundo.items():
+                    self.assertEqual((linea["ok"], linea["mensaje"]), (primero[ruta]["ok"], primero[ruta]["mensaje"]))
+
+                # Solo el archivo modificado se vuelve a analizar; corregir el error
+                # cambia el código de salida.
+                self.escribir("sub/error.py", "x = (1)\n")
+                codigo, _, tercero = self.correr(self.raiz, "-j", trabajadores, "--cache-dir", directorio)
+                self.assertEqual(codigo, 0)
+                self.assertEqual({r for r, linea in tercero.items() if not linea["en_cache"]}, {self.ruta("sub/error.py")})
+                self.escribir("sub/error.py", ARCHIVOS["sub/error.py"])
+
+    def test_cache_con_archivo_ilegible(self):
+        self.escribir("latin1.py", b"x = '\xf1'\n")
+        directorio = os.path.join(self.raiz, "cache")
+        codigo, _, reporte = self.correr(self.ruta("latin1.py"), self.ruta("a.py"), "-j", "1", "--cache-dir", directorio)
+        self.assertEqual(codigo, 1)
+        self.assertTrue(reporte[self.ruta("latin1.py")]["mensaje"].startswith("Error leyendo archivo"))
+        self.assertTrue(reporte[self.ruta("a.py")]["ok"])
+
+if __name__ == "__main__":
+    unittest.main()
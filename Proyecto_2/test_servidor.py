@@ -0,0 +1,67 @@
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+import cliente as Clmod
+
+# Arranca servidor.py en un proceso aparte y le manda peticiones mal formadas: cada una
+# tiene que recibir un error JSON por la misma conexión, que sigue atendiendo después.
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+PETICIONES_INVALIDAS = [{}, {"archivo": None}, {"fuente": 5}, {"fuente": "x = 1\n", "traza": "otra"},
+                        {"fuente": "x = 1\n", "traza": "arbol"}]
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "requiere sockets Unix")
+class ServidorConCache(unittest.TestCase):
+    opciones = []
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directorio = tempfile.TemporaryDirectory()
+        cls.ruta = os.path.join(cls.directorio.name, "servidor.sock")
+        cls.proceso = subprocess.Popen(
+            [sys.executable, "servidor.py", "--socket", cls.ruta] + cls.opciones,
+            cwd=DIRECTORIO, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+        limite = time.monotonic() + 60
+        while not Clmod.disponible(cls.ruta):
+            if cls.proceso.poll() is not None or time.monotonic() > limite:
+                cls.proceso.kill()
+                raise RuntimeError(f"el servidor no arrancó: {cls.proceso.stderr.read().decode()}")
+            time.sleep(0.1)
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            Clmod.enviar([{"comando": "detener"}], cls.ruta, tiempo_espera=5)
+            cls.proceso.wait(10)
+        except Exception:
+            cls.proceso.kill()
+            cls.proceso.wait()
+        cls.proceso.stderr.close()
+        cls.directorio.cleanup()
+
+    def test_peticiones_invalidas(self):
+        respuestas = Clmod.enviar(PETICIONES_INVALIDAS + [{"fuente": "x = 1\n"}], self.ruta, tiempo_espera=30)
+        self.assertEqual(len(respuestas), len(PETICIONES_INVALIDAS) + 1)
+        for peticion, respuesta in zip(PETICIONES_INVALIDAS, respuestas):
+            with self.subTest(peticion=peticion):
+                self.assertFalse(respuesta["ok"])
+                self.assertTrue(respuesta["mensaje"].startswith("Petición inválida"), respuesta["mensaje"])
+        self.assertTrue(respuestas[-1]["ok"], respuestas[-1]["mensaje"])
+
+    def test_archivo_inexistente(self):
+        ruta = os.path.join(self.directorio.name, "no_existe.py")
+        respuesta, = Clmod.enviar([{"archivo": ruta}], self.ruta, tiempo_espera=30)
+        self.assertFalse(respuesta["ok"])
+        self.assertIn(ruta, respuesta["mensaje"])
+
+class ServidorSinCache(ServidorConCache):
+    opciones = ["--cache-memoria", "0"]
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,319 @@
+import argparse
+import hashlib
+import os
+import sys
+import zlib
+from array import array
+from itertools import accumulate, chain, repeat
+from operator import mul, sub
+import lexer as Lxmod
+from lexer import BufferTokens, ErrorLexer
+
+# Formato binario del flujo de tokens (.tok), para que otras herramientas (o una
+# corrida posterior) analicen sin volver a lexear y sin la fuente. Guarda lo mismo que
+# un lexer.BufferTokens, por columnas:
+#
+#   MAGIA_TOKENS, versión (2 bytes), firma de los códigos de token (8 bytes), opciones
+#   (1 byte: COMPRIMIDO) y el cuerpo, comprimido con zlib si corresponde. El cuerpo son
+#   cinco secciones, cada una precedida por su largo en bytes como varint:
+#    - lexemas: cantidad (varint), largo en caracteres de cada uno (varints) y los
+#      textos en UTF-8 uno tras otro; cada lexema distinto aparece una vez y el 0 es el
+#      lexema vacío;
+#    - tipos: un byte por token, el código de BufferTokens (las palabras clave tienen
+#      código propio, así que el terminal queda resuelto);
+#    - líneas: diferencia con la línea del token anterior (varint);
+#    - columnas: diferencia con la columna del token anterior si está en la misma
+#      línea, o la columna si no (varint; en una línea las columnas no bajan);
+#    - lexemas por token: tamaño de cada índice (1 byte: 1, 2 o 4) y el índice en la
+#      tabla de cada token, en little-endian; los tokens con lexema fijo (INDENT,
+#      DEDENT, NEWLINE, EOF, palabras clave) tienen el 0.
+#
+# Los varint son LEB128 sin signo. Si todos los valores de una sección entran en un
+# byte, la sección es la secuencia de bytes tal cual y se lee sin decodificar uno por
+# uno; lo mismo con los índices de ancho fijo, así que cargar no recorre los tokens en
+# Python. La firma es un hash de la lista de códigos del
+# lexer: si cambian los tipos de token o las palabras clave, cargar() rechaza los
+# archivos viejos.
+#
+# cargar() devuelve un BufferTokens cuya "fuente" es la concatenación de los lexemas,
+# así que parser.analizar_buffer, parser.analizar o cualquier código que recorra Token
+# lo usa igual que el del lexer.
+MAGIA_TOKENS = b"LL1K"
+VERSION_TOKENS = 1
+COMPRIMIDO = 1
+_CABECERA = len(MAGIA_TOKENS) + 2 + 8 + 1
+_NUM_SECCIONES = 5
+_TIPOS_INDICE = {1: 'B', 2: 'H', 4: 'I'}
+
+class ErrorTokens(Exception):
+    pass
+
+def firma_codigos():
+    texto = "\n".join(Lxmod._TIPOS_POR_CODIGO + ["--"] + Lxmod.PALABRAS_CLAVE_ORDENADAS)
+    return hashlib.sha256(texto.encode("utf-8")).digest()[:8]
+
+def _varint(valor, salida):
+    while valor >= 0x80:
+        salida.append((valor & 0x7f) | 0x80)
+        valor >>= 7
+    salida.append(valor)
+
+def _varints(valores):
+    if not valores or max(valores) < 0x80:
+        return bytes(valores)
+    salida = bytearray()
+    for valor in valores:
+        _varint(valor, salida)
+    return bytes(salida)
+
+def _leer_varint(datos, pos):
+    valor = desplazamiento = 0
+    while True:
+        try:
+            byte = datos[pos]
+        except IndexError:
+            raise ErrorTokens("el archivo de tokens está truncado")
+        pos += 1
+        valor |= (byte & 0x7f) << desplazamiento
+        if byte < 0x80:
+            return valor, pos
+        desplazamiento += 7
+
+def _leer_varints(datos, cantidad, pos=0, fin=None):
+    # (array('I') con `cantidad` valores, posición siguiente) de datos[pos:fin].
+    fin = len(datos) if fin is None else fin
+    if fin - pos == cantidad or (fin - pos > cantidad and max(datos[pos:pos + cantidad], default=0) < 0x80):
+        return array('I', iter(datos[pos:pos + cantidad])), pos + cantidad
+    valores = array('I')
+    agregar = valores.append
+    for _ in range(cantidad):
+        if pos >= fin:
+            raise ErrorTokens("el archivo de tokens está truncado")
+        byte = datos[pos]
+        if byte < 0x80:
+            agregar(byte)
+            pos += 1
+        else:
+            valor, pos = _leer_varint(datos, pos)
+            agregar(valor)
+    return valores, pos
+
+def _como_buffer(tokens):
+    # Un BufferTokens con los mismos tokens (una lista de Token, p. ej. de lexer.tokenizar).
+    if isinstance(tokens, BufferTokens):
+        return tokens
+    buffer = BufferTokens("")
+    partes = []
+    largo = 0
+    codigo_tipo, codigo_clave = Lxmod.CODIGOS_TIPO, Lxmod.CODIGOS_PALABRA_CLAVE
+    for token in tokens:
+        if token.tipo == "KEYWORD":
+            codigo = codigo_clave[token.lexema]
+        else:
+            codigo = codigo_tipo[token.tipo]
+        buffer.tipos.append(codigo)
+        buffer.lineas.append(token.linea)
+        buffer.cols.append(token.col)
+        if Lxmod._LEXEMAS_POR_CODIGO[codigo] is None:
+            partes.append(token.lexema)
+            buffer.inicios.append(largo)
+            largo += len(token.lexema)
+            buffer.fines.append(largo)
+        else:
+            buffer.inicios.append(0)
+            buffer.fines.append(0)
+    buffer.fuente = "".join(partes)
+    return buffer
+
+def volcar_bytes(tokens, comprimir=True):
+    # Serializa un BufferTokens (lexer.tokenizar_compacto) o una secuencia de Token.
+    buffer = _como_buffer(tokens)
+    fuente, tipos, lineas, cols = buffer.fuente, buffer.tipos, buffer.lineas, buffer.cols
+    fijos = Lxmod._LEXEMAS_POR_CODIGO
+
+    indice_lexemas = {"": 0}
+    indices = array('I')
+    for codigo, inicio, fin in zip(tipos, buffer.inicios, buffer.fines):
+        if fijos[codigo] is None:
+            lexema = fuente[inicio:fin]
+            indice = indice_lexemas.get(lexema)
+            if indice is None:
+                indice = indice_lexemas[lexema] = len(indice_lexemas)
+            indices.append(indice)
+        else:
+            indices.append(0)
+    tabla = bytearray()
+    _varint(len(indice_lexemas), tabla)
+    tabla += _varints([len(lexema) for lexema in indice_lexemas])
+    tabla += "".join(indice_lexemas).encode("utf-8")
+    ancho = 1 if len(indice_lexemas) <= 0x100 else 2 if len(indice_lexemas) <= 0x10000 else 4
+    indices = array(_TIPOS_INDICE[ancho], indices)
+    if sys.byteorder != "little":
+        indices.byteswap()
+
+    deltas_linea = []
+    deltas_col = []
+    linea_anterior = col_anterior = 0
+    for linea, col in zip(lineas, cols):
+        if linea != linea_anterior:
+            col_anterior = 0
+        deltas_linea.append(linea - linea_anterior)
+        deltas_col.append(col - col_anterior)
+        linea_anterior, col_anterior = linea, col
+
+    cuerpo = bytearray()
+    for seccion in (tabla, bytes(tipos), _varints(deltas_linea), _varints(deltas_col), bytes([ancho]) + indices.tobytes()):
+        _varint(len(seccion), cuerpo)
+        cuerpo += seccion
+    opciones = COMPRIMIDO if comprimir else 0
+    if comprimir:
+        cuerpo = zlib.compress(cuerpo, 6)
+    return MAGIA_TOKENS + VERSION_TOKENS.to_bytes(2, "little") + firma_codigos() + bytes([opciones]) + bytes(cuerpo)
+
+def _secciones(datos):
+    if len(datos) < _CABECERA or not datos.startswith(MAGIA_TOKENS):
+        raise ErrorTokens("no es un archivo de tokens")
+    pos = len(MAGIA_TOKENS)
+    version = int.from_bytes(datos[pos:pos + 2], "little")
+    if version != VERSION_TOKENS:
+        raise ErrorTokens(f"versión de archivo de tokens {version} no soportada")
+    if datos[pos + 2:pos + 10] != firma_codigos():
+        raise ErrorTokens("el archivo de tokens se generó con otros códigos de token")
+    opciones = datos[pos + 10]
+    cuerpo = memoryview(datos)[_CABECERA:]
+    if opciones & COMPRIMIDO:
+        try:
+            cuerpo = memoryview(zlib.decompress(cuerpo))
+        except zlib.error as e:
+            raise ErrorTokens(f"el archivo de tokens está dañado: {e}")
+    secciones = []
+    pos = 0
+    for _ in range(_NUM_SECCIONES):
+        largo, pos = _leer_varint(cuerpo, pos)
+        if pos + largo > len(cuerpo):
+            raise ErrorTokens("el archivo de tokens está truncado")
+        secciones.append(cuerpo[pos:pos + largo])
+        pos += largo
+    return secciones
+
+def cargar_bytes(datos):
+    # BufferTokens a partir de volcar_bytes; lanza ErrorTokens si los datos no son válidos.
+    tabla, tipos, deltas_linea, deltas_col, indices = _secciones(datos)
+
+    cantidad_lexemas, pos = _leer_varint(tabla, 0)
+    largos, pos = _leer_varints(tabla, cantidad_lexemas, pos)
+    try:
+        lexemas = bytes(tabla[pos:]).decode("utf-8")
+    except UnicodeDecodeError:
+        raise ErrorTokens("la tabla de lexemas no es UTF-8 válido")
+    fines_lexema = array('I', accumulate(largos))
+    if not fines_lexema or fines_lexema[-1] != len(lexemas):
+        raise ErrorTokens("la tabla de lexemas no coincide con sus largos")
+    inicios_lexema = array('I', [0])
+    inicios_lexema.extend(fines_lexema[:-1])
+
+    n = len(tipos)
+    buffer = BufferTokens(lexemas)
+    buffer.tipos = bytearray(tipos)
+    if max(buffer.tipos, default=0) >= len(Lxmod._TIPOS_POR_CODIGO):
+        raise ErrorTokens("código de token desconocido")
+    saltos = _leer_varints(deltas_linea, n)[0]
+    buffer.lineas = array('I', accumulate(saltos))
+    # Columnas sin recorrer los tokens en Python: con las sumas acumuladas de las
+    # diferencias, la columna es la suma menos la suma anterior al primer token de su
+    # línea. Las sumas no bajan, así que esa base se arrastra con max.
+    sumas = array('Q', accumulate(_leer_varints(deltas_col, n)[0]))
+    comienzos = map(min, saltos, repeat(1))
+    bases = accumulate(map(mul, chain((0,), sumas), comienzos), max)
+    buffer.cols = array('I', map(sub, sumas, bases))
+
+    if not len(indices) or indices[0] not in _TIPOS_INDICE:
+        raise ErrorTokens("tamaño de índice de lexema no soportado")
+    por_token = array(_TIPOS_INDICE[indices[0]])
+    try:
+        por_token.frombytes(indices[1:])
+    except ValueError:
+        raise ErrorTokens("el archivo de tokens está truncado")
+    if sys.byteorder != "little":
+        por_token.byteswap()
+    if len(por_token) != n:
+        raise ErrorTokens("una sección del archivo de tokens no tiene la cantidad esperada de valores")
+    try:
+        buffer.inicios = array('I', map(inicios_lexema.__getitem__, por_token))
+        buffer.fines = array('I', map(fines_lexema.__getitem__, por_token))
+    except IndexError:
+        raise ErrorTokens("índice de lexema fuera de la tabla")
+    return buffer
+
+def volcar(tokens, ruta, comprimir=True):
+    datos = volcar_bytes(tokens, comprimir)
+    with open(ruta, "wb") as f:
+        f.write(datos)
+    return len(datos)
+
+def cargar(ruta):
+    with open(ruta, "rb") as f:
+        return cargar_bytes(f.read())
+
+def ruta_tok(ruta, directorio=None):
+    base = os.path.splitext(ruta)[0] + ".tok"
+    return base if directorio is None else os.path.join(directorio, os.path.basename(base))
+
+def principal(argv=None):
+    import main as Mmod
+    import parser as Pmod
+    analizador = argparse.ArgumentParser(description="Exporta flujos de tokens a archivos .tok y los analiza sin la fuente.")
+    sub = analizador.add_subparsers(dest="comando", required=True)
+    p = sub.add_parser("exportar", help="lexea cada archivo y escribe su .tok")
+    p.add_argument("archivos", nargs="+")
+    p.add_argument("-d", "--directorio", default=None, help="directorio de salida (por defecto junto a cada fuente)")
+    p.add_argument("--sin-comprimir", action="store_true", help="no comprimir el cuerpo con zlib")
+    p = sub.add_parser("analizar", help="analiza un archivo .tok y escribe el reporte como main.py")
+    p.add_argument("archivo")
+    p.add_argument("--traza", choices=["completa", "conteos", "ninguna"], default="completa")
+    p = sub.add_parser("inspeccionar", help="muestra cantidad de tokens, lexemas distintos y tamaño")
+    p.add_argument("archivos", nargs="+")
+    args = analizador.parse_args(argv)
+
+    codigo_salida = 0
+    if args.comando == "exportar":
+        for ruta in args.archivos:
+            try:
+                with open(ruta, "r", encoding="utf-8") as f:
+                    buffer = Lxmod.tokenizar_compacto(f.read())
+            except ErrorLexer as e:
+                print(f"{ruta}: {Mmod.formatear_error_lexer(e)}", file=sys.stderr)
+                codigo_salida = 1
+                continue
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Error leyendo archivo {ruta}: {e}", file=sys.stderr)
+                codigo_salida = 1
+                continue
+            destino = ruta_tok(ruta, args.directorio)
+            tamano = volcar(buffer, destino, not args.sin_comprimir)
+            print(f"{destino}: {len(buffer)} tokens, {tamano} bytes")
+    elif args.comando == "analizar":
+        try:
+            buffer = cargar(args.archivo)
+        except (OSError, ErrorTokens) as e:
+            print(f"Error leyendo tokens: {e}", file=sys.stderr)
+            return 1
+        tc = Mmod.cargar_tabla().compilada
+        ok, mensaje, aplicadas = Mmod.normalizar_resultado(Pmod.analizar_buffer(buffer, tc, Mmod.NIVEL_PARSER[args.traza]))
+        Mmod.escribir_salida(mensaje, aplicadas if ok else None, tc, args.traza)
+        print(mensaje)
+        codigo_salida = 0 if ok else 1
+    else:
+        for ruta in args.archivos:
+            try:
+                buffer = cargar(ruta)
+            except (OSError, ErrorTokens) as e:
+                print(f"{ruta}: {e}", file=sys.stderr)
+                codigo_salida = 1
+                continue
+            distintos = len({buffer.fuente[i:f] for i, f in zip(buffer.inicios, buffer.fines) if f > i})
+            print(f"{ruta}: {len(buffer)} tokens, {distintos} lexemas distintos, {os.path.getsize(ruta)} bytes")
+    return codigo_salida
+
+if __name__ == "__main__":
+    sys.exit(principal())
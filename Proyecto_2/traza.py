@@ -0,0 +1,130 @@
+import argparse
+import sys
+from array import array
+
+# Escritura de la traza de producciones aplicadas a partir de sus ids (parser con
+# traza="ids" o "conteos"). El texto de cada producción se arma una sola vez por id y
+# las líneas se escriben en lotes de `tam_lote`, en lugar de un join y un write por
+# producción. EscritorTraza.escribir se puede llamar varias veces con partes de la
+# traza; la numeración continúa.
+#
+# Traza binaria: cabecera MAGIA_TRAZA, versión (2 bytes), tamaño de cada id (1 byte),
+# huella de la gramática (32 bytes, cache_tabla.huella_gramatica) y cantidad de ids
+# (8 bytes), seguida de los ids en little-endian. `python traza.py archivo` la expande
+# al mismo texto que main.py escribe en el reporte.
+MAGIA_TRAZA = b"LL1T"
+VERSION_TRAZA = 1
+_CABECERA = len(MAGIA_TRAZA) + 2 + 1 + 32 + 8
+
+class ErrorTraza(Exception):
+    pass
+
+def texto_produccion(nt, prod):
+    return f"{nt} → {' '.join(prod)}"
+
+class EscritorTraza:
+    def __init__(self, archivo, tc, tam_lote=4096):
+        self.archivo = archivo
+        self.tam_lote = tam_lote
+        self.textos = [texto_produccion(nt, prod) for nt, prod in tc.producciones]
+        self.escritas = 0
+
+    def encabezado(self):
+        self.archivo.write("\nSecuencia de producciones aplicadas:\n")
+
+    def escribir(self, ids):
+        textos = self.textos
+        lote = []
+        i = self.escritas
+        for p in ids:
+            i += 1
+            lote.append(f"{i}. {textos[p]}\n")
+            if len(lote) >= self.tam_lote:
+                self.archivo.write("".join(lote))
+                lote.clear()
+        if lote:
+            self.archivo.write("".join(lote))
+        self.escritas = i
+
+    def escribir_conteos(self, conteos):
+        textos = self.textos
+        total = sum(conteos)
+        lineas = [f"\nConteo de producciones aplicadas ({total} en total):\n"]
+        lineas.extend(f"{n:>10}  {textos[p]}\n" for p, n in enumerate(conteos) if n)
+        self.archivo.write("".join(lineas))
+
+def contar_ids(ids, tc):
+    conteos = [0] * len(tc.producciones)
+    for p in ids:
+        conteos[p] += 1
+    return conteos
+
+def escribir_binaria(ruta, ids, huella):
+    datos = ids if sys.byteorder == "little" else _invertidos(ids)
+    with open(ruta, "wb") as f:
+        f.write(MAGIA_TRAZA + VERSION_TRAZA.to_bytes(2, "little") + bytes([ids.itemsize]) + huella
+                + len(ids).to_bytes(8, "little"))
+        f.write(memoryview(datos).cast("B"))
+
+def leer_binaria(ruta):
+    # Devuelve (huella, ids); lanza ErrorTraza si el archivo no es una traza válida.
+    with open(ruta, "rb") as f:
+        cabecera = f.read(_CABECERA)
+        if len(cabecera) < _CABECERA or not cabecera.startswith(MAGIA_TRAZA):
+            raise ErrorTraza(f"{ruta} no es una traza binaria")
+        pos = len(MAGIA_TRAZA)
+        version = int.from_bytes(cabecera[pos:pos + 2], "little")
+        if version != VERSION_TRAZA:
+            raise ErrorTraza(f"{ruta}: versión de traza {version} no soportada")
+        tam = cabecera[pos + 2]
+        huella = cabecera[pos + 3:pos + 35]
+        cantidad = int.from_bytes(cabecera[pos + 35:], "little")
+        tipos = {2: 'H', 4: 'I'}
+        if tam not in tipos:
+            raise ErrorTraza(f"{ruta}: tamaño de id {tam} no soportado")
+        ids = array(tipos[tam])
+        try:
+            ids.fromfile(f, cantidad)
+        except EOFError:
+            raise ErrorTraza(f"{ruta}: la traza está truncada")
+    if sys.byteorder != "little":
+        ids.byteswap()
+    return huella, ids
+
+def _invertidos(ids):
+    copia = array(ids.typecode, ids)
+    copia.byteswap()
+    return copia
+
+def principal(argv=None):
+    import cache_tabla as Cmod
+    analizador = argparse.ArgumentParser(description="Expande una traza binaria de main.py --traza-binaria a texto.")
+    analizador.add_argument("archivo", help="traza binaria")
+    analizador.add_argument("-o", "--salida", default=None, help="archivo de salida (por defecto la salida estándar)")
+    analizador.add_argument("--conteos", action="store_true", help="escribir solo cuántas veces se aplicó cada producción")
+    args = analizador.parse_args(argv)
+
+    try:
+        huella, ids = leer_binaria(args.archivo)
+    except (OSError, ErrorTraza) as e:
+        print(f"Error leyendo la traza: {e}", file=sys.stderr)
+        sys.exit(1)
+    gc = Cmod.gramatica_compilada()
+    if huella != gc.huella:
+        print("Error: la traza se generó con otra gramática.", file=sys.stderr)
+        sys.exit(1)
+
+    salida = sys.stdout if args.salida is None else open(args.salida, "w", encoding="utf-8")
+    try:
+        escritor = EscritorTraza(salida, gc.compilada)
+        if args.conteos:
+            escritor.escribir_conteos(contar_ids(ids, gc.compilada))
+        else:
+            escritor.encabezado()
+            escritor.escribir(ids)
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+
+if __name__ == "__main__":
+    principal()